@@ -1,10 +1,23 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList, ORDER_VAR, PAGE_VAR
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import PermissionDenied
+from django.db.models import Q
 from django.utils.html import format_html
 from django.urls import path
 from django.shortcuts import render
-from django.db.models import Sum, F
+from django.db.models import Sum, Count, F
+from django.core.paginator import Paginator
 from django.utils import timezone
-from .models import Event, EventParticipant, Donation
+from .models import Event, EventParticipant, Donation, OutboundEmail, financial_year_label
+from .exports import (
+    PARTICIPANT_HEADER, participant_rows, streaming_csv_response, streaming_xlsx_response,
+)
+from .forms import DonationImportForm
+from .importers import DonationImporter
+from .pagination import EstimatedCountPaginator, encode_cursor, decode_cursor
 
 
 @admin.register(Event)
@@ -63,6 +76,22 @@ class EventAdmin(admin.ModelAdmin):
     )
 
     readonly_fields = ('event_id', 'created_at')   # if you add created_at later
+    actions = ['export_participants_csv', 'export_participants_xlsx']
+
+    def _roster_filename(self, queryset, extension):
+        ids = sorted(queryset.values_list('event_id', flat=True))
+        suffix = '-'.join(map(str, ids[:5])) + ('-etc' if len(ids) > 5 else '')
+        return f"participants-{suffix}.{extension}", ids
+
+    @admin.action(description="Export participants (CSV)")
+    def export_participants_csv(self, request, queryset):
+        filename, ids = self._roster_filename(queryset, 'csv')
+        return streaming_csv_response(filename, PARTICIPANT_HEADER, participant_rows(ids))
+
+    @admin.action(description="Export participants (Excel)")
+    def export_participants_xlsx(self, request, queryset):
+        filename, ids = self._roster_filename(queryset, 'xlsx')
+        return streaming_xlsx_response(filename, PARTICIPANT_HEADER, participant_rows(ids), 'Participants')
 
     def is_featured_badge(self, obj):
         return format_html(
@@ -89,6 +118,110 @@ class EventAdmin(admin.ModelAdmin):
     is_expired.short_description = "Status"
 
 
+class EventAutocompleteFilter(admin.SimpleListFilter):
+    """
+    Event filter backed by the admin autocomplete endpoint, so the sidebar
+    doesn't render a link for every event ever held.
+    """
+    title = 'event'
+    parameter_name = 'event'
+    template = 'activities/admin/autocomplete_filter.html'
+
+    def __init__(self, request, params, model, model_admin):
+        self.model_admin = model_admin
+        super().__init__(request, params, model, model_admin)
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def queryset(self, request, queryset):
+        if self.value():
+            try:
+                event_id = int(self.value())
+            except ValueError:
+                # The change list redirects to itself with ?e=1
+                raise IncorrectLookupParameters(f"invalid event {self.value()!r}")
+            return queryset.filter(event_id=event_id)
+        return queryset
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.value() is None,
+            'query_string': changelist.get_query_string(remove=[self.parameter_name]),
+            'display': 'All',
+        }
+
+    def widget(self):
+        field = forms.ModelChoiceField(
+            queryset=Event.objects.all(),
+            required=False,
+            widget=AutocompleteSelect(
+                EventParticipant._meta.get_field('event'),
+                self.model_admin.admin_site,
+                attrs={'id': 'event-autocomplete-filter', 'data-parameter': self.parameter_name},
+            ),
+        )
+        return field.widget.render(self.parameter_name, self.value())
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Change list that can continue past the last page via a keyset cursor
+    (``?after=``) on the default (-registered_at, -pk) ordering, so deep
+    pages cost an index range scan instead of a large OFFSET.
+    """
+    cursor_var = 'after'
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor = request.GET.get(self.cursor_var)
+        super().__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(self.cursor_var, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Sorting, filtering and page links always start from the top again
+        return super().get_query_string(new_params, [*(remove or []), self.cursor_var])
+
+    def get_results(self, request):
+        self.next_cursor = None
+        if self.cursor and ORDER_VAR not in self.params:
+            try:
+                registered_at, pk = decode_cursor(self.cursor)
+            except ValueError:
+                registered_at = None
+            if registered_at is not None:
+                self._get_keyset_results(request, registered_at, pk)
+                return
+        self.cursor = None
+        super().get_results(request)
+        if self.multi_page and ORDER_VAR not in self.params:
+            self._set_next_cursor(list(self.result_list))
+
+    def _get_keyset_results(self, request, registered_at, pk):
+        super().get_results(request)
+        self.result_list = self.queryset.filter(
+            Q(registered_at__lt=registered_at) |
+            Q(registered_at=registered_at, pk__lt=pk)
+        )[:self.list_per_page]
+        self.multi_page = True
+        self.can_show_all = False
+        self._set_next_cursor(list(self.result_list))
+
+    def _set_next_cursor(self, rows):
+        if len(rows) == self.list_per_page:
+            last = rows[-1]
+            self.next_cursor = super().get_query_string(
+                {self.cursor_var: encode_cursor(last.registered_at, last.pk)},
+                remove=[PAGE_VAR],
+            )
+
+
 @admin.register(EventParticipant)
 class EventParticipantAdmin(admin.ModelAdmin):
     list_display = (
@@ -101,7 +234,7 @@ class EventParticipantAdmin(admin.ModelAdmin):
         'withdrawal_date',
     )
     list_filter = (
-        'event',
+        EventAutocompleteFilter,
         'registered_at',
         'withdrawal_date',
         'event__is_featured',
@@ -112,9 +245,12 @@ class EventParticipantAdmin(admin.ModelAdmin):
         'event__title',
         'notes',
     )
-    date_hierarchy = 'registered_at'
     list_per_page = 25
+    list_select_related = ('event', 'user')
+    # The default "N total" link runs a second unfiltered COUNT(*)
+    show_full_result_count = False
     ordering = ('-registered_at',)
+    change_list_template = "activities/admin/eventparticipant_change_list.html"
 
     raw_id_fields = ('user', 'event')   # better for large numbers of users/events
 
@@ -129,6 +265,21 @@ class EventParticipantAdmin(admin.ModelAdmin):
 
     readonly_fields = ('registered_at',)
 
+    @property
+    def media(self):
+        # select2 and autocomplete.js for the event filter
+        return super().media + AutocompleteSelect(
+            EventParticipant._meta.get_field('event'), self.admin_site
+        ).media
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        return EstimatedCountPaginator(
+            queryset, per_page, orphans, allow_empty_first_page, max_pages=20
+        )
+
     def event_title(self, obj):
         return obj.event.title
     event_title.short_description = "Event"
@@ -140,7 +291,7 @@ class EventParticipantAdmin(admin.ModelAdmin):
     full_name_or_email.admin_order_field = 'full_name'
 
     def is_member(self, obj):
-        return bool(obj.user)
+        return obj.user_id is not None
     is_member.boolean = True
     is_member.short_description = "Member"
 
@@ -162,6 +313,7 @@ class DonationAdmin(admin.ModelAdmin):
         'user',
         'amount',
         'date',
+        'financial_year_label',
         'created_at',
     )
     search_fields = (
@@ -170,6 +322,7 @@ class DonationAdmin(admin.ModelAdmin):
         'notes',
     )
     list_filter = (
+        'financial_year',
         'date',
         'created_at',
     )
@@ -178,71 +331,104 @@ class DonationAdmin(admin.ModelAdmin):
     raw_id_fields = ('user',)
     change_list_template = "activities/admin/donation_change_list.html"
 
+    @admin.display(description="Financial Year", ordering='financial_year')
+    def financial_year_label(self, obj):
+        return obj.financial_year_label
+
+    summary_per_page = 50
+
     def get_urls(self):
         urls = super().get_urls()
         custom_urls = [
+            path('import/', self.admin_site.admin_view(self.import_view), name='donation_import'),
             path('summary/', self.admin_site.admin_view(self.summary_view), name='donation_summary'),
+            path('summary/export/', self.admin_site.admin_view(self.summary_export_view), name='donation_summary_export'),
+            path(
+                'summary/<int:user_id>/<int:year>/',
+                self.admin_site.admin_view(self.summary_detail_view),
+                name='donation_summary_detail',
+            ),
         ]
         return custom_urls + urls
 
-    def summary_view(self, request):
-        # Calculate financial year for each donation and aggregate
-        # Since logic is complex for FY, we can fetch all and process in python or use complex annotations.
-        # Python processing is easier for 'Apr-Mar' year logic unless dataset is huge.
-        
-        donations = Donation.objects.select_related('user').order_by('user__username', '-date')
-        
-        # Structure: { (user, fy_string): {'total': 0.0, 'donations': []} }
-        from collections import defaultdict
-        # Helper to create default dict entry
-        def default_entry():
-            return {'total': 0.0, 'donations': []}
-            
-        data = defaultdict(default_entry)
-        fy_totals = defaultdict(float)
-        
-        for d in donations:
-            if d.date.month >= 4:
-                fy = f"{d.date.year}-{d.date.year + 1}"
-            else:
-                fy = f"{d.date.year - 1}-{d.date.year}"
-            
-            key = (d.user, fy)
-            data[key]['total'] += float(d.amount)
-            data[key]['donations'].append(d)
-            fy_totals[fy] += float(d.amount)
-            
-        # Convert to list for template
-        summary_list = []
-        for (user, fy), info in data.items():
-            summary_list.append({
-                'user': user,
-                'fy': fy,
-                'total': info['total'],
-                'donations': info['donations']  # List of donation objects
-            })
-            
-        # FY Totals list sorted by FY desc
-        fy_summary_list = sorted(
-            [{'fy': fy, 'total': total} for fy, total in fy_totals.items()],
-            key=lambda x: x['fy'],
-            reverse=True
+    def import_view(self, request):
+        """Upload a CSV of historical donations; see ``DonationImporter``."""
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        result = None
+        if request.method == 'POST':
+            form = DonationImportForm(request.POST, request.FILES)
+            if form.is_valid():
+                importer = DonationImporter(dry_run=form.cleaned_data['dry_run'])
+                try:
+                    result = importer.import_file(form.cleaned_data['file'].file)
+                except ValueError as e:
+                    form.add_error('file', str(e))
+                else:
+                    level = messages.WARNING if result.errors else messages.SUCCESS
+                    prefix = "Dry run: " if importer.dry_run else ""
+                    self.message_user(request, f"{prefix}{result}", level)
+        else:
+            form = DonationImportForm()
+        context = dict(
+            self.admin_site.each_context(request),
+            form=form,
+            result=result,
+            opts=self.model._meta,
+            title="Import Donations",
+        )
+        return render(request, "activities/admin/donation_import.html", context)
+
+    def _selected_year(self, request):
+        """The ``fy`` filter ("2025-2026") as a start year, or None."""
+        try:
+            return int(request.GET.get('fy', '').split('-')[0])
+        except ValueError:
+            return None
+
+    def _donor_totals(self, year):
+        # Filter first, then group: one row per (donor, financial year)
+        donations = Donation.objects.all()
+        if year is not None:
+            donations = donations.filter(financial_year=year)
+        return (
+            donations.values(
+                'user', 'financial_year', 'user__username', 'user__first_name', 'user__last_name',
+            )
+            .annotate(total=Sum('amount'), count=Count('id'))
+            .order_by('user__username', '-financial_year')
         )
 
-        # Prepare filter options (all available FYs)
-        # Sort headers descending (e.g. 2025-2026, 2024-2025)
-        all_fys = sorted(fy_totals.keys(), reverse=True)
+    def summary_view(self, request):
+        # Financial years come from the generated Donation.financial_year
+        # column, so grouping, totals and filtering all happen in SQL and
+        # only one page of donors is ever loaded
+        fy_summary_list = [
+            {'fy': financial_year_label(row['financial_year']), 'year': row['financial_year'], 'total': row['total']}
+            for row in Donation.objects.values('financial_year')
+            .annotate(total=Sum('amount'))
+            .order_by('-financial_year')
+        ]
+        all_fys = [item['fy'] for item in fy_summary_list]
 
         # Handle Filtering
-        selected_fy = request.GET.get('fy')
-        if selected_fy and selected_fy in all_fys:
-            # Filter the lists
-            summary_list = [item for item in summary_list if item['fy'] == selected_fy]
-            fy_summary_list = [item for item in fy_summary_list if item['fy'] == selected_fy]
+        year = self._selected_year(request)
+        selected_fy = financial_year_label(year) if year is not None else None
+        if selected_fy not in all_fys:
+            year = selected_fy = None
+        else:
+            fy_summary_list = [item for item in fy_summary_list if item['year'] == year]
+
+        paginator = Paginator(self._donor_totals(year), self.summary_per_page)
+        page_obj = paginator.get_page(request.GET.get('p'))
+        for row in page_obj:
+            row['fy'] = financial_year_label(row['financial_year'])
+            row['full_name'] = f"{row['user__first_name']} {row['user__last_name']}".strip()
 
         context = dict(
            self.admin_site.each_context(request),
-           summary_list=summary_list,
+           summary_list=page_obj,
+           page_obj=page_obj,
            fy_summary_list=fy_summary_list,
            all_fys=all_fys,
            selected_fy=selected_fy,
@@ -250,4 +436,76 @@ class DonationAdmin(admin.ModelAdmin):
         )
         return render(request, "activities/admin/donation_summary.html", context)
 
+    def summary_detail_view(self, request, user_id, year):
+        """One donor's donations in one financial year, for the drill-down row."""
+        donations = (
+            Donation.objects.filter(user_id=user_id, financial_year=year)
+            .only('date', 'amount', 'notes')
+            .order_by('-date')
+        )
+        return render(request, "activities/admin/donation_summary_detail.html", {'donations': donations})
+
+    def summary_export_view(self, request):
+        """
+        CSV of the summary, or of every individual donation with
+        ``?detail=1``; honours the ``fy`` filter. Rows are streamed from a
+        server-side cursor, so memory use does not depend on row count.
+        """
+        year = self._selected_year(request)
+        suffix = f"-{financial_year_label(year)}" if year is not None else ""
+        if request.GET.get('detail'):
+            donations = Donation.objects.order_by('user__username', 'date')
+            if year is not None:
+                donations = donations.filter(financial_year=year)
+            rows = (
+                (username, financial_year_label(fy), date.isoformat(), f"{amount:.2f}", notes)
+                for username, fy, date, amount, notes in donations.values_list(
+                    'user__username', 'financial_year', 'date', 'amount', 'notes',
+                ).iterator(chunk_size=2000)
+            )
+            return streaming_csv_response(
+                f"donations{suffix}.csv",
+                ['Username', 'Financial Year', 'Date', 'Amount (HKD)', 'Notes'],
+                rows,
+            )
+        rows = (
+            (
+                row['user__username'],
+                f"{row['user__first_name']} {row['user__last_name']}".strip(),
+                financial_year_label(row['financial_year']),
+                row['count'],
+                f"{row['total']:.2f}",
+            )
+            for row in self._donor_totals(year).iterator(chunk_size=2000)
+        )
+        return streaming_csv_response(
+            f"donation-summary{suffix}.csv",
+            ['Username', 'Name', 'Financial Year', 'Donations', 'Total (HKD)'],
+            rows,
+        )
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'subject',
+        'to_email',
+        'status',
+        'attempts',
+        'next_attempt_at',
+        'sent_at',
+    )
+    list_filter = ('status',)
+    search_fields = ('to_email', 'subject')
+    list_per_page = 50
+    raw_id_fields = ('participant',)
+    readonly_fields = ('created_at', 'sent_at', 'attempts', 'last_error')
+    actions = ['retry_now']
 
+    @admin.action(description="Retry selected emails now")
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status=OutboundEmail.STATUS_SENT).update(
+            status=OutboundEmail.STATUS_PENDING,
+            next_attempt_at=timezone.now(),
+        )
+        self.message_user(request, f"{updated} email(s) queued for retry.")
@@ -0,0 +1,279 @@
+"""
+Rendering of transactional emails.
+
+Confirmation emails only differ per participant in a handful of fields, so
+each template is rendered once per event version with placeholders in those
+spots, its CSS is inlined, and the result is cached. Building a message is
+then a single placeholder substitution instead of a template render, a CSS
+pass and ``strip_tags`` over the full HTML.
+"""
+import os
+import re
+from collections import OrderedDict
+from html.parser import HTMLParser
+from html import escape as escape_attr
+
+from django.template.loader import get_template
+from django.utils import dateformat, timezone
+from django.utils.html import escape
+
+CONFIRMATION_HTML = 'activities/emails/registration_confirmation.html'
+CONFIRMATION_TEXT = 'activities/emails/registration_confirmation.txt'
+
+# Fields substituted per message; everything else is part of the cached skeleton
+PER_MESSAGE_FIELDS = ('recipient_name', 'registered_on', 'spots_left', 'year')
+
+_MARK = '\x1e'
+_PLACEHOLDER_RE = re.compile(_MARK + r'(\w+)' + _MARK)
+_CACHE_SIZE = 256
+
+
+# ---------------------------------------------------------------------------
+# CSS inlining
+# ---------------------------------------------------------------------------
+
+_VOID_ELEMENTS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'source', 'track', 'wbr',
+}
+_STYLE_RE = re.compile(r'<style[^>]*>(.*?)</style>', re.S | re.I)
+_RULE_RE = re.compile(r'([^{}]+)\{([^{}]*)\}')
+_COMPOUND_RE = re.compile(r'^([a-z][a-z0-9]*)?((?:\.[\w-]+)*)(:first-child)?$', re.I)
+
+
+class _Node:
+    __slots__ = ('tag', 'attrs', 'children', 'parent', 'index')
+
+    def __init__(self, tag, attrs, parent, index):
+        self.tag = tag
+        self.attrs = attrs
+        self.children = []
+        self.parent = parent
+        self.index = index
+
+    @property
+    def classes(self):
+        return (dict(self.attrs).get('class') or '').split()
+
+
+class _TreeBuilder(HTMLParser):
+    """Build a lightweight element tree that serialises back losslessly."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.root = _Node(None, [], None, 0)
+        self.current = self.root
+
+    def _element(self, tag, attrs):
+        index = sum(1 for c in self.current.children if isinstance(c, _Node))
+        node = _Node(tag, attrs, self.current, index)
+        self.current.children.append(node)
+        return node
+
+    def handle_starttag(self, tag, attrs):
+        node = self._element(tag, attrs)
+        if tag not in _VOID_ELEMENTS:
+            self.current = node
+
+    def handle_startendtag(self, tag, attrs):
+        self._element(tag, attrs)
+
+    def handle_endtag(self, tag):
+        node = self.current
+        while node is not self.root and node.tag != tag:
+            node = node.parent
+        if node is not self.root:
+            self.current = node.parent
+
+    def handle_data(self, data):
+        self.current.children.append(data)
+
+    def handle_entityref(self, name):
+        self.current.children.append(f'&{name};')
+
+    def handle_charref(self, name):
+        self.current.children.append(f'&#{name};')
+
+    def handle_comment(self, data):
+        self.current.children.append(f'<!--{data}-->')
+
+    def handle_decl(self, decl):
+        self.current.children.append(f'<!{decl}>')
+
+
+def _serialise(node, out):
+    for child in node.children:
+        if isinstance(child, str):
+            out.append(child)
+            continue
+        attrs = ''.join(
+            f' {k}' if v is None else f' {k}="{escape_attr(v, quote=True)}"'
+            for k, v in child.attrs
+        )
+        out.append(f'<{child.tag}{attrs}>')
+        if child.tag not in _VOID_ELEMENTS:
+            _serialise(child, out)
+            out.append(f'</{child.tag}>')
+    return out
+
+
+def _parse_selector(selector):
+    parts = []
+    for compound in selector.split():
+        m = _COMPOUND_RE.match(compound)
+        if not m or not any(m.groups()):
+            return None
+        tag, classes, first_child = m.groups()
+        parts.append((tag and tag.lower(), [c for c in classes.split('.') if c], bool(first_child)))
+    return parts or None
+
+
+def _compound_matches(node, tag, classes, first_child):
+    if tag and node.tag != tag:
+        return False
+    if first_child and node.index != 0:
+        return False
+    node_classes = node.classes
+    return all(c in node_classes for c in classes)
+
+
+def _matches(node, parts):
+    *ancestors, last = parts
+    if not _compound_matches(node, *last):
+        return False
+    node = node.parent
+    for part in reversed(ancestors):
+        while node is not None and node.tag is not None and not _compound_matches(node, *part):
+            node = node.parent
+        if node is None or node.tag is None:
+            return False
+        node = node.parent
+    return True
+
+
+def _walk(node):
+    for child in node.children:
+        if isinstance(child, _Node):
+            yield child
+            yield from _walk(child)
+
+
+def inline_css(html):
+    """
+    Copy the rules of the document's ``<style>`` blocks onto matching
+    elements' ``style`` attributes, for mail clients that ignore ``<style>``.
+
+    Only type, class, descendant and ``:first-child`` selectors are
+    inlined; anything else (``:hover``, media queries) is left to the
+    ``<style>`` block, which is kept as is.
+    """
+    rules = []
+    for block in _STYLE_RE.findall(html):
+        for order, (selectors, body) in enumerate(_RULE_RE.findall(block)):
+            declarations = ' '.join(d.strip() + ';' for d in body.split(';') if d.strip())
+            for selector in selectors.split(','):
+                parts = _parse_selector(selector.strip())
+                if parts is None:
+                    continue
+                specificity = (
+                    sum(len(c) + f for _, c, f in parts),
+                    sum(1 for t, _, _ in parts if t),
+                )
+                rules.append((specificity, order, parts, declarations))
+    if not rules:
+        return html
+    rules.sort(key=lambda r: (r[0], r[1]))
+
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    for node in _walk(builder.root):
+        if node.tag in ('style', 'head', 'html', 'title', 'meta'):
+            continue
+        styles = [decl for _, _, parts, decl in rules if _matches(node, parts)]
+        if not styles:
+            continue
+        attrs = dict(node.attrs)
+        if attrs.get('style'):
+            # Inline styles already on the element keep the last word
+            styles.append(attrs['style'].strip().rstrip(';') + ';')
+        attrs['style'] = ' '.join(styles)
+        node.attrs = list(attrs.items())
+    return ''.join(_serialise(builder.root, []))
+
+
+# ---------------------------------------------------------------------------
+# Compiled templates
+# ---------------------------------------------------------------------------
+
+_origins = {}
+
+
+def _template_version(name):
+    # Modification time of the template source, so edits to the template
+    # invalidate compiled skeletons without a restart
+    if name not in _origins:
+        _origins[name] = get_template(name).origin.name
+    try:
+        return os.stat(_origins[name]).st_mtime_ns
+    except (OSError, TypeError):
+        return 0
+
+
+class CompiledEmail:
+    """A rendered email skeleton with per-message placeholders."""
+
+    def __init__(self, text, html):
+        self.text = text
+        self.html = html
+
+    def render(self, **fields):
+        text_values = {k: str(v) for k, v in fields.items()}
+        html_values = {k: escape(v) for k, v in text_values.items()}
+        return (
+            _PLACEHOLDER_RE.sub(lambda m: text_values[m.group(1)], self.text),
+            _PLACEHOLDER_RE.sub(lambda m: html_values[m.group(1)], self.html),
+        )
+
+
+_compiled = OrderedDict()
+
+
+def _compile_confirmation(event):
+    context = {'event': event}
+    context.update({name: f'{_MARK}{name}{_MARK}' for name in PER_MESSAGE_FIELDS})
+    return CompiledEmail(
+        text=get_template(CONFIRMATION_TEXT).render(context),
+        html=inline_css(get_template(CONFIRMATION_HTML).render(context)),
+    )
+
+
+def compiled_confirmation(event):
+    """Return the cached skeleton for ``event``, building it if needed."""
+    key = (
+        _template_version(CONFIRMATION_HTML),
+        _template_version(CONFIRMATION_TEXT),
+        event.pk,
+        event.updated_at,
+    )
+    compiled = _compiled.get(key)
+    if compiled is None:
+        compiled = _compiled[key] = _compile_confirmation(event)
+        if len(_compiled) > _CACHE_SIZE:
+            _compiled.popitem(last=False)
+    else:
+        _compiled.move_to_end(key)
+    return compiled
+
+
+def render_registration_confirmation(participant):
+    """Return ``(subject, text, html)`` for a participant's confirmation."""
+    event = participant.event
+    registered_at = timezone.localtime(participant.registered_at or timezone.now())
+    text, html = compiled_confirmation(event).render(
+        recipient_name=participant.full_name or participant.email,
+        registered_on=dateformat.format(registered_at, 'd F Y H:i'),
+        spots_left=event.quota_left,
+        year=registered_at.year,
+    )
+    return f"Registration Confirmation: {event.title}", text, html
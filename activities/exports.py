@@ -0,0 +1,191 @@
+import csv
+import re
+import zipfile
+from decimal import Decimal
+from itertools import chain
+from xml.sax.saxutils import escape as xml_escape
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import EventParticipant
+
+
+class Echo:
+    """File-like object whose write() hands the row straight back to csv."""
+
+    def write(self, value):
+        return value
+
+
+def csv_rows(header, rows):
+    """Yield ``header`` and then each row of ``rows`` as CSV lines."""
+    writer = csv.writer(Echo())
+    # BOM so Excel opens the Chinese names as UTF-8
+    yield '\ufeff' + writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def streaming_csv_response(filename, header, rows):
+    """
+    Stream ``rows`` (any iterable, normally a queryset ``.iterator()``) as a
+    CSV download, one line at a time, so memory stays flat however many
+    rows there are.
+    """
+    response = StreamingHttpResponse(csv_rows(header, rows), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+# ---------------------------------------------------------------------------
+# XLSX
+# ---------------------------------------------------------------------------
+
+_XLSX_STATIC_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="{sheet}" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+_XML_ILLEGAL_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+class _ChunkStream:
+    """
+    Write-only, non-seekable sink for ``zipfile``; the bytes written so far
+    are collected with ``pop()`` and handed to the response.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _xlsx_cell(value):
+    if value is None or value == '':
+        return '<c/>'
+    if isinstance(value, bool):
+        value = str(value)
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c><v>{value}</v></c>'
+    text = xml_escape(_XML_ILLEGAL_RE.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def xlsx_chunks(header, rows, sheet_name='Sheet1', flush_every=1000):
+    """
+    Yield an .xlsx workbook with one sheet as a series of byte chunks.
+
+    The worksheet is deflated straight into the stream as rows arrive, so
+    only about ``flush_every`` rows are held in memory at once. Cells use
+    inline strings, which avoids the shared-string table a regular writer
+    keeps for the whole sheet.
+    """
+    stream = _ChunkStream()
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, content in _XLSX_STATIC_PARTS.items():
+            zf.writestr(name, content.replace('{sheet}', xml_escape(sheet_name, {'"': '&quot;'})))
+        yield stream.pop()
+        with zf.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b'<sheetData>'
+            )
+            for n, row in enumerate(chain([header], rows), 1):
+                sheet.write(('<row>' + ''.join(_xlsx_cell(v) for v in row) + '</row>').encode())
+                if n % flush_every == 0:
+                    yield stream.pop()
+            sheet.write(b'</sheetData></worksheet>')
+    yield stream.pop()
+
+
+def streaming_xlsx_response(filename, header, rows, sheet_name='Sheet1'):
+    response = StreamingHttpResponse(
+        xlsx_chunks(header, rows, sheet_name),
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+# ---------------------------------------------------------------------------
+# Event rosters
+# ---------------------------------------------------------------------------
+
+PARTICIPANT_HEADER = [
+    'Event ID', 'Event', 'Event Date', 'Email', 'Full Name', 'Telephone',
+    'Member', 'Registered At', 'Withdrawal Date', 'Notes',
+]
+
+
+def participant_rows(event_ids, chunk_size=5000):
+    """
+    Roster rows for ``event_ids``, event and user columns joined in the same
+    query and read through a server-side cursor ``chunk_size`` rows at a time.
+    """
+    rows = (
+        EventParticipant.objects
+        .filter(event_id__in=event_ids)
+        .order_by('event_id', 'registered_at', 'id')
+        .values_list(
+            'event_id', 'event__title', 'event__start_date', 'email', 'full_name',
+            'telephone', 'user__username', 'registered_at', 'withdrawal_date', 'notes',
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    for event_id, title, start, email, name, phone, username, registered, withdrawn, notes in rows:
+        yield (
+            event_id,
+            title,
+            start.isoformat() if start else '',
+            email,
+            name,
+            phone,
+            username or '',
+            timezone.localtime(registered).strftime('%Y-%m-%d %H:%M'),
+            withdrawn.isoformat() if withdrawn else '',
+            notes,
+        )
@@ -0,0 +1,28 @@
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+FEED_VERSION_KEY = 'activities:feed:version'
+FEED_TOTAL_TIMEOUT = 60 * 60
+
+
+def feed_version():
+    return cache.get_or_set(FEED_VERSION_KEY, 1, None)
+
+
+def invalidate_feed():
+    """Bump the feed version so every cached total is recomputed."""
+    try:
+        cache.incr(FEED_VERSION_KEY)
+    except ValueError:
+        cache.set(FEED_VERSION_KEY, 1, None)
+
+
+def cached_feed_total(queryset):
+    """
+    Count of the public event feed. The key includes today's date because
+    the feed's start_date window moves daily. Counted on the primary, so a
+    lagging replica can't leave a stale total cached for the next hour.
+    """
+    key = f'activities:feed:total:{feed_version()}:{timezone.now().date()}'
+    return cache.get_or_set(key, queryset.using(DEFAULT_DB_ALIAS).count, FEED_TOTAL_TIMEOUT)
@@ -33,3 +33,13 @@ class EventRegistrationForm(forms.ModelForm):
         if EventParticipant.objects.filter(event=self.event, email=email).exists():
             raise forms.ValidationError("This email is already registered for this event.")
         return email
+
+
+class DonationImportForm(forms.Form):
+    file = forms.FileField(
+        help_text="CSV with columns user (username or email), amount, date, and optionally notes and reference.",
+    )
+    dry_run = forms.BooleanField(
+        required=False,
+        help_text="Validate the file and report what would be imported without saving anything.",
+    )
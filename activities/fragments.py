@@ -0,0 +1,24 @@
+"""
+Live parts of cached event pages (see ``pagecache.fragments``). Quotas
+change through ``reserve_spot``'s conditional ``UPDATE``, which sends no
+signal, so they are read fresh for every response.
+"""
+from django.template.loader import render_to_string
+
+from pagecache.fragments import register
+
+from .models import Event
+
+QUOTA_FIELDS = ('event_id', 'quota_left', 'unlimited_quota', 'is_announcement', 'appl_deadline')
+
+
+def load_events(pks):
+    return {str(event.pk): event for event in Event.objects.filter(pk__in=pks).only(*QUOTA_FIELDS)}
+
+
+def _template(name):
+    return lambda request, event: render_to_string(name, {'event': event})
+
+
+register('event_status', _template('activities/_event_status.html'), load_events)
+register('event_action', _template('activities/_event_action.html'), load_events)
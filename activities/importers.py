@@ -0,0 +1,161 @@
+import csv
+import hashlib
+import io
+from collections import Counter
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from .models import Donation
+
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%Y/%m/%d')
+USER_COLUMNS = ('user', 'username', 'email')
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.skipped = 0
+        self.errors = []   # [(row number, message), ...]
+
+    @property
+    def total(self):
+        return self.created + self.skipped + len(self.errors)
+
+    def __str__(self):
+        return f"{self.created} imported, {self.skipped} already present, {len(self.errors)} rejected"
+
+
+class DonationImporter:
+    """
+    Load donations from a CSV file with columns ``user`` (username or email),
+    ``amount``, ``date`` and optionally ``notes`` and ``reference``.
+
+    Users are resolved from a single pre-fetched lookup map, rows are
+    validated and inserted ``batch_size`` at a time with ``bulk_create``, and
+    a bad row is reported without aborting the rest of the file.
+
+    Every imported donation gets a ``reference``: the file's own one when
+    given (e.g. a receipt number), otherwise a hash of the row's contents
+    and its occurrence count in the file. Re-importing a file therefore
+    skips what is already there instead of duplicating it.
+    """
+
+    def __init__(self, batch_size=1000, dry_run=False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.users = self._user_map()
+
+    def _user_map(self):
+        users = {}
+        ambiguous = set()
+        User = get_user_model()
+        for pk, username, email in User.objects.values_list('pk', 'username', 'email').iterator():
+            users[username.lower()] = pk
+            if email:
+                key = email.lower()
+                if key in users and users[key] != pk:
+                    ambiguous.add(key)
+                users[key] = pk
+        for key in ambiguous:
+            users[key] = None
+        return users
+
+    def import_file(self, f):
+        """
+        Import from a binary or text file object; returns an ImportResult.
+        Raises ValueError, before importing anything, if a binary file isn't
+        UTF-8.
+        """
+        if isinstance(f.read(0), bytes):
+            # Decode it all up front: a bad byte found halfway through would
+            # leave the file half imported
+            try:
+                f = io.StringIO(f.read().decode('utf-8-sig'), newline='')
+            except UnicodeDecodeError:
+                raise ValueError("The file must be a UTF-8 CSV.")
+        return self.import_rows(csv.DictReader(f))
+
+    def import_rows(self, reader):
+        result = ImportResult()
+        seen = Counter()
+        batch = []
+        # Row 1 is the header
+        for line, row in enumerate(reader, start=2):
+            try:
+                # csv.DictReader puts the fields past the header's under None,
+                # e.g. from an unquoted "1,000.00"
+                if None in row:
+                    raise ValueError("too many columns")
+                row = {(k or '').strip().lower(): (v or '').strip() for k, v in row.items()}
+                batch.append(self._build(row, seen))
+            except ValueError as e:
+                result.errors.append((line, str(e)))
+                continue
+            if len(batch) >= self.batch_size:
+                self._flush(batch, result)
+                batch = []
+        if batch:
+            self._flush(batch, result)
+        return result
+
+    def _build(self, row, seen):
+        who = next((row[c] for c in USER_COLUMNS if row.get(c)), '')
+        if not who:
+            raise ValueError("missing user")
+        user_id = self.users.get(who.lower(), 0)
+        if user_id == 0:
+            raise ValueError(f"unknown user {who!r}")
+        if user_id is None:
+            raise ValueError(f"email {who!r} belongs to more than one user")
+
+        try:
+            amount = Decimal(row.get('amount', '').replace(',', '').replace('$', ''))
+            # NaN and Infinity parse, but can't be compared or quantized
+            if not amount.is_finite():
+                raise InvalidOperation
+            if amount < 0 or amount != amount.quantize(Decimal('0.01')) or amount >= Decimal('1e8'):
+                raise InvalidOperation
+        except InvalidOperation:
+            raise ValueError(f"invalid amount {row.get('amount')!r}")
+
+        for fmt in DATE_FORMATS:
+            try:
+                date = datetime.strptime(row.get('date', ''), fmt).date()
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(f"invalid date {row.get('date')!r}")
+
+        notes = row.get('notes', '')
+        reference = row.get('reference', '')
+        if not reference:
+            natural = f"{user_id}|{date.isoformat()}|{amount:.2f}|{notes}"
+            seen[natural] += 1
+            digest = hashlib.sha1(f"{natural}|{seen[natural]}".encode()).hexdigest()[:24]
+            reference = f"import:{digest}"
+        elif len(reference) > 64:
+            raise ValueError("reference longer than 64 characters")
+
+        return Donation(user_id=user_id, amount=amount, date=date, notes=notes, reference=reference)
+
+    def _flush(self, batch, result):
+        # Drop rows already imported (by an earlier run or earlier in this file)
+        existing = set(
+            Donation.objects.filter(reference__in=[d.reference for d in batch])
+            .values_list('reference', flat=True)
+        )
+        fresh = {}
+        for donation in batch:
+            if donation.reference in existing or donation.reference in fresh:
+                result.skipped += 1
+            else:
+                fresh[donation.reference] = donation
+        if fresh and not self.dry_run:
+            with transaction.atomic():
+                # ignore_conflicts covers a concurrent import of the same rows
+                Donation.objects.bulk_create(fresh.values(), ignore_conflicts=True)
+        result.created += len(fresh)
@@ -0,0 +1,75 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from activities.emails import CONFIRMATION_HTML, render_registration_confirmation
+from activities.models import Event, EventParticipant
+
+
+class Command(BaseCommand):
+    help = (
+        "Render N registration confirmations with the cached renderer and with a "
+        "full template render + strip_tags, and report messages per second. "
+        "Uses unsaved objects, so no database is touched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10_000)
+        parser.add_argument(
+            '--skip-baseline', action='store_true',
+            help="Only time the cached renderer.",
+        )
+
+    def handle(self, *args, **options):
+        count = options['count']
+        now = timezone.now()
+        event = Event(
+            event_id=1,
+            title="夏令營 Summer Camp",
+            location="嘉盛浸信會",
+            start_date=(now + timedelta(days=30)).date(),
+            appl_deadline=(now + timedelta(days=20)).date(),
+            fee_amount=350,
+            quota_left=count,
+            updated_at=now,
+        )
+        participants = [
+            EventParticipant(
+                event=event,
+                email=f"member{n}@example.com",
+                full_name=f"會友 {n}",
+                registered_at=now - timedelta(seconds=n),
+            )
+            for n in range(count)
+        ]
+
+        self._report("cached", count, self._time(
+            lambda p: render_registration_confirmation(p), participants
+        ))
+        if not options['skip_baseline']:
+            def full_render(p):
+                html = render_to_string(CONFIRMATION_HTML, {
+                    'event': event,
+                    'recipient_name': p.full_name or p.email,
+                    'registered_on': p.registered_at,
+                    'spots_left': event.quota_left,
+                    'year': p.registered_at.year,
+                })
+                return strip_tags(html), html
+            self._report("full render", count, self._time(full_render, participants))
+
+    def _time(self, render, participants):
+        started = time.perf_counter()
+        for participant in participants:
+            render(participant)
+        return time.perf_counter() - started
+
+    def _report(self, label, count, elapsed):
+        self.stdout.write(
+            f"{label:>12}: {count} messages in {elapsed:.2f}s "
+            f"({count / elapsed:,.0f} msg/s)"
+        )
@@ -0,0 +1,110 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from django.test import Client, override_settings
+from django.urls import NoReverseMatch, reverse
+
+from config.dbpool import pool_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Request a page from N threads at once, first opening a database "
+        "connection per request and then from the connection pool, and report "
+        "throughput and latency. The page cache is off so every request reads "
+        "the database. PostgreSQL only; nothing is written."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', nargs='?', default='activities:list', metavar='url_name')
+        parser.add_argument('--requests', type=int, default=500, help="Requests per mode.")
+        parser.add_argument('--concurrency', type=int, default=8, help="Threads issuing requests.")
+        parser.add_argument('--host', default='localhost', help="Host header; must be in ALLOWED_HOSTS.")
+
+    def handle(self, *args, **options):
+        connection = connections['default']
+        if connection.vendor != 'postgresql':
+            raise CommandError("Connection pooling needs PostgreSQL")
+        try:
+            path = reverse(options['url'])
+        except NoReverseMatch as e:
+            raise CommandError(e)
+        concurrency = options['concurrency']
+        # Shared by every thread's connection, so switching it switches them all
+        db_options = connection.settings_dict['OPTIONS']
+        configured = db_options.get('pool')
+        pooled = dict(configured or {}, min_size=concurrency, max_size=concurrency)
+
+        self.stdout.write(f"{path}, {options['requests']} requests from {concurrency} threads")
+        self.stdout.write(f"{'mode':<12} {'req/s':>8} {'median ms':>10} {'p95 ms':>8} {'p99 ms':>8}")
+        results = {}
+        try:
+            for mode, pool in (('per-request', None), ('pooled', pooled)):
+                connections.close_all()
+                connection.close_pool()
+                if pool:
+                    db_options['pool'] = pool
+                else:
+                    db_options.pop('pool', None)
+                with override_settings(PAGE_CACHE_TIMEOUT=0):
+                    # Warm up (and, pooled, fill the pool) before timing
+                    self._run(path, concurrency, concurrency, options['host'])
+                    timings, elapsed = self._run(path, options['requests'], concurrency, options['host'])
+                results[mode] = median = statistics.median(timings)
+                quantiles = statistics.quantiles(timings, n=100)
+                self.stdout.write(
+                    f"{mode:<12} {len(timings) / elapsed:>8.1f} {median:>10.2f} "
+                    f"{quantiles[94]:>8.2f} {quantiles[98]:>8.2f}"
+                )
+                if pool:
+                    stats = pool_stats()
+                    self.stdout.write(
+                        f"{'':<12} pool: {stats['created']} connections created, "
+                        f"{stats['checkouts']} checkouts, mean wait {stats['wait_ms_mean']} ms"
+                    )
+        finally:
+            connections.close_all()
+            connection.close_pool()
+            if configured:
+                db_options['pool'] = configured
+            else:
+                db_options.pop('pool', None)
+        self.stdout.write(
+            f"Median latency {results['per-request'] / results['pooled']:.1f}x lower pooled",
+            style_func=self.style.SUCCESS,
+        )
+
+    def _run(self, path, count, concurrency, host):
+        """Latencies (ms) of ``count`` requests spread over threads, and the wall time."""
+        remaining = iter(range(count))
+        lock = threading.Lock()
+
+        def worker():
+            client = Client(SERVER_NAME=host)
+            timings = []
+            try:
+                while True:
+                    with lock:
+                        if next(remaining, None) is None:
+                            return timings
+                    started = time.perf_counter()
+                    response = client.get(path)
+                    # What the request handler does at the end of a request
+                    # (the test client leaves it out): disconnect, or return
+                    # the connection to the pool
+                    close_old_connections()
+                    timings.append((time.perf_counter() - started) * 1000)
+                    if response.status_code != 200:
+                        raise CommandError(f"{path} answered {response.status_code}")
+            finally:
+                connections.close_all()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            futures = [executor.submit(worker) for _ in range(concurrency)]
+            timings = [t for future in futures for t in future.result()]
+        return timings, time.perf_counter() - started
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from activities.importers import DonationImporter
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import donations from a CSV file (columns: user, amount, date, "
+        "notes, reference). Rows already imported are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Validate and report without saving anything.",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        importer = DonationImporter(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        with open(options['path'], 'rb') as f:
+            result = importer.import_file(f)
+        elapsed = time.perf_counter() - start
+
+        for line, message in result.errors:
+            self.stderr.write(f"row {line}: {message}")
+        prefix = "Dry run: " if options['dry_run'] else ""
+        self.stdout.write(
+            f"{prefix}{result} in {elapsed:.1f}s ({result.total / max(elapsed, 1e-9):,.0f} rows/s)",
+            style_func=self.style.WARNING if result.errors else self.style.SUCCESS,
+        )
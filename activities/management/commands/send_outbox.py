@@ -0,0 +1,39 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from activities.outbox import drain, MAX_ATTEMPTS
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Deliver pending emails from the outbox over one SMTP connection per run."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS)
+        parser.add_argument(
+            '--loop', action='store_true',
+            help="Keep running and poll the outbox every --interval seconds.",
+        )
+        parser.add_argument('--interval', type=float, default=10.0)
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        while True:
+            try:
+                sent, failed = drain(options['batch_size'], options['max_attempts'])
+            except Exception:
+                # A database hiccup shouldn't stop a --loop worker for good
+                if not options['loop']:
+                    raise
+                logger.exception("Draining the outbox failed")
+            else:
+                if sent or failed or options['verbosity'] > 1:
+                    self.stdout.write(f"Sent {sent}, failed {failed}")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
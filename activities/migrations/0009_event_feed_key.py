@@ -0,0 +1,40 @@
+# Generated by Django 5.2.11 on 2026-10-18 16:16
+
+from django.db import migrations, models
+
+
+def populate_feed_key(apps, schema_editor):
+    # Historical models don't have Event.compute_feed_key(), so mirror it here
+    Event = apps.get_model('activities', 'Event')
+    for event in Event.objects.only('event_id', 'is_featured', 'is_announcement', 'start_date'):
+        day = event.start_date.toordinal() if event.start_date else (1 << 22) - 1
+        event.feed_key = (int(event.is_featured) << 23) | (int(not event.is_announcement) << 22) | day
+        event.save(update_fields=['feed_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0008_outboundemail'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='event',
+            name='activities__event_i_4f8033_idx',
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='feed_key',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_feed_key, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-feed_key', '-event_id'], name='event_active_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['start_date'], name='event_active_start_idx'),
+        ),
+    ]
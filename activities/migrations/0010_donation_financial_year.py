@@ -0,0 +1,30 @@
+# Generated by Django 5.2.11 on 2026-10-18 16:18
+
+import django.db.models.expressions
+import django.db.models.functions.datetime
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0009_event_feed_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='donation',
+            name='financial_year',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(django.db.models.functions.datetime.ExtractYear('date'), '-', models.Case(models.When(date__month__lt=4, then=models.Value(1)), default=models.Value(0))), output_field=models.IntegerField(), verbose_name='Financial Year'),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['user', 'financial_year', 'date'], name='activities__user_id_b88ef1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['financial_year'], name='activities__financi_86ec65_idx'),
+        ),
+    ]
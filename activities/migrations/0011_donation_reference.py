@@ -0,0 +1,24 @@
+# Generated by Django 5.2.11 on 2026-10-18 16:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0010_donation_financial_year'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='donation',
+            name='reference',
+            field=models.CharField(blank=True, help_text='Receipt number or import key; unique when set, so re-imports are skipped', max_length=64, verbose_name='Reference'),
+        ),
+        migrations.AddConstraint(
+            model_name='donation',
+            constraint=models.UniqueConstraint(condition=models.Q(('reference', ''), _negated=True), fields=('reference',), name='donation_unique_reference'),
+        ),
+    ]
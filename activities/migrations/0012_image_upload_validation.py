@@ -0,0 +1,19 @@
+# Generated by Django 5.2.11 on 2026-10-18 16:29
+
+import imaging.uploads
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0011_donation_reference'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='event',
+            name='poster',
+            field=models.ImageField(blank=True, null=True, upload_to='event_posters/', validators=[imaging.uploads.validate_image_upload]),
+        ),
+    ]
@@ -1,8 +1,17 @@
 from django.db import models
+from django.db.models import Case, Value, When
+from django.db.models.functions import ExtractYear
 from django.utils import timezone
 from django.core.validators import MinValueValidator
 from django.conf import settings
 
+from imaging.uploads import validate_image_upload
+
+# Fields packed into Event.feed_key
+FEED_KEY_SOURCES = frozenset({'is_featured', 'is_announcement', 'start_date'})
+# Larger than any date ordinal, so undated events sort like NULLS FIRST
+FEED_KEY_NO_DATE = (1 << 22) - 1
+
 
 class Event(models.Model):
     event_id = models.AutoField(primary_key=True)
@@ -11,7 +20,9 @@ class Event(models.Model):
     start_date = models.DateField(null=True, blank=True)
     appl_deadline = models.DateField(null=True, blank=True)
     location = models.CharField(max_length=255, blank=True)
-    poster = models.ImageField(upload_to='event_posters/', blank=True, null=True)
+    poster = models.ImageField(
+        upload_to='event_posters/', blank=True, null=True, validators=[validate_image_upload],
+    )
     is_featured = models.BooleanField(default=False)
 
     is_active = models.BooleanField(
@@ -55,9 +66,30 @@ class Event(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True, editable=False)
     updated_at = models.DateTimeField(auto_now=True, null=True, blank=True, editable=False)
 
+    # Denormalised public feed order, see compute_feed_key()
+    feed_key = models.BigIntegerField(default=0, editable=False)
+
     def __str__(self):
         return self.title
 
+    def compute_feed_key(self):
+        """
+        Pack the feed order (featured first, then registrable events before
+        announcements, then latest start_date first) into one integer so the
+        feed can be read in a single descending index scan. Events without a
+        start_date sort first within their group, as NULLs do in a
+        descending PostgreSQL sort.
+        """
+        day = self.start_date.toordinal() if self.start_date else FEED_KEY_NO_DATE
+        return (int(self.is_featured) << 23) | (int(not self.is_announcement) << 22) | day
+
+    def save(self, *args, **kwargs):
+        self.feed_key = self.compute_feed_key()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and FEED_KEY_SOURCES.intersection(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'feed_key'}
+        super().save(*args, **kwargs)
+
     @property
     def is_expired(self):
         if self.appl_deadline is None:
@@ -77,7 +109,18 @@ class Event(models.Model):
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['event_id']),
+            # Public feed: UpcomingEventsListView
+            models.Index(
+                fields=['-feed_key', '-event_id'],
+                name='event_active_feed_idx',
+                condition=models.Q(is_active=True),
+            ),
+            # Homepage: upcoming active events by start_date
+            models.Index(
+                fields=['start_date'],
+                name='event_active_start_idx',
+                condition=models.Q(is_active=True),
+            ),
         ]
 
 
@@ -179,6 +222,15 @@ class EventParticipant(models.Model):
         return "Accepted"
 
 
+# Financial years run April to March and are named by the year they start in
+FY_START_MONTH = 4
+
+
+def financial_year_label(year):
+    """2025 -> '2025-2026'"""
+    return f"{year}-{year + 1}"
+
+
 class Donation(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -193,7 +245,23 @@ class Donation(models.Model):
         verbose_name="Donation Amount"
     )
     date = models.DateField(default=timezone.now, verbose_name="Donation Date")
+    # Start year of the April-March financial year, computed by the database
+    financial_year = models.GeneratedField(
+        expression=ExtractYear('date') - Case(
+            When(date__month__lt=FY_START_MONTH, then=Value(1)),
+            default=Value(0),
+        ),
+        output_field=models.IntegerField(),
+        db_persist=True,
+        verbose_name="Financial Year",
+    )
     notes = models.TextField(blank=True, verbose_name="Notes")
+    reference = models.CharField(
+        max_length=64,
+        blank=True,
+        verbose_name="Reference",
+        help_text="Receipt number or import key; unique when set, so re-imports are skipped"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -201,7 +269,74 @@ class Donation(models.Model):
         ordering = ['-date', '-created_at']
         verbose_name = "Donation"
         verbose_name_plural = "Donations"
+        indexes = [
+            models.Index(fields=['user', 'financial_year', 'date']),
+            models.Index(fields=['financial_year']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['reference'],
+                condition=~models.Q(reference=''),
+                name='donation_unique_reference',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.amount} ({self.date})"
 
+    @property
+    def financial_year_label(self):
+        return financial_year_label(self.financial_year)
+
+
+
+class OutboundEmail(models.Model):
+    """
+    Outbox row for an email that still has to leave the building.
+    Rows are written in the same transaction as the data they describe and
+    delivered later by the ``send_outbox`` management command.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    participant = models.ForeignKey(
+        EventParticipant,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='emails',
+    )
+    to_email = models.EmailField(verbose_name="Recipient")
+    subject = models.CharField(max_length=255)
+    body_text = models.TextField()
+    body_html = models.TextField(blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Outbound Email"
+        verbose_name_plural = "Outbound Emails"
+        indexes = [
+            # The worker only ever looks for due, pending rows
+            models.Index(
+                fields=['next_attempt_at'],
+                name='outbox_pending_due_idx',
+                condition=models.Q(status='pending'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} → {self.to_email} ({self.status})"
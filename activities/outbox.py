@@ -0,0 +1,151 @@
+from datetime import timedelta
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .emails import render_registration_confirmation
+from .models import OutboundEmail
+
+# Retry schedule: 1, 2, 4, 8 ... minutes, capped at six hours
+BACKOFF_BASE = timedelta(minutes=1)
+BACKOFF_MAX = timedelta(hours=6)
+MAX_ATTEMPTS = 8
+# How long a worker has to send the emails it claimed before others may
+LEASE = timedelta(minutes=15)
+
+
+def enqueue(to_email, subject, body_text, body_html='', participant=None):
+    """Record an email for later delivery. Does no network I/O."""
+    return OutboundEmail.objects.create(
+        to_email=to_email,
+        subject=subject,
+        body_text=body_text,
+        body_html=body_html,
+        participant=participant,
+    )
+
+
+def queue_registration_confirmation(participant):
+    subject, text, html = render_registration_confirmation(participant)
+    return enqueue(
+        to_email=participant.email,
+        subject=subject,
+        body_text=text,
+        body_html=html,
+        participant=participant,
+    )
+
+
+def backoff(attempts):
+    return min(BACKOFF_BASE * (2 ** max(attempts - 1, 0)), BACKOFF_MAX)
+
+
+def _build_message(row, connection):
+    message = EmailMultiAlternatives(
+        subject=row.subject,
+        body=row.body_text,
+        to=[row.to_email],
+        connection=connection,
+    )
+    if row.body_html:
+        message.attach_alternative(row.body_html, 'text/html')
+    return message
+
+
+def _reset(connection):
+    # A failed send may leave the SMTP session unusable; start a fresh one
+    # so the rest of the batch still shares a single connection.
+    try:
+        connection.close()
+        connection.open()
+    except Exception:
+        pass
+
+
+def _claim(batch_size, now):
+    """
+    Lease up to ``batch_size`` due emails to this worker and count the
+    attempt. The lease (a ``next_attempt_at`` ``LEASE`` ahead) keeps other
+    workers off them while they're sent, without holding row locks; rows
+    of a worker that dies mid-batch come due again when it runs out.
+    """
+    with transaction.atomic():
+        rows = list(
+            OutboundEmail.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=OutboundEmail.STATUS_PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        OutboundEmail.objects.filter(pk__in=[row.pk for row in rows]).update(
+            attempts=F('attempts') + 1, next_attempt_at=now + LEASE,
+        )
+    for row in rows:
+        row.attempts += 1
+    return rows
+
+
+def deliver_batch(connection, batch_size=50, max_attempts=MAX_ATTEMPTS):
+    """
+    Send up to ``batch_size`` due emails over ``connection``, opening it
+    only once there is something to send.
+
+    Rows are claimed in one short transaction (``SELECT ... FOR UPDATE SKIP
+    LOCKED``, so several workers can drain the outbox side by side), sent
+    outside any transaction and their outcome saved in a second one. A
+    connection that can't be opened fails the whole batch, to be retried
+    later. Returns ``(sent, failed)``.
+    """
+    rows = _claim(batch_size, timezone.now())
+    if not rows:
+        return 0, 0
+    sent = failed = 0
+    try:
+        connection.open()
+    except Exception as e:
+        connection_error = e
+    else:
+        connection_error = None
+    for row in rows:
+        error = connection_error
+        if error is None:
+            try:
+                _build_message(row, connection).send()
+            except Exception as e:
+                error = e
+                _reset(connection)
+        if error is not None:
+            failed += 1
+            row.last_error = str(error)
+            if row.attempts >= max_attempts:
+                row.status = OutboundEmail.STATUS_FAILED
+            else:
+                row.next_attempt_at = timezone.now() + backoff(row.attempts)
+        else:
+            sent += 1
+            row.status = OutboundEmail.STATUS_SENT
+            row.sent_at = timezone.now()
+            row.last_error = ''
+    with transaction.atomic():
+        OutboundEmail.objects.bulk_update(rows, ['status', 'next_attempt_at', 'last_error', 'sent_at'])
+    return sent, failed
+
+
+def drain(batch_size=50, max_attempts=MAX_ATTEMPTS):
+    """Deliver every due email over a single SMTP connection, if there are any."""
+    if batch_size < 1:
+        # An empty batch would never end the loop below
+        raise ValueError(f"batch_size must be at least 1, not {batch_size}")
+    total_sent = total_failed = 0
+    connection = get_connection()
+    try:
+        while True:
+            sent, failed = deliver_batch(connection, batch_size, max_attempts)
+            total_sent += sent
+            total_failed += failed
+            if sent + failed < batch_size:
+                break
+    finally:
+        connection.close()
+    return total_sent, total_failed
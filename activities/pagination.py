@@ -0,0 +1,187 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def estimate_count(queryset):
+    """
+    Return PostgreSQL's row estimate for ``queryset``, or None when the
+    backend can't provide one. Costs one EXPLAIN instead of a full COUNT(*).
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    try:
+        return int(plan[0]['Plan']['Plan Rows'])
+    except (LookupError, TypeError, ValueError):
+        return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for very large tables.
+
+    Small result sets are counted exactly; above ``exact_threshold`` the
+    planner's estimate is used instead, so the count costs the same however
+    big the table grows. ``max_pages`` caps how deep OFFSET paging may go;
+    deeper pages are expected to be reached with a keyset cursor.
+    """
+    exact_threshold = 10_000
+
+    def __init__(self, *args, max_pages=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_pages = max_pages
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is None or estimate < self.exact_threshold:
+            return super().count
+        return estimate
+
+    @cached_property
+    def num_pages(self):
+        num_pages = super().num_pages
+        if self.max_pages:
+            return min(num_pages, self.max_pages)
+        return num_pages
+
+
+def encode_cursor(moment, pk):
+    """Encode a ``(datetime, pk)`` sort key as an opaque URL-safe token."""
+    micros = (moment - _EPOCH) // timedelta(microseconds=1)
+    return f"{micros}.{pk}"
+
+
+def decode_cursor_parts(token, *converters):
+    """
+    Decode a cursor of ``'.'``-separated integers, one per converter, into
+    the converters' results (e.g. ``date.fromordinal``). Cursors come from
+    the query string, so anything malformed or out of range for its
+    converter raises ValueError, never OverflowError.
+    """
+    parts = token.split('.')
+    if len(parts) != len(converters):
+        raise ValueError(f"malformed cursor {token!r}")
+    try:
+        return tuple(convert(int(part)) for convert, part in zip(converters, parts))
+    except (ValueError, OverflowError):
+        raise ValueError(f"malformed cursor {token!r}")
+
+
+def _from_micros(micros):
+    return _EPOCH + timedelta(microseconds=micros)
+
+
+def decode_cursor(token):
+    """Inverse of ``encode_cursor``. Raises ValueError on malformed tokens."""
+    return decode_cursor_parts(token, _from_micros, int)
+
+
+class KeysetPage:
+    """Duck-types the parts of ``django.core.paginator.Page`` templates use."""
+
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Cursor paginator over a queryset ordered by ``keys`` descending.
+
+    ``keys`` are integer columns whose combination is unique (the last one is
+    normally the primary key). A page is one index range scan of
+    ``per_page + 1`` rows whatever its depth. ``count`` is only evaluated
+    when a template asks for it, and may be given up front (e.g. from cache).
+    """
+
+    def __init__(self, queryset, keys, per_page, count=None):
+        self.queryset = queryset
+        self.keys = tuple(keys)
+        self.per_page = per_page
+        self._count = count
+
+    @cached_property
+    def count(self):
+        if self._count is not None:
+            return self._count
+        return self.queryset.count()
+
+    def _encode(self, obj):
+        return '.'.join(str(getattr(obj, key)) for key in self.keys)
+
+    def _decode(self, token):
+        values = [int(v) for v in token.split('.')]
+        if len(values) != len(self.keys):
+            raise ValueError(token)
+        return values
+
+    def _beyond(self, values, op):
+        # Portable spelling of the row comparison (k1, k2, ...) < (v1, v2, ...)
+        q = Q()
+        for i, key in enumerate(self.keys):
+            prefix = {k: v for k, v in zip(self.keys[:i], values)}
+            q |= Q(**prefix, **{f'{key}__{op}': values[i]})
+        return q
+
+    def page(self, after=None, before=None):
+        """
+        Return the page following the ``after`` cursor, or preceding the
+        ``before`` cursor; the first page if neither is given or valid.
+        """
+        descending = [f'-{k}' for k in self.keys]
+        ascending = list(self.keys)
+        try:
+            if before:
+                rows = list(
+                    self.queryset.filter(self._beyond(self._decode(before), 'gt'))
+                    .order_by(*ascending)[:self.per_page + 1]
+                )
+                has_more = len(rows) > self.per_page
+                rows = rows[:self.per_page][::-1]
+                return KeysetPage(
+                    rows, self,
+                    next_cursor=self._encode(rows[-1]) if rows else None,
+                    previous_cursor=self._encode(rows[0]) if rows and has_more else None,
+                )
+            qs = self.queryset.order_by(*descending)
+            if after:
+                qs = qs.filter(self._beyond(self._decode(after), 'lt'))
+        except ValueError:
+            after = None
+            qs = self.queryset.order_by(*descending)
+        rows = list(qs[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return KeysetPage(
+            rows, self,
+            next_cursor=self._encode(rows[-1]) if rows and has_more else None,
+            previous_cursor=self._encode(rows[0]) if rows and after else None,
+        )
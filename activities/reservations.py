@@ -0,0 +1,70 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Event, EventParticipant
+
+
+class ReservationError(Exception):
+    """Base class for registrations that could not be completed."""
+
+
+class QuotaExhausted(ReservationError):
+    """Raised when the event has no spots left at the time of booking."""
+
+
+class AlreadyRegistered(ReservationError):
+    """Raised when the (event, email) pair is already taken."""
+
+
+def reserve_spot(event, participant):
+    """
+    Book one spot on ``event`` and save ``participant`` as a single unit.
+
+    The quota is taken with a conditional ``UPDATE ... WHERE quota_left > 0``
+    which only locks the event row, so concurrent bookings queue on that row
+    instead of overselling. If the participant insert then fails, the
+    surrounding transaction rolls the decrement back with it.
+    """
+    participant.event = event
+    with transaction.atomic():
+        if not event.unlimited_quota:
+            taken = Event.objects.filter(
+                event_id=event.event_id,
+                unlimited_quota=False,
+                quota_left__gt=0,
+            ).update(quota_left=F('quota_left') - 1)
+            if not taken:
+                raise QuotaExhausted(event.event_id)
+        try:
+            participant.save()
+        except IntegrityError as exc:
+            # unique_together (event, email); leaving the atomic block with
+            # an exception restores quota_left.
+            raise AlreadyRegistered(participant.email) from exc
+    return participant
+
+
+def release_spot(participant):
+    """
+    Withdraw ``participant`` and hand their spot back to the event.
+
+    Returns False if the registration had already been withdrawn, so the
+    quota is never credited twice for the same participant.
+    """
+    event = participant.event
+    today = timezone.now().date()
+    with transaction.atomic():
+        withdrawn = EventParticipant.objects.filter(
+            pk=participant.pk,
+            withdrawal_date__isnull=True,
+        ).update(withdrawal_date=today)
+        if not withdrawn:
+            return False
+        if not event.unlimited_quota:
+            Event.objects.filter(
+                event_id=event.event_id,
+                unlimited_quota=False,
+            ).update(quota_left=F('quota_left') + 1)
+    participant.withdrawal_date = today
+    return True
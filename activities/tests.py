@@ -1,3 +1,526 @@
-from django.test import TestCase
+import io
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+from xml.etree import ElementTree
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection, connections
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Donation, Event, EventParticipant, OutboundEmail
+from .emails import compiled_confirmation, inline_css, render_registration_confirmation
+from .importers import DonationImporter
+from .outbox import drain
+from .reservations import (
+    reserve_spot, release_spot, QuotaExhausted, AlreadyRegistered,
+)
+
+
+class ReservationTests(TestCase):
+    def setUp(self):
+        self.event = Event.objects.create(title="退修會", quota_left=2)
+
+    def test_reserve_decrements_quota(self):
+        reserve_spot(self.event, EventParticipant(email="a@example.com"))
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.quota_left, 1)
+        self.assertEqual(self.event.participants.count(), 1)
+
+    def test_duplicate_email_gives_quota_back(self):
+        reserve_spot(self.event, EventParticipant(email="a@example.com"))
+        with self.assertRaises(AlreadyRegistered):
+            reserve_spot(self.event, EventParticipant(email="a@example.com"))
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.quota_left, 1)
+        self.assertEqual(self.event.participants.count(), 1)
+
+    def test_full_event_is_refused(self):
+        reserve_spot(self.event, EventParticipant(email="a@example.com"))
+        reserve_spot(self.event, EventParticipant(email="b@example.com"))
+        with self.assertRaises(QuotaExhausted):
+            reserve_spot(self.event, EventParticipant(email="c@example.com"))
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.quota_left, 0)
+        self.assertEqual(self.event.participants.count(), 2)
+
+    def test_unlimited_quota_is_untouched(self):
+        self.event.unlimited_quota = True
+        self.event.save()
+        reserve_spot(self.event, EventParticipant(email="a@example.com"))
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.quota_left, 2)
+
+    def test_release_is_credited_once(self):
+        reg = reserve_spot(self.event, EventParticipant(email="a@example.com"))
+        self.assertTrue(release_spot(reg))
+        self.assertFalse(release_spot(reg))
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.quota_left, 2)
+
+
+@skipUnless(connection.vendor == "postgresql", "needs row-level locking of PostgreSQL")
+class ConcurrentReservationTests(TransactionTestCase):
+    QUOTA = 100
+    ATTEMPTS = 500
+    WORKERS = 50
+
+    def setUp(self):
+        self.event = Event.objects.create(title="熱門營會", quota_left=self.QUOTA)
+
+    def _attempt(self, n):
+        try:
+            event = Event.objects.get(event_id=self.event.event_id)
+            reserve_spot(event, EventParticipant(email=f"p{n}@example.com"))
+            return True
+        except QuotaExhausted:
+            return False
+        finally:
+            connections.close_all()
+
+    def test_no_oversell_under_contention(self):
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            results = list(pool.map(self._attempt, range(self.ATTEMPTS)))
+
+        self.event.refresh_from_db()
+        self.assertEqual(sum(results), self.QUOTA)
+        self.assertEqual(self.event.quota_left, 0)
+        self.assertEqual(self.event.participants.count(), self.QUOTA)
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.event = Event.objects.create(title="退修會", quota_left=5)
+
+    def register(self, email):
+        return self.client.post(
+            reverse("activities:register", kwargs={"event_id": self.event.event_id}),
+            {"email": email, "full_name": "陳大文", "telephone": ""},
+        )
+
+    def test_registration_queues_email_without_sending(self):
+        response = self.register("a@example.com")
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(mail.outbox), 0)
+        queued = OutboundEmail.objects.get()
+        self.assertEqual(queued.to_email, "a@example.com")
+        self.assertEqual(queued.status, OutboundEmail.STATUS_PENDING)
+        self.assertIn(self.event.title, queued.subject)
+
+    def test_send_outbox_command_delivers_batch(self):
+        for n in range(3):
+            self.register(f"p{n}@example.com")
+        call_command("send_outbox", batch_size=2, stdout=mock.MagicMock())
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(OutboundEmail.objects.exclude(status=OutboundEmail.STATUS_SENT).exists())
+
+    def test_failed_send_is_retried_later(self):
+        self.register("a@example.com")
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages",
+            side_effect=OSError("connection refused"),
+        ):
+            self.assertEqual(drain(), (0, 1))
+        queued = OutboundEmail.objects.get()
+        self.assertEqual(queued.status, OutboundEmail.STATUS_PENDING)
+        self.assertEqual(queued.attempts, 1)
+        self.assertGreater(queued.next_attempt_at, timezone.now())
+        self.assertIn("connection refused", queued.last_error)
+        # Not due yet, so a second run leaves it alone
+        self.assertEqual(drain(), (0, 0))
+
+    def test_gives_up_after_max_attempts(self):
+        self.register("a@example.com")
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages",
+            side_effect=OSError("boom"),
+        ):
+            drain(max_attempts=1)
+        self.assertEqual(OutboundEmail.objects.get().status, OutboundEmail.STATUS_FAILED)
+
+    def test_connection_is_opened_only_when_there_is_mail(self):
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.open") as open_:
+            self.assertEqual(drain(), (0, 0))
+        open_.assert_not_called()
+
+    def test_connection_failure_is_a_failed_send(self):
+        self.register("a@example.com")
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.open",
+            side_effect=OSError("connection refused"),
+        ):
+            self.assertEqual(drain(), (0, 1))
+        queued = OutboundEmail.objects.get()
+        self.assertEqual((queued.status, queued.attempts), (OutboundEmail.STATUS_PENDING, 1))
+        self.assertGreater(queued.next_attempt_at, timezone.now())
+        self.assertIn("connection refused", queued.last_error)
+
+    def test_claimed_emails_are_leased_while_sending(self):
+        self.register("a@example.com")
+
+        def send_messages(messages):
+            # Another worker finds nothing due
+            self.assertEqual(drain(), (0, 0))
+            return len(messages)
+
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=send_messages):
+            self.assertEqual(drain(), (1, 0))
+        self.assertEqual(OutboundEmail.objects.get().status, OutboundEmail.STATUS_SENT)
+
+    def test_batch_size_must_be_positive(self):
+        for size in (0, -1):
+            with self.assertRaises(CommandError):
+                call_command("send_outbox", batch_size=size, loop=True, stdout=mock.MagicMock())
+            with self.assertRaises(ValueError):
+                drain(batch_size=size)
+
+    def test_send_outbox_loop_survives_errors(self):
+        with mock.patch(
+            "activities.management.commands.send_outbox.drain", side_effect=[DatabaseError("gone"), (0, 0)],
+        ) as drain_, mock.patch("time.sleep", side_effect=[None, KeyboardInterrupt]):
+            with self.assertLogs("activities.management.commands.send_outbox", "ERROR"):
+                with self.assertRaises(KeyboardInterrupt):
+                    call_command("send_outbox", loop=True, stdout=mock.MagicMock())
+        self.assertEqual(drain_.call_count, 2)
+
+
+class EmailRenderingTests(TestCase):
+    def setUp(self):
+        self.event = Event.objects.create(title="Camp & Retreat", quota_left=7)
+
+    def participant(self, **kwargs):
+        kwargs.setdefault("email", "a@example.com")
+        return EventParticipant(event=self.event, registered_at=timezone.now(), **kwargs)
+
+    def test_per_participant_fields_are_substituted_and_escaped(self):
+        subject, text, html = render_registration_confirmation(self.participant(full_name="<Mary>"))
+        self.assertEqual(subject, "Registration Confirmation: Camp & Retreat")
+        self.assertIn("Dear <Mary>,", text)
+        self.assertIn("Dear &lt;Mary&gt;,", html)
+        self.assertIn("Camp &amp; Retreat", html)
+        self.assertIn("Spots Remaining:      7", text)
+        self.assertNotIn("<", text.replace("<Mary>", ""))
+
+    def test_skeleton_is_cached_per_event_version(self):
+        compiled = compiled_confirmation(self.event)
+        self.assertIs(compiled_confirmation(self.event), compiled)
+        self.event.title = "Renamed"
+        self.event.save()
+        self.assertIsNot(compiled_confirmation(self.event), compiled)
+
+    def test_inline_css(self):
+        html = inline_css(
+            "<style>.box p { color: red } p:first-child { margin: 0 } a:hover { color: blue }</style>"
+            '<div class="box"><p style="font-weight: bold">x</p><p>y</p></div><p>z</p>'
+        )
+        self.assertIn('<p style="color: red; margin: 0; font-weight: bold;">x</p>', html)
+        self.assertIn('<p style="color: red;">y</p>', html)
+        self.assertIn("<p>z</p>", html)
+        self.assertNotIn('color: blue;"', html)
+
+
+class EventParticipantAdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(self.admin)
+        self.url = reverse("admin:activities_eventparticipant_changelist")
+
+    def add_participants(self, count):
+        event = Event.objects.create(title=f"活動 {Event.objects.count()}", unlimited_quota=True)
+        for n in range(count):
+            EventParticipant.objects.create(
+                event=event, email=f"p{n}@example.com", user=self.admin if n % 2 else None,
+            )
+        return event
+
+    def query_count(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self.add_participants(3)
+        small = self.query_count(self.url)
+        self.add_participants(60)
+        self.assertEqual(self.query_count(self.url), small)
+
+    def test_event_filter(self):
+        self.add_participants(2)
+        event = self.add_participants(3)
+        response = self.client.get(self.url, {"event": event.event_id})
+        self.assertEqual(len(response.context["cl"].result_list), 3)
+        self.assertContains(response, 'id="event-autocomplete-filter"')
+        for value in ("abc", "1.5"):
+            response = self.client.get(self.url, {"event": value})
+            self.assertRedirects(response, self.url + "?e=1")
+
+    def test_keyset_pages_cover_every_row_once(self):
+        self.add_participants(60)
+        seen = []
+        response = self.client.get(self.url)
+        while True:
+            cl = response.context["cl"]
+            seen.extend(obj.pk for obj in cl.result_list)
+            if not cl.next_cursor:
+                break
+            response = self.client.get(self.url + cl.next_cursor)
+        self.assertEqual(len(seen), 60)
+        self.assertEqual(set(seen), set(EventParticipant.objects.values_list("pk", flat=True)))
+
+    def test_malformed_cursor_starts_from_the_top(self):
+        self.add_participants(3)
+        for cursor in ("abc", "1.2.3", f"{10 ** 20}.1", f"-{10 ** 20}.1"):
+            response = self.client.get(self.url, {"after": cursor})
+            self.assertEqual(len(response.context["cl"].result_list), 3, cursor)
+
+
+class EventFeedTests(TestCase):
+    def setUp(self):
+        today = timezone.now().date()
+        self.events = [
+            Event.objects.create(
+                title=f"活動 {n}",
+                start_date=today + timedelta(days=n),
+                is_featured=n % 5 == 0,
+                is_announcement=n % 3 == 0,
+            )
+            for n in range(10)
+        ]
+        Event.objects.create(title="舊活動", start_date=today - timedelta(days=60))
+        Event.objects.create(title="草稿", start_date=today, is_active=False)
+
+    def test_feed_key_follows_legacy_ordering(self):
+        legacy = list(
+            Event.objects.filter(is_active=True, start_date__gte=timezone.now().date())
+            .order_by("-is_featured", "is_announcement", "-start_date")
+            .values_list("pk", flat=True)
+        )
+        by_key = list(
+            Event.objects.filter(pk__in=legacy)
+            .order_by("-feed_key", "-event_id")
+            .values_list("pk", flat=True)
+        )
+        self.assertEqual(by_key, legacy)
+
+    def test_feed_key_updated_on_partial_save(self):
+        event = self.events[1]
+        event.is_featured = True
+        event.save(update_fields=["is_featured"])
+        event.refresh_from_db()
+        self.assertEqual(event.feed_key, event.compute_feed_key())
+
+    def test_keyset_pages_walk_the_feed(self):
+        url = reverse("activities:list")
+        response = self.client.get(url)
+        seen = [e.pk for e in response.context["events"]]
+        pages = [seen[:]]
+        while response.context["page_obj"].has_next():
+            response = self.client.get(url, {"after": response.context["page_obj"].next_cursor})
+            page = [e.pk for e in response.context["events"]]
+            pages.append(page)
+            seen.extend(page)
+        self.assertEqual(sorted(seen), sorted(e.pk for e in self.events))
+        self.assertEqual(response.context["paginator"].count, 10)
+
+        # and back again
+        response = self.client.get(url, {"before": response.context["page_obj"].previous_cursor})
+        self.assertEqual([e.pk for e in response.context["events"]], pages[-2])
+
+    def test_cached_total_is_invalidated_on_change(self):
+        url = reverse("activities:list")
+        self.assertEqual(self.client.get(url).context["paginator"].count, 10)
+        Event.objects.create(title="新活動", start_date=timezone.now().date())
+        self.assertEqual(self.client.get(url).context["paginator"].count, 11)
+
+
+class DonationFinancialYearTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("donor", "donor@example.com", "pw")
+        for day, amount in [
+            (date(2024, 3, 31), "10.10"),
+            (date(2024, 4, 1), "20.20"),
+            (date(2025, 3, 31), "30.30"),
+            (date(2025, 4, 1), "40.40"),
+        ]:
+            Donation.objects.create(user=self.user, date=day, amount=amount)
+
+    def test_financial_year_is_computed_by_the_database(self):
+        years = dict(Donation.objects.values_list("date", "financial_year"))
+        self.assertEqual(years[date(2024, 3, 31)], 2023)
+        self.assertEqual(years[date(2024, 4, 1)], 2024)
+        self.assertEqual(years[date(2025, 3, 31)], 2024)
+        self.assertEqual(years[date(2025, 4, 1)], 2025)
+        self.assertEqual(Donation.objects.get(date=date(2025, 3, 31)).financial_year_label, "2024-2025")
+
+    def test_dashboard_loads_only_the_selected_year(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("activities:dashboard"), {"fy": "2024"})
+        totals = {item["label"]: item["total"] for item in response.context["fy_totals"]}
+        self.assertEqual(totals["2024-2025"], Decimal("50.50"))
+        self.assertEqual(response.context["selected_fy_label"], "2024-2025")
+        self.assertEqual(
+            [d.date for d in response.context["selected_donations"]],
+            [date(2025, 3, 31), date(2024, 4, 1)],
+        )
+
+
+class DonationSummaryTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(self.admin)
+        self.donor = User.objects.create_user("donor", "donor@example.com", "pw", first_name="大文")
+        for day, amount in [(date(2024, 5, 1), "10.10"), (date(2024, 6, 1), "0.20"), (date(2025, 5, 1), "5")]:
+            Donation.objects.create(user=self.donor, date=day, amount=amount)
+
+    def test_summary_is_filtered_and_aggregated_in_sql(self):
+        response = self.client.get(reverse("admin:donation_summary"), {"fy": "2024-2025"})
+        [row] = response.context["summary_list"]
+        self.assertEqual(row["total"], Decimal("10.30"))
+        self.assertEqual(row["count"], 2)
+        self.assertEqual(row["fy"], "2024-2025")
+
+    def test_drill_down(self):
+        response = self.client.get(reverse("admin:donation_summary_detail", args=[self.donor.pk, 2024]))
+        self.assertEqual(len(response.context["donations"]), 2)
+        self.assertContains(response, "2024-06-01")
+
+    def test_streaming_csv_export(self):
+        response = self.client.get(reverse("admin:donation_summary_export"))
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode("utf-8-sig").splitlines()
+        self.assertEqual(lines[0], "Username,Name,Financial Year,Donations,Total (HKD)")
+        self.assertIn("donor,大文,2024-2025,2,10.30", lines)
+
+        response = self.client.get(reverse("admin:donation_summary_export"), {"detail": 1, "fy": "2025-2026"})
+        lines = b"".join(response.streaming_content).decode("utf-8-sig").splitlines()
+        self.assertEqual(lines[1:], ["donor,2025-2026,2025-05-01,5.00,"])
+
+
+class ParticipantExportTests(TestCase):
+    def setUp(self):
+        self.event = Event.objects.create(title="營會 <2026>", unlimited_quota=True)
+        other = Event.objects.create(title="其他", unlimited_quota=True)
+        member = User.objects.create_user("member", "m@example.com", "pw")
+        for n in range(3):
+            reserve_spot(self.event, EventParticipant(
+                email=f"p{n}@example.com", full_name=f"會友 {n}", user=member if n == 0 else None,
+            ))
+        reserve_spot(other, EventParticipant(email="x@example.com"))
+
+    def export(self, fmt):
+        fd, path = tempfile.mkstemp(suffix=f".{fmt}")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        call_command(
+            "export_participants", str(self.event.event_id), format=fmt, output=path,
+            stderr=io.StringIO(),
+        )
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_csv(self):
+        lines = self.export("csv").decode("utf-8-sig").splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[1].startswith(f"{self.event.event_id},營會 <2026>,,p0@example.com,會友 0,,member,"))
+
+    def test_xlsx_is_a_valid_workbook(self):
+        with zipfile.ZipFile(io.BytesIO(self.export("xlsx"))) as zf:
+            self.assertIn("xl/workbook.xml", zf.namelist())
+            sheet = ElementTree.fromstring(zf.read("xl/worksheets/sheet1.xml"))
+        ns = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+        rows = sheet.findall(f"{ns}sheetData/{ns}row")
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1].findall(f".//{ns}t")[0].text, "營會 <2026>")
+
+    def test_admin_action_streams(self):
+        admin_user = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(admin_user)
+        response = self.client.post(reverse("admin:activities_event_changelist"), {
+            "action": "export_participants_csv",
+            "_selected_action": [self.event.event_id],
+        })
+        self.assertTrue(response.streaming)
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 4)
+
+
+class DonationImportTests(TestCase):
+    CSV = (
+        "user,amount,date,notes,reference\n"
+        "donor,100.50,2024-05-01,十一奉獻,\n"
+        "DONOR@example.com,20,01/06/2024,,\n"
+        "donor,20,2024-06-01,,\n"
+        "nobody,5,2024-06-01,,\n"
+        "donor,abc,2024-06-01,,\n"
+        "donor,5,2024-13-01,,\n"
+        "donor,30,2024-07-01,,R-0001\n"
+    )
+
+    def setUp(self):
+        self.donor = User.objects.create_user("donor", "donor@example.com", "pw")
+
+    def run_import(self, text, **kwargs):
+        return DonationImporter(batch_size=2, **kwargs).import_file(io.BytesIO(text.encode("utf-8-sig")))
+
+    def test_rows_are_imported_and_errors_reported(self):
+        result = self.run_import(self.CSV)
+        self.assertEqual(result.created, 4)
+        self.assertEqual([line for line, _ in result.errors], [5, 6, 7])
+        self.assertIn("unknown user", result.errors[0][1])
+        self.assertEqual(Donation.objects.filter(user=self.donor).count(), 4)
+        # The two identical 20.00 gifts on 2024-06-01 are kept apart
+        self.assertEqual(Donation.objects.filter(amount=20).count(), 2)
+        self.assertTrue(Donation.objects.filter(reference="R-0001", financial_year=2024).exists())
+
+    def test_reimport_is_idempotent(self):
+        self.run_import(self.CSV)
+        result = self.run_import(self.CSV)
+        self.assertEqual((result.created, result.skipped), (0, 4))
+        self.assertEqual(Donation.objects.count(), 4)
+
+    def test_dry_run_saves_nothing(self):
+        result = self.run_import(self.CSV, dry_run=True)
+        self.assertEqual(result.created, 4)
+        self.assertFalse(Donation.objects.exists())
+
+    def test_admin_upload(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "pw"))
+        upload = SimpleUploadedFile("offering.csv", self.CSV.encode())
+        response = self.client.post(reverse("admin:donation_import"), {"file": upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["result"].errors), 3)
+        self.assertEqual(Donation.objects.count(), 4)
+
+    def test_unquoted_thousands_separator_is_a_row_error(self):
+        result = self.run_import(
+            'user,amount,date\ndonor,1,000.00,2024-05-01\ndonor,"1,000.00",2024-05-01\n'
+        )
+        self.assertEqual(result.errors, [(2, "too many columns")])
+        self.assertEqual(result.created, 1)
+        self.assertEqual(Donation.objects.get().amount, Decimal("1000.00"))
+
+    def test_non_finite_amounts_are_rejected(self):
+        result = self.run_import(
+            "user,amount,date\ndonor,NaN,2024-05-01\ndonor,Infinity,2024-05-01\ndonor,-inf,2024-05-01\n"
+        )
+        self.assertEqual([line for line, _ in result.errors], [2, 3, 4])
+        self.assertIn("invalid amount", result.errors[0][1])
+
+    def test_admin_upload_not_utf8(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "pw"))
+        upload = SimpleUploadedFile("offering.csv", self.CSV.encode("big5"))
+        response = self.client.post(reverse("admin:donation_import"), {"file": upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertFormError(response.context["form"], "file", "The file must be a UTF-8 CSV.")
+        self.assertIsNone(response.context["result"])
+        self.assertFalse(Donation.objects.exists())
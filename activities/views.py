@@ -1,22 +1,29 @@
-from django.db.models import Q, F
+from django.db.models import Q, Sum, Count
 from django.views.generic import ListView, DetailView, CreateView
+from django.http import HttpResponseRedirect
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy
 from django.utils import timezone
 from django.contrib import messages
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+from django.db import transaction
 from datetime import timedelta
-from .models import Event, EventParticipant, Donation
+from .models import Event, EventParticipant, Donation, financial_year_label
 from .forms import EventRegistrationForm
+from .reservations import reserve_spot, release_spot, QuotaExhausted, AlreadyRegistered
+from .outbox import queue_registration_confirmation
+from .pagination import KeysetPaginator
+from .feed import cached_feed_total
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.utils.decorators import method_decorator
+from pagecache.cache import cache_anonymous_page
+from config.routers import use_primary
 from django.views import View
 
 # Create your views here.
 def activities(request):
     return render(request,'activities/index.html')
 
+@method_decorator(cache_anonymous_page, name='dispatch')
 class UpcomingEventsListView(ListView):
     model = Event
     template_name = 'activities/event_list.html'
@@ -26,17 +33,27 @@ class UpcomingEventsListView(ListView):
     def get_queryset(self):
         today = timezone.now().date()
         one_month_ago = today - timedelta(days=30)
-        qs = Event.objects.filter(is_active=True).filter(
+        # Featured first, then registrable events, then newest start_date;
+        # all packed into feed_key (see Event.compute_feed_key)
+        return Event.objects.filter(is_active=True).filter(
             Q(is_announcement=True) |
             Q(start_date__gt=one_month_ago) 
-        ).select_related()
-        # Featured first, then by event_id descending (newest first)
-        return qs.order_by('-is_featured', 'is_announcement', '-start_date')
+        )
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        # No need to manually set page_obj - it's already set by parent
-        return context
+    def paginate_queryset(self, queryset, page_size):
+        # Keyset pages over the event_active_feed_idx index, with the total
+        # cached until the next event change or the end of the day
+        paginator = KeysetPaginator(
+            queryset,
+            keys=('feed_key', 'event_id'),
+            per_page=page_size,
+            count=cached_feed_total(queryset),
+        )
+        page = paginator.page(
+            after=self.request.GET.get('after'),
+            before=self.request.GET.get('before'),
+        )
+        return paginator, page, page.object_list, page.has_other_pages()
 
 
 class EventDetailView(DetailView):
@@ -108,53 +125,29 @@ class EventRegistrationCreateView(CreateView):
             # to ensure dashboard can find all their registrations
             form.instance.email = self.request.user.email
         
-        # Decrease quota_left if not unlimited 
-        if not self.event.unlimited_quota and self.event.quota_left > 0:
-            # Use atomic update to avoid race conditions
-            Event.objects.filter(
-                event_id=self.event.event_id,
-                quota_left__gt=0  # Additional safety check
-            ).update(quota_left=F('quota_left') - 1)
-            # Refresh the event object from database
-            self.event.refresh_from_db()
-        # Save the form first to get the participant instance
-        response = super().form_valid(form)
-        # Send confirmation email
+        # Take a spot, save the participant and queue the confirmation email
+        # in one transaction; a failed insert gives the spot back instead of
+        # leaking it, and the email only exists if the registration does
         try:
-            participant = form.instance
-            subject = f"Registration Confirmation: {self.event.title}"
-            
-            # Create email context
-            context = {
-                'event': self.event,
-                'participant': participant,
-                'registration_date': participant.registered_at,
-            }
-            
-            # Render HTML email template
-            html_message = render_to_string('activities/emails/registration_confirmation.html', context)
-            plain_message = strip_tags(html_message)
-            
-            # Send email
-            send_mail(
-                subject=subject,
-                message=plain_message,
-                from_email=None,  # Will use DEFAULT_FROM_EMAIL
-                recipient_list=[participant.email],
-                html_message=html_message,
-                fail_silently=False,
-            )
-            
-        except Exception as e:
-            # Log the error but don't crash the registration
-            messages.warning(self.request, f"Registration saved but email could not be sent: {str(e)}")
-        
+            with transaction.atomic():
+                self.object = reserve_spot(self.event, form.instance)
+                self.event.refresh_from_db(fields=['quota_left'])
+                queue_registration_confirmation(self.object)
+        except QuotaExhausted:
+            messages.error(self.request, "Sorry, this event is fully booked.")
+            return redirect('activities:detail', event_id=self.event.event_id)
+        except AlreadyRegistered:
+            form.add_error('email', "This email is already registered for this event.")
+            return self.form_invalid(form)
+
         messages.success(self.request, "Registration successful! Check your email.")
-        return response
+        return HttpResponseRedirect(self.get_success_url())
     
     from django.contrib.auth.mixins import LoginRequiredMixin
 
 
+# Never stale: a registration made a moment ago must be listed
+@method_decorator(use_primary, name='dispatch')
 class UserDashboardView(LoginRequiredMixin, ListView):
     template_name = 'activities/dashboard.html'  # adjust app name if needed
     context_object_name = 'registrations'
@@ -170,38 +163,42 @@ class UserDashboardView(LoginRequiredMixin, ListView):
         context = super().get_context_data(**kwargs)
         context['user'] = self.request.user  # for personalization
 
-        # Group donations by Financial Year (April 1 - March 31)
-        # Result structure: [ {'financial_year': '2025-2026', 'donations': [obj, obj]}, ... ]
-        donations = Donation.objects.filter(user=self.request.user).order_by('-date')
-        
-        from collections import defaultdict
-        grouped_donations = defaultdict(list)
-        
-        for donation in donations:
-            if donation.date.month >= 4:
-                fy = f"{donation.date.year}-{donation.date.year + 1}"
-            else:
-                fy = f"{donation.date.year - 1}-{donation.date.year}"
-            grouped_donations[fy].append(donation)
-            
-        # Convert to a sorted list of tuples/dicts for the template
-        # Sort headers descending (e.g. 2025-2026, 2024-2025)
-        # sorted_items = sorted(grouped_donations.items(), key=lambda x: x[0], reverse=True)
-        # Better: create a list of dicts to be more template-friendly
-        
-        context['grouped_donations'] = sorted(
-            [{'financial_year': k, 'list': v} for k, v in grouped_donations.items()],
-            key=lambda x: x['financial_year'],
-            reverse=True
+        # Per financial year (April 1 - March 31) totals, newest first,
+        # grouped in SQL on the generated Donation.financial_year column
+        donations = Donation.objects.filter(user=self.request.user)
+        fy_totals = list(
+            donations.values('financial_year')
+            .annotate(total=Sum('amount'), count=Count('id'))
+            .order_by('-financial_year')
+        )
+        for item in fy_totals:
+            item['label'] = financial_year_label(item['financial_year'])
+
+        # Only the selected year's donations are loaded (latest by default)
+        selected = None
+        if fy_totals:
+            years = [item['financial_year'] for item in fy_totals]
+            selected = years[0]
+            fy = self.request.GET.get('fy', '')
+            if fy.isdigit() and int(fy) in years:
+                selected = int(fy)
+
+        context['fy_totals'] = fy_totals
+        context['selected_fy'] = selected
+        context['selected_fy_label'] = financial_year_label(selected) if selected else ''
+        context['selected_donations'] = (
+            donations.filter(financial_year=selected).order_by('-date') if selected else []
         )
         return context
 
 
 
+# Writes on GET, so it reads the registration it changes from the primary
+@method_decorator(use_primary, name='dispatch')
 class WithdrawRegistrationView(LoginRequiredMixin, View):
     def get(self, request, registration_id):
         reg = get_object_or_404(
-            EventParticipant,
+            EventParticipant.objects.select_related('event'),
             id=registration_id,
             email=request.user.email  # ensure owned by user via email
         )
@@ -210,19 +207,9 @@ class WithdrawRegistrationView(LoginRequiredMixin, View):
             messages.info(request, "You have already withdrawn from this event.")
         elif reg.event.is_expired:
             messages.error(request, "Cannot withdraw from an expired event.")
-        else:
-            reg.withdrawal_date = timezone.now().date()
-            reg.save()
-            
-            # Optional: increase quota_left if not unlimited
-            if not reg.event.unlimited_quota:
-                # Use atomic update to avoid race conditions
-                Event.objects.filter(
-                    event_id=reg.event.event_id
-                ).update(quota_left=F('quota_left') + 1)
-                # Refresh the event object from database
-                reg.event.refresh_from_db()
-            
+        elif release_spot(reg):
             messages.success(request, f"Successfully withdrawn from '{reg.event.title}'.")
+        else:
+            messages.info(request, "You have already withdrawn from this event.")
         
         return redirect('activities:dashboard')
@@ -0,0 +1,71 @@
+"""
+CSS and JS bundles built by ``collectstatic`` (see ``storage.py``).
+
+Each bundle is a static path made by concatenating its sources in order.
+CSS bundles sit in the same directory as their sources so relative
+``url()`` references keep working. Override with ``settings.STATIC_BUNDLES``.
+"""
+import re
+
+from django.conf import settings
+
+BUNDLES = {
+    'css/site.css': ['css/all.css', 'css/bootstrap.css', 'css/lightbox.min.css', 'css/style.css'],
+    'js/site.js': [
+        'js/jquery-3.3.1.min.js', 'js/bootstrap.bundle.min.js', 'js/lightbox.min.js',
+        'js/main.js', 'js/modal.js',
+    ],
+}
+
+try:
+    import rjsmin
+except ImportError:  # optional; JS is then only concatenated
+    rjsmin = None
+
+# Strings are kept as they are; comments and whitespace are fair game
+_CSS_TOKEN_RE = re.compile(r'''("(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')|(/\*.*?\*/)''', re.S)
+_CSS_SPACE_RE = re.compile(r'\s+')
+# Spaces around these never matter; "+", "-" and "~" are left alone for calc()
+_CSS_PUNCT_RE = re.compile(r'\s*([{};,>])\s*')
+_SOURCE_MAP_RE = re.compile(r'^\s*(?://|/\*)# sourceMappingURL=.*$', re.M)
+
+
+def get_bundles():
+    return getattr(settings, 'STATIC_BUNDLES', BUNDLES)
+
+
+def minify_css(css):
+    strings = []
+
+    def stash(match):
+        if match.group(1):
+            strings.append(match.group(1))
+            return f'\x00{len(strings) - 1}\x00'
+        # Keep /*! licence */ comments
+        return match.group(2) if match.group(2).startswith('/*!') else ' '
+
+    css = _CSS_TOKEN_RE.sub(stash, css)
+    css = _CSS_SPACE_RE.sub(' ', css)
+    css = _CSS_PUNCT_RE.sub(r'\1', css)
+    css = css.replace(';}', '}').replace(': ', ':').strip()
+    return re.sub('\x00(\\d+)\x00', lambda m: strings[int(m.group(1))], css)
+
+
+def minify_js(js):
+    return rjsmin.jsmin(js, keep_bang_comments=True) if rjsmin else js
+
+
+def build_bundle(name, sources):
+    """
+    ``sources`` (a list of ``(path, text)``) joined and minified for bundle
+    ``name``. Source map references are dropped: they'd point into the wrong file.
+    """
+    parts = []
+    for path, text in sources:
+        text = _SOURCE_MAP_RE.sub('', text)
+        if name.endswith('.css'):
+            parts.append(text if path.endswith('.min.css') else minify_css(text))
+        else:
+            parts.append(text if path.endswith('.min.js') else minify_js(text))
+    # ";" so a file without a trailing semicolon can't run into the next one
+    return ('\n' if name.endswith('.css') else '\n;\n').join(part.strip() for part in parts) + '\n'
@@ -0,0 +1,115 @@
+"""
+Font Awesome cut down to the icons the templates use.
+
+``all.css`` declares some 1,200 icons and the webfonts carry a glyph for
+each. ``build_icon_subset`` scans the template directories for ``fa-*``
+classes that name an icon in ``all.css``, then
+
+* drops every other ``.fa-x:before`` rule from the CSS;
+* with fontTools installed, subsets each font to those code points, as WOFF
+  (and WOFF2 when ``brotli`` is installed too), and points ``@font-face``
+  at the subsets instead of the full eot/woff2/woff/ttf/svg set.
+
+``collectstatic`` runs it and bundles the result in place of ``all.css``
+(see ``storage.py``); ``manage.py subset_icons`` shows what is kept. Icons
+that only appear in the database or in JavaScript must be listed in
+``settings.ICON_SUBSET_EXTRA``; ``ICON_SUBSET = False`` ships the full set.
+"""
+import io
+import logging
+import os
+import re
+
+from django.conf import settings
+from django.template.utils import get_app_template_dirs
+
+try:
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+except ImportError:  # optional; only the CSS is trimmed
+    subset = None
+else:
+    # The vendored fonts pad their post table, which fontTools warns about on every load
+    logging.getLogger('fontTools.ttLib.tables._p_o_s_t').setLevel(logging.ERROR)
+
+try:
+    import brotli  # noqa: F401  (fontTools needs it for WOFF2)
+except ImportError:
+    brotli = None
+
+ICON_CSS = 'css/all.css'
+SUBSET_DIR = 'webfonts/subset'
+# Best first, as listed in @font-face
+FLAVORS = ('woff2', 'woff') if brotli else ('woff',)
+
+_CLASS_RE = re.compile(r'\bfa-([a-z0-9-]+)')
+_ICON_RULE_RE = re.compile(r'\.fa-([a-z0-9-]+):before\s*\{\s*content:\s*"\\([0-9a-f]+)";?\s*\}\s*', re.I)
+_FONT_FACE_RE = re.compile(r'@font-face\s*\{[^}]*\}')
+_FONT_SRC_RE = re.compile(r'\s*src:[^;]*;')
+_FONT_URL_RE = re.compile(r'url\("\.\./webfonts/([^."/]+)\.')
+
+
+def template_dirs():
+    dirs = []
+    for engine in settings.TEMPLATES:
+        dirs.extend(engine.get('DIRS', []))
+    dirs.extend(get_app_template_dirs('templates'))
+    return dirs
+
+
+def used_icons(dirs=None):
+    """Every ``fa-*`` name in the templates under ``dirs``, icon or not."""
+    names = set(getattr(settings, 'ICON_SUBSET_EXTRA', ()))
+    for directory in template_dirs() if dirs is None else dirs:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                with open(os.path.join(root, filename), encoding='utf-8', errors='replace') as f:
+                    names.update(_CLASS_RE.findall(f.read()))
+    return names
+
+
+def icon_codepoints(css):
+    """Icon name -> code point for each ``.fa-x:before`` rule in ``css``."""
+    return {name: int(code, 16) for name, code in _ICON_RULE_RE.findall(css)}
+
+
+def subset_font(data, codepoints, flavor):
+    font = TTFont(io.BytesIO(data))
+    options = subset.Options()
+    options.flavor = flavor
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    out = io.BytesIO()
+    font.save(out)
+    return out.getvalue()
+
+
+def build_icon_subset(read, names=None):
+    """
+    ``(css, fonts)``: ``all.css`` trimmed to the icons in ``names`` (default:
+    ``used_icons()``) and a dict of subset font path -> bytes, empty without
+    fontTools. ``read(path)`` returns the bytes of a static file.
+    """
+    css = read(ICON_CSS).decode('utf-8')
+    names = used_icons() if names is None else set(names)
+    kept = {name: code for name, code in icon_codepoints(css).items() if name in names}
+    css = _ICON_RULE_RE.sub(lambda m: m.group(0) if m.group(1) in kept else '', css)
+    fonts = {}
+    if subset is None:
+        return css, fonts
+
+    def font_face(match):
+        block = match.group(0)
+        font = _FONT_URL_RE.search(block).group(1)
+        # The TrueType file is the one fontTools reads without extra packages
+        data = read(f'webfonts/{font}.ttf')
+        sources = []
+        for flavor in FLAVORS:
+            path = f'{SUBSET_DIR}/{font}.{flavor}'
+            fonts[path] = subset_font(data, kept.values(), flavor)
+            sources.append(f'url("../{path}") format("{flavor}")')
+        block = _FONT_SRC_RE.sub('', block).rstrip('}').rstrip()
+        return f'{block}\n  src: {", ".join(sources)}; }}'
+
+    return _FONT_FACE_RE.sub(font_face, css), fonts
@@ -0,0 +1,46 @@
+import os
+
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+
+from assets import icons
+
+
+def read_static(path):
+    found = finders.find(path)
+    if not found:
+        raise CommandError(f"Static file {path} not found")
+    with open(found, 'rb') as f:
+        return f.read()
+
+
+class Command(BaseCommand):
+    help = (
+        "Show which Font Awesome icons the templates use and how small the "
+        "trimmed CSS and subset fonts come out. collectstatic does the same "
+        "on every run; --output writes the files for inspection."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', help="Directory to write the CSS and fonts to.")
+
+    def handle(self, *args, **options):
+        css, fonts = icons.build_icon_subset(read_static)
+        full_css = read_static(icons.ICON_CSS)
+        kept = sorted(icons.icon_codepoints(css))
+        self.stdout.write(f"{len(kept)} icons: {' '.join(kept)}")
+        self.stdout.write(f"{icons.ICON_CSS}: {len(full_css):,} -> {len(css.encode()):,} bytes")
+        if icons.subset is None:
+            self.stderr.write("fontTools is not installed: fonts are served in full", style_func=self.style.WARNING)
+        for path, data in sorted(fonts.items()):
+            name, flavor = os.path.splitext(os.path.basename(path))
+            full = read_static(f'webfonts/{name}{flavor}')
+            self.stdout.write(f"{name}{flavor}: {len(full):,} -> {len(data):,} bytes")
+
+        if options['output']:
+            for path, data in [(icons.ICON_CSS, css.encode()), *fonts.items()]:
+                target = os.path.join(options['output'], path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, 'wb') as f:
+                    f.write(data)
+            self.stdout.write(f"Written to {options['output']}", style_func=self.style.SUCCESS)
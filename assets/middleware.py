@@ -0,0 +1,103 @@
+"""
+Serving of ``STATIC_ROOT`` when there is no front proxy to do it.
+
+``PrecompressedStaticMiddleware`` answers requests under ``STATIC_URL``
+before any other middleware runs. It sends the ``.br`` or ``.gz`` sibling
+written by ``collectstatic`` when the client accepts it (with
+``Vary: Accept-Encoding``), and marks content-hashed names from the
+manifest ``immutable`` for a year, so a returning visitor requests none of
+them again. Unhashed names get a short ``max-age``. Enabled by setting
+``SERVE_STATIC`` in the environment.
+"""
+import mimetypes
+import os
+import stat
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from config.media import CACHE_MAX_AGE, file_etag
+
+UNHASHED_MAX_AGE = 60
+# Preferred first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(header):
+    """Content codings ``header`` (an ``Accept-Encoding`` value) allows."""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q=') and quality[2:].strip() in ('0', '0.0', '0.00', '0.000'):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _stat_file(path):
+    try:
+        st = os.stat(path)
+    except (OSError, ValueError):
+        return None
+    return st if stat.S_ISREG(st.st_mode) else None
+
+
+class PrecompressedStaticMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = '/' + settings.STATIC_URL.lstrip('/')
+        self.immutable = frozenset(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+    def __call__(self, request):
+        if request.path_info.startswith(self.prefix) and request.method in ('GET', 'HEAD'):
+            return self.serve(request, request.path_info[len(self.prefix):])
+        return self.get_response(request)
+
+    def serve(self, request, path):
+        try:
+            fullpath = safe_join(settings.STATIC_ROOT, path)
+        except SuspiciousFileOperation:
+            raise Http404("No such file")
+        st = _stat_file(fullpath)
+        if st is None:
+            raise Http404("No such file")
+
+        content_type, encoding = mimetypes.guess_type(fullpath)
+        # As FileResponse does: a .gz asked for by name is sent as an opaque file
+        content_type = content_type if content_type and not encoding else 'application/octet-stream'
+        served, content_encoding, has_siblings = fullpath, None, False
+        accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        for coding, suffix in ENCODINGS:
+            sibling = _stat_file(fullpath + suffix)
+            if sibling is None:
+                continue
+            has_siblings = True
+            if coding in accepted and served == fullpath:
+                served, content_encoding, st = fullpath + suffix, coding, sibling
+
+        def finish(response):
+            # Each encoding has its own size, hence its own ETag
+            response['ETag'] = file_etag(st)
+            response['Last-Modified'] = http_date(st.st_mtime)
+            if has_siblings:
+                patch_vary_headers(response, ('Accept-Encoding',))
+            if path in self.immutable:
+                patch_cache_control(response, public=True, immutable=True, max_age=CACHE_MAX_AGE)
+            else:
+                patch_cache_control(response, public=True, max_age=UNHASHED_MAX_AGE)
+            return response
+
+        not_modified = get_conditional_response(request, etag=file_etag(st), last_modified=int(st.st_mtime))
+        if not_modified is not None:
+            return finish(not_modified)
+        # content_type given explicitly: FileResponse would call "x.css.gz" application/gzip
+        response = FileResponse(open(served, 'rb'), content_type=content_type)
+        if content_encoding:
+            response['Content-Encoding'] = content_encoding
+        return finish(response)
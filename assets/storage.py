@@ -0,0 +1,102 @@
+"""
+Static files storage for production.
+
+On top of Django's ``ManifestStaticFilesStorage`` (content-hashed names and
+``staticfiles.json``), ``collectstatic`` here
+
+1. cuts Font Awesome down to the icons the templates use (``icons.py``);
+2. builds the bundles in ``bundles.py`` before hashing, so they are hashed,
+   and their ``url()`` references rewritten, like any other file;
+3. writes a ``.gz`` sibling (and ``.br``, with the ``brotli`` package
+   installed) next to every compressible file, for the front proxy's
+   ``gzip_static``/``brotli_static`` or ``middleware.py`` to send as is.
+
+Until ``collectstatic`` has written a manifest (runserver, tests) URLs are
+the plain source paths, as with the default storage.
+"""
+import gzip
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import HashedFilesMixin, ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+from .bundles import build_bundle, get_bundles
+from .icons import ICON_CSS, build_icon_subset
+
+try:
+    import brotli
+except ImportError:  # optional; only .gz siblings are written
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = frozenset({
+    '.css', '.js', '.json', '.map', '.svg', '.txt', '.xml', '.html', '.ttf', '.eot', '.otf', '.ico',
+})
+# Not worth a sibling unless it saves this much
+MIN_SAVING = 0.05
+
+
+class AssetStorage(ManifestStaticFilesStorage):
+    # Only rewrite CSS references: the vendored minified JS points at source
+    # maps we don't ship, which would make collectstatic fail
+    patterns = HashedFilesMixin.patterns[:1]
+
+    def url(self, name, force=False):
+        if not self.hashed_files and not force:
+            # Nothing collected yet: serve the sources
+            return super(HashedFilesMixin, self).url(name)
+        return super().url(name, force)
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run, **options)
+            return
+        paths = dict(paths)
+        # Bundled in place of the files they were made from
+        replacements = {}
+        if getattr(settings, 'ICON_SUBSET', True) and self.exists(ICON_CSS):
+            replacements[ICON_CSS], fonts = build_icon_subset(self.read)
+            for name, data in fonts.items():
+                self.write(name, data)
+                paths[name] = (self, name)
+        for name in self.write_bundles(replacements):
+            paths[name] = (self, name)
+        yield from super().post_process(paths, dry_run, **options)
+        for name in sorted({*paths, *self.hashed_files.values()}):
+            for sibling in self.compress(name):
+                yield name, sibling, True
+
+    def read(self, name):
+        with self.open(name) as f:
+            return f.read()
+
+    def write(self, name, data):
+        if self.exists(name):
+            self.delete(name)
+        self.save(name, ContentFile(data))
+
+    def write_bundles(self, replacements=None):
+        replacements = replacements or {}
+        for name, sources in get_bundles().items():
+            texts = [
+                (path, replacements[path] if path in replacements else self.read(path).decode('utf-8'))
+                for path in sources
+            ]
+            self.write(name, build_bundle(name, texts).encode('utf-8'))
+            yield name
+
+    def compress(self, name):
+        """Write the compressed siblings of ``name``; yield their names."""
+        if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS or not self.exists(name):
+            return
+        data = self.read(name)
+        encoders = [('.gz', lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            encoders.append(('.br', lambda d: brotli.compress(d, quality=11)))
+        for suffix, encode in encoders:
+            compressed = encode(data)
+            if len(compressed) > len(data) * (1 - MIN_SAVING):
+                continue
+            sibling = name + suffix
+            self.write(sibling, compressed)
+            yield sibling
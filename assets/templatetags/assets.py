@@ -0,0 +1,23 @@
+from django import template
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+from ..bundles import get_bundles
+
+register = template.Library()
+
+
+@register.simple_tag
+def bundle(name):
+    """
+    ``<link>`` or ``<script>`` tags for bundle ``name``: the one hashed,
+    minified file once collected, otherwise each of its sources.
+    """
+    hashed_files = getattr(staticfiles_storage, 'hashed_files', {})
+    paths = [name] if name in hashed_files else get_bundles()[name]
+    if name.endswith('.css'):
+        html = '<link rel="stylesheet" href="{}">\n'
+    else:
+        html = '<script src="{}"></script>\n'
+    return format_html_join('', html, ((static(path),) for path in paths))
@@ -0,0 +1,135 @@
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.http import Http404, HttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from . import icons
+from .bundles import build_bundle, minify_css
+from .middleware import PrecompressedStaticMiddleware, accepted_encodings
+
+
+class MinifyTests(SimpleTestCase):
+    def test_css(self):
+        css = '/*! licence */\n.a , .b > p {\n  content: "a  ;  b" ;\n  /* note */ color: red;\n}\n'
+        self.assertEqual(minify_css(css), '/*! licence */ .a,.b>p{content:"a  ;  b";color:red}')
+
+    def test_bundle(self):
+        js = build_bundle('js/x.js', [
+            ('js/a.min.js', 'var a=1\n//# sourceMappingURL=a.min.js.map\n'),
+            ('js/b.js', 'var b=2'),
+        ])
+        self.assertEqual(js, 'var a=1\n;\nvar b=2\n')
+
+    def test_accept_encoding(self):
+        self.assertEqual(accepted_encodings('gzip, deflate, br;q=0'), {'gzip', 'deflate'})
+        self.assertEqual(accepted_encodings(''), {''})
+
+
+def read_static(path):
+    with open(finders.find(path), 'rb') as f:
+        return f.read()
+
+
+class IconSubsetTests(SimpleTestCase):
+    def test_used_icons(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with open(os.path.join(directory, 'page.html'), 'w') as f:
+            f.write('<i class="fas fa-home fa-2x"></i><i class="fab {{ brand|default:\'fa-youtube\' }}"></i>')
+        with self.settings(ICON_SUBSET_EXTRA=['pray']):
+            self.assertEqual(icons.used_icons([directory]), {'home', '2x', 'youtube', 'pray'})
+
+    def test_css_keeps_only_named_icons(self):
+        css, fonts = icons.build_icon_subset(read_static, names={'home', 'youtube', '2x'})
+        self.assertEqual(icons.icon_codepoints(css), {'home': 0xf015, 'youtube': 0xf167})
+        # Sizing and other helper classes stay
+        self.assertIn('.fa-2x {', css)
+        self.assertIn('.fa-spin {', css)
+
+    @unittest.skipIf(icons.subset is None, "fontTools is not installed")
+    def test_fonts_are_subset(self):
+        from fontTools.ttLib import TTFont
+
+        css, fonts = icons.build_icon_subset(read_static, names={'home', 'youtube'})
+        self.assertEqual(
+            sorted(fonts),
+            sorted(f'webfonts/subset/{font}.{flavor}' for font in ('fa-brands-400', 'fa-regular-400', 'fa-solid-900')
+                   for flavor in icons.FLAVORS),
+        )
+        self.assertIn('src: url("../webfonts/subset/fa-solid-900.woff") format("woff"); }', css)
+        self.assertNotIn('.eot', css)
+        solid = TTFont(io.BytesIO(fonts['webfonts/subset/fa-solid-900.woff']))
+        self.assertEqual(set(solid.getBestCmap()), {0xf015})
+        self.assertLess(len(fonts['webfonts/subset/fa-solid-900.woff']), 4096)
+
+
+class BundleTagTests(SimpleTestCase):
+    def test_sources_until_collected(self):
+        html = Template('{% load assets %}{% bundle "js/site.js" %}').render(Context())
+        self.assertEqual(html.count('<script'), 5)
+        self.assertIn('<script src="/static/js/main.js"></script>', html)
+
+
+class CollectedAssetTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.static_root)
+        cls.enterClassContext(override_settings(STATIC_ROOT=cls.static_root))
+        call_command('collectstatic', interactive=False, verbosity=0, stdout=io.StringIO())
+        cls.site_css = staticfiles_storage.stored_name('css/site.css')
+
+    def setUp(self):
+        self.middleware = PrecompressedStaticMiddleware(lambda request: HttpResponse('view'))
+
+    def get(self, path, **headers):
+        return self.middleware(RequestFactory().get('/static/' + path, headers=headers))
+
+    def test_bundles_are_hashed_and_compressed(self):
+        self.assertRegex(self.site_css, r'^css/site\.[0-9a-f]{12}\.css$')
+        with open(os.path.join(self.static_root, self.site_css), 'rb') as f:
+            css = f.read()
+        with gzip.open(os.path.join(self.static_root, self.site_css + '.gz')) as f:
+            self.assertEqual(f.read(), css)
+        # Font references point at the hashed fonts
+        self.assertRegex(css.decode(), r'url\("\.\./webfonts/(subset/)?fa-solid-900\.[0-9a-f]{12}\.woff2?"\)')
+        # Only the icons the templates use
+        self.assertIn(b'.fa-home:before{', css)
+        self.assertNotIn(b'.fa-zhihu:before{', css)
+        self.assertNotIn(b'sourceMappingURL', css)
+
+        html = Template('{% load assets %}{% bundle "css/site.css" %}').render(Context())
+        self.assertEqual(html, f'<link rel="stylesheet" href="/static/{self.site_css}">\n')
+
+    def test_middleware(self):
+        response = self.get(self.site_css, accept_encoding='gzip, br;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertIn('immutable', response['Cache-Control'])
+        body = b''.join(response.streaming_content)
+        response.close()
+        self.assertEqual(gzip.decompress(body)[:2], b'/*')
+
+        response = self.get(self.site_css, if_none_match=response['ETag'], accept_encoding='gzip')
+        self.assertEqual(response.status_code, 304)
+
+        # Identity for clients without gzip; unhashed names aren't immutable
+        response = self.get('css/site.css')
+        response.close()
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+
+        self.assertEqual(self.middleware(RequestFactory().get('/about/')).content, b'view')
+        with self.assertRaises(Http404):
+            self.get('css/missing.css')
@@ -0,0 +1,76 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from benchmarks import runner
+from benchmarks.seed import ADMIN_USERNAME
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every URL in config.urls and every admin changelist N times "
+        "and report p50/p95/p99 latency, queries per request and response "
+        "size. Run seed_benchmark_data first. --output saves the results as "
+        "JSON; --compare fails if they regressed against an earlier file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='*', metavar='url_name', help="Default: every URL.")
+        parser.add_argument('--requests', type=int, default=50, help="Timed requests per URL.")
+        parser.add_argument('--warmup', type=int, default=5, help="Untimed requests per URL first.")
+        parser.add_argument('--host', default='localhost', help="Host header; must be in ALLOWED_HOSTS.")
+        parser.add_argument(
+            '--anonymous', action='store_true',
+            help=f"Request as a visitor instead of {ADMIN_USERNAME}; the admin then only shows its login page.",
+        )
+        parser.add_argument(
+            '--page-cache', action='store_true',
+            help="Leave the anonymous page cache on; by default every request renders the view.",
+        )
+        parser.add_argument('--output', '-o', help="Write the results to this JSON file.")
+        parser.add_argument('--compare', metavar='BASELINE', help="JSON results of an earlier run.")
+        parser.add_argument(
+            '--threshold', type=float, default=1.25,
+            help="With --compare, the p95 ratio that counts as a regression.",
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError("--requests must be at least 1")
+        user = None
+        if not options['anonymous']:
+            user = User.objects.filter(username=ADMIN_USERNAME).first()
+            if user is None:
+                raise CommandError(f"No {ADMIN_USERNAME} user; run seed_benchmark_data, or pass --anonymous")
+        baseline = runner.load(options['compare']) if options['compare'] else None
+
+        urls, skipped = runner.benchmark_urls(options['urls'])
+        for name, reason in skipped.items():
+            self.stdout.write(f"skipped {name}: {reason}")
+        self.stdout.write(
+            f"{'url':<46} {'status':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>7} {'bytes':>9}"
+        )
+
+        def log(name, result):
+            self.stdout.write(
+                f"{name:<46} {max(result['status']):>6} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+                f"{result['p99_ms']:>8.2f} {result['queries']:>7} {result['bytes']:>9,}"
+            )
+
+        page_cache = {} if options['page_cache'] else {'PAGE_CACHE_TIMEOUT': 0}
+        with override_settings(**page_cache):
+            report = runner.run(
+                urls, user, requests=options['requests'], warmup=options['warmup'],
+                host=options['host'], log=log,
+            )
+        if options['output']:
+            runner.save(report, options['output'])
+            self.stdout.write(f"Saved to {options['output']}")
+
+        if baseline is not None:
+            problems = runner.compare(baseline, report, threshold=options['threshold'])
+            if problems:
+                raise CommandError(
+                    f"Regressions against {baseline['commit']}:\n" + '\n'.join(problems)
+                )
+            self.stdout.write(f"No regressions against {baseline['commit']}", style_func=self.style.SUCCESS)
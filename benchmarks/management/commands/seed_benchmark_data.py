@@ -0,0 +1,54 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic Chinese-language data for run_benchmarks: "
+        "by default 100k sermons, 10k events, 1M participants and 500k donations. "
+        "The seeded tables must be empty; --clear empties them first, deleting "
+        "real rows too. Never run it against production."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=float, default=1.0,
+            help="Multiply every default row count, e.g. 0.01 for a quick run.",
+        )
+        for name, count in seed.DEFAULT_COUNTS.items():
+            parser.add_argument(f'--{name}', type=int, help=f"Rows to create (default {count:,} x scale).")
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0, help="Random seed; the same seed gives the same data.")
+        parser.add_argument('--clear', action='store_true', help="Empty the seeded tables first.")
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            if options['interactive'] and input(
+                "This deletes every event, registration, donation, sermon, ministry, prayer, "
+                "fellowship event and newsletter in the database. Type 'yes' to continue: "
+            ) != 'yes':
+                raise CommandError("Cancelled")
+            seed.clear()
+        elif any(model.objects.exists() for model in seed.MODELS) or User.objects.filter(
+            username=seed.ADMIN_USERNAME,
+        ).exists():
+            raise CommandError("The database already holds data; use --clear to replace it")
+
+        counts = {
+            name: options[name] if options[name] is not None else max(1, round(count * options['scale']))
+            for name, count in seed.DEFAULT_COUNTS.items()
+        }
+        started = time.perf_counter()
+        seeder = seed.Seeder(counts, batch_size=options['batch_size'], seed=options['seed'], log=self.stdout.write)
+        created = seeder.run()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{sum(created.values()):,} rows in {elapsed:.1f}s; log in as "
+            f"{seed.ADMIN_USERNAME} / {seed.PASSWORD}",
+            style_func=self.style.SUCCESS,
+        )
@@ -0,0 +1,185 @@
+"""
+Request every page of the site and record how it performs.
+
+``benchmark_urls()`` lists every named URL in ``config.urls`` plus the admin
+changelists (the same set the query budgets cover), filled in with rows of
+the seeded database. ``run()`` requests each one through the test client,
+after a few warm-up requests, and records latency percentiles, queries per
+request and response size. The report is plain JSON, tagged with the
+commit and the database it ran on, so ``compare()`` can flag regressions
+between two runs.
+"""
+import json
+import math
+import statistics
+import subprocess
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection, connections
+from django.test import Client
+from django.utils import timezone
+
+from activities.models import Event, EventParticipant
+from config.querybudget import POST_ONLY, QueryRecorder, url_for, url_names
+from indexes.models import Ministry
+from newsletter.models import Newsletter
+
+from .seed import ADMIN_USERNAME, seeded_rows
+
+# GET handlers that change data
+WRITES = POST_ONLY | {'activities:withdraw'}
+QUERY_STRINGS = {
+    'search:results': {'q': '恩典'},
+    'search:api': {'q': '恩典'},
+}
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank ``p``th percentile of an ascending list."""
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def url_kwargs():
+    """Arguments for the URLs that take one, from the seeded rows."""
+    kwargs = {}
+    event = Event.objects.filter(is_active=True).order_by('-feed_key', '-event_id').first()
+    if event:
+        kwargs['event_id'] = event.event_id
+    registration = EventParticipant.objects.filter(user__username=ADMIN_USERNAME).first()
+    if registration:
+        kwargs['registration_id'] = registration.pk
+    ministry = Ministry.objects.filter(is_active=True).order_by('-activity_date').first()
+    if ministry:
+        kwargs['ministry_id'] = ministry.pk
+    newsletter = Newsletter.objects.filter(is_published=True).order_by('-published_date').first()
+    if newsletter:
+        kwargs['slug'] = newsletter.slug
+        # Seeded newsletters have no PDF on disk
+        if default_storage.exists(newsletter.pdf_file.name):
+            kwargs['path'] = newsletter.pdf_file.name
+    return kwargs
+
+
+def benchmark_urls(names=None):
+    """``(urls, skipped)``: ``{name: path}`` to request, and the names left out and why."""
+    kwargs = url_kwargs()
+    urls, skipped = {}, {}
+    for name in names or url_names():
+        if name in WRITES:
+            skipped[name] = "changes data"
+            continue
+        path = url_for(name, kwargs)
+        if path is None:
+            skipped[name] = "no row to request"
+            continue
+        urls[name] = path
+    return urls, skipped
+
+
+def end_request():
+    """
+    What the request handler does after each request and the test client
+    leaves out: disconnect, or return the connection to the pool. Not
+    inside a transaction (a test's), which that would end.
+    """
+    if not any(conn.in_atomic_block for conn in connections.all()):
+        close_old_connections()
+
+
+def measure(client, path, data, requests, warmup):
+    """Latencies, query counts and response sizes of ``requests`` GETs of ``path``."""
+    for _ in range(warmup):
+        client.get(path, data)
+        end_request()
+    timings, queries, sizes, statuses = [], [], [], set()
+    for _ in range(requests):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with recorder.record():
+            response = client.get(path, data)
+            body = b''.join(response) if response.streaming else response.content
+        timings.append((time.perf_counter() - started) * 1000)
+        end_request()
+        queries.append(len(recorder))
+        sizes.append(len(body))
+        statuses.add(response.status_code)
+    timings.sort()
+    result = {'path': path, 'status': sorted(statuses)}
+    for p in PERCENTILES:
+        result[f'p{p}_ms'] = round(percentile(timings, p), 3)
+    result['mean_ms'] = round(statistics.fmean(timings), 3)
+    result['queries'] = max(queries)
+    result['bytes'] = max(sizes)
+    return result
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(urls, user=None, requests=50, warmup=5, host='localhost', log=None):
+    """Benchmark ``urls`` (``{name: path}``), logged in as ``user`` if given. Returns the report."""
+    client = Client(SERVER_NAME=host)
+    if user is not None:
+        client.force_login(user)
+    results = {}
+    for name, path in urls.items():
+        results[name] = measure(client, path, QUERY_STRINGS.get(name), requests, warmup)
+        if log:
+            log(name, results[name])
+        if user is not None:
+            # Logging out, or a view that flushes the session, ends the login
+            client.force_login(user)
+    return {
+        'commit': current_commit(),
+        'created': timezone.now().isoformat(timespec='seconds'),
+        'database': connection.vendor,
+        'user': user.get_username() if user else None,
+        'requests': requests,
+        'rows': seeded_rows(),
+        'urls': results,
+    }
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save(report, path):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+
+
+def compare(baseline, report, threshold=1.25, min_delta_ms=1.0):
+    """
+    Regressions of ``report`` against ``baseline``, as messages: a p95 more
+    than ``threshold`` times the baseline's (and at least ``min_delta_ms``
+    slower, so sub-millisecond noise doesn't count), more queries, or a URL
+    that now fails.
+    """
+    problems = []
+    for name, before in sorted(baseline['urls'].items()):
+        after = report['urls'].get(name)
+        if after is None:
+            continue
+        if after['p95_ms'] > before['p95_ms'] * threshold and after['p95_ms'] - before['p95_ms'] >= min_delta_ms:
+            problems.append(f"{name}: p95 {before['p95_ms']:.2f} -> {after['p95_ms']:.2f} ms")
+        if after['queries'] > before['queries']:
+            problems.append(f"{name}: {before['queries']} -> {after['queries']} queries")
+        if max(after['status']) >= 400 > max(before['status']):
+            problems.append(f"{name}: now answers {max(after['status'])}")
+    return problems
@@ -0,0 +1,285 @@
+"""
+Synthetic data at production-like scale, for the benchmark runner.
+
+``Seeder.run()`` fills every table the public site and the admin read
+with rows that look like the real thing: Chinese titles, speakers and
+prayer texts, events spread over past and future years, participants
+registered per event, donations over a decade. Rows are generated lazily and written with
+``bulk_create`` in batches, so a million participants never sit in memory.
+
+``bulk_create`` skips ``save()`` and signals, so the seeder sets
+``Event.feed_key`` itself and afterwards rebuilds what the signals keep up
+to date: the sermon facets, the search index and the cache (homepage
+snapshot, page cache).
+
+The same ``seed`` gives the same data, so runs on different commits
+compare like with like. Members share one password hash; ``ADMIN_USERNAME``
+is the superuser the runner logs in as.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+
+from activities.models import Donation, Event, EventParticipant, OutboundEmail
+from fellowship.models import FellowshipEvent
+from indexes.models import Ministry, Prayer
+from newsletter.models import Newsletter
+from search import index as search_index
+from search.models import SearchDocument
+from worships.facets import rebuild_facets
+from worships.models import SermonFacet, WorshipSermon
+
+ADMIN_USERNAME = 'bench-admin'
+MEMBER_PREFIX = 'bench-member-'
+PASSWORD = 'bench'
+
+# Rows per model at scale 1
+DEFAULT_COUNTS = {
+    'users': 20_000,
+    'sermons': 100_000,
+    'events': 10_000,
+    'participants': 1_000_000,
+    'donations': 500_000,
+    'ministries': 2_000,
+    'prayers': 20_000,
+    'fellowship': 40,
+    'newsletters': 300,
+}
+# The admin's own registrations and donations, for a realistic dashboard
+ADMIN_REGISTRATIONS = 12
+ADMIN_DONATIONS = 60
+
+# Seeded tables, emptied by clear()
+MODELS = [
+    OutboundEmail, EventParticipant, Donation, Event, WorshipSermon, SermonFacet,
+    Ministry, Prayer, FellowshipEvent, Newsletter, SearchDocument,
+]
+
+WORDS = [
+    '恩典', '信心', '盼望', '愛心', '禱告', '敬拜', '福音', '救恩', '十架', '復活',
+    '聖靈', '真理', '生命', '平安', '喜樂', '忍耐', '謙卑', '順服', '感恩', '讚美',
+    '國度', '使命', '門徒', '團契', '教會', '家庭', '婚姻', '青年', '長者', '兒童',
+    '醫治', '安慰', '同行', '守望', '宣教', '關懷', '探訪', '查經', '靈修', '見證',
+    '饒恕', '憐憫', '公義', '聖潔', '智慧', '光明', '牧養', '建立', '更新', '得勝',
+]
+SURNAMES = '陳李張黃何林梁吳王劉鄭蔡楊許謝周葉羅郭馮'
+GIVEN_NAMES = ['志明', '嘉欣', '家豪', '詠詩', '俊傑', '美玲', '偉強', '慧敏', '子軒', '曉彤', '振華', '麗珊']
+TITLES = ['牧師', '傳道', '長老', '執事', '弟兄', '姊妹']
+PLACES = ['大堂', '副堂', '810室', '902室', '禱告室', 'Zoom', '營地', '社區中心']
+PRAYER_TOPICS = ['為身體軟弱的肢體', '為教會事工', '為宣教士', '為青少年', '為家人得救', '為社會安寧', '為考試的學生']
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Seeder:
+    def __init__(self, counts=None, batch_size=2000, seed=0, log=None):
+        self.counts = dict(DEFAULT_COUNTS, **(counts or {}))
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        self.today = timezone.localdate()
+        self.log = log or (lambda message: None)
+
+    # Text
+
+    def phrase(self, words=3):
+        return ''.join(self.rng.sample(WORDS, words))
+
+    def paragraph(self, sentences=4):
+        return '。'.join(
+            f"{self.phrase(2)}的{self.phrase(self.rng.randint(1, 3))}" for _ in range(sentences)
+        ) + '。'
+
+    def person(self):
+        return self.rng.choice(SURNAMES) + self.rng.choice(GIVEN_NAMES)
+
+    def day(self, past_days, future_days=0):
+        return self.today + timedelta(days=self.rng.randint(-past_days, future_days))
+
+    # Writing
+
+    def create(self, model, rows):
+        created = 0
+        for batch in _batched(rows, self.batch_size):
+            model.objects.bulk_create(batch)
+            created += len(batch)
+        self.log(f"{model._meta.verbose_name_plural}: {created:,}")
+        return created
+
+    def ids(self, queryset):
+        return list(queryset.order_by('pk').values_list('pk', flat=True))
+
+    # Models
+
+    def users(self, n):
+        password = make_password(PASSWORD)
+        for i in range(n):
+            yield User(
+                username=f'{MEMBER_PREFIX}{i}', email=f'{MEMBER_PREFIX}{i}@example.org',
+                password=password, first_name=self.person(),
+            )
+
+    def sermons(self, n):
+        speakers = [f"{self.person()}{self.rng.choice(TITLES[:3])}" for _ in range(60)]
+        for _ in range(n):
+            yield WorshipSermon(
+                speaker_name=self.rng.choice(speakers),
+                sermon_title=self.phrase(self.rng.randint(2, 4)),
+                youtube_link=f'https://youtu.be/{self.rng.getrandbits(48):012x}',
+                sermon_date=self.day(30 * 365),
+            )
+
+    def events(self, n):
+        for _ in range(n):
+            free = self.rng.random() < 0.4
+            fee = Decimal(self.rng.randrange(50, 1000, 50))
+            event = Event(
+                title=f"{self.phrase(2)}{self.rng.choice(['講座', '退修會', '培訓', '聚會', '營會'])}",
+                description=self.paragraph(),
+                start_date=self.day(3 * 365, 365),
+                location=self.rng.choice(PLACES),
+                is_featured=self.rng.random() < 0.02,
+                is_active=self.rng.random() < 0.9,
+                is_free=free,
+                fee_amount=0 if free else fee,
+                early_bird_fee=None if free else fee * Decimal('0.8'),
+                is_announcement=self.rng.random() < 0.1,
+                unlimited_quota=self.rng.random() < 0.3,
+                quota_left=self.rng.randint(0, 200),
+            )
+            event.appl_deadline = event.start_date - timedelta(days=7)
+            event.feed_key = event.compute_feed_key()
+            yield event
+
+    def participants(self, n, event_ids, user_ids):
+        """
+        ``n`` registrations, round robin over events so emails stay unique per
+        event. ``user_ids`` starts with the admin's.
+        """
+        admin_id, members = user_ids[0], user_ids[1:]
+        for event_id in self.rng.sample(event_ids, min(ADMIN_REGISTRATIONS, len(event_ids), n)):
+            n -= 1
+            yield EventParticipant(
+                event_id=event_id, email=f'{ADMIN_USERNAME}@example.org', user_id=admin_id,
+                full_name='Bench Admin',
+            )
+        for i in range(n):
+            k = i // len(event_ids)
+            member = k < len(members)
+            yield EventParticipant(
+                event_id=event_ids[i % len(event_ids)],
+                email=f'{MEMBER_PREFIX}{k}@example.org' if member else f'guest-{k}@example.com',
+                user_id=members[k] if member else None,
+                full_name=self.person(),
+                telephone=f'9{self.rng.randrange(10 ** 7):07d}',
+                withdrawal_date=self.day(365) if self.rng.random() < 0.05 else None,
+            )
+
+    def donations(self, n, user_ids):
+        for i in range(n):
+            yield Donation(
+                user_id=user_ids[0] if i < ADMIN_DONATIONS else self.rng.choice(user_ids),
+                amount=Decimal(self.rng.randrange(100, 500_000)) / 100,
+                date=self.day(10 * 365),
+            )
+
+    def ministries(self, n):
+        for i in range(n):
+            yield Ministry(
+                title=f"{self.phrase(2)}事工",
+                description=self.paragraph(6),
+                activity_date=self.day(5 * 365, 60),
+                location=self.rng.choice(PLACES),
+                is_active=self.rng.random() < 0.95,
+                display_order=i % 10,
+            )
+
+    def prayers(self, n):
+        for _ in range(n):
+            yield Prayer(
+                title=f"{self.rng.choice(PRAYER_TOPICS)}代禱",
+                content=self.paragraph(3),
+                is_urgent=self.rng.random() < 0.05,
+                is_active=self.rng.random() < 0.9,
+                display_date=self.day(3 * 365),
+            )
+
+    def fellowship(self, n):
+        for i in range(n):
+            yield FellowshipEvent(
+                title=f"{self.phrase(1)}團契",
+                date_text=self.rng.choice(['每星期六', '隔星期三', '每月第一個主日']),
+                time_text='7:30–9:30 pm',
+                location=self.rng.choice(PLACES),
+                description=self.paragraph(2),
+                sort_order=i,
+            )
+
+    def newsletters(self, n):
+        for i in range(n):
+            published = self.today - timedelta(days=30 * i)
+            yield Newsletter(
+                title=f"牧者心聲 第{n - i}期：{self.phrase(2)}",
+                slug=f'issue-{n - i}',
+                published_date=published,
+                pdf_file=f'newsletters/{published:%Y/%m}/issue-{n - i}.pdf',
+                description=self.paragraph(2),
+            )
+
+    def run(self):
+        """Create every row, then rebuild facets, search index and caches. Returns counts."""
+        counts = self.counts
+        created = {}
+        with transaction.atomic():
+            admin = User.objects.create_superuser(ADMIN_USERNAME, f'{ADMIN_USERNAME}@example.org', PASSWORD)
+            created['users'] = self.create(User, self.users(counts['users']))
+            user_ids = [admin.pk, *self.ids(User.objects.filter(username__startswith=MEMBER_PREFIX))]
+
+            created['events'] = self.create(Event, self.events(counts['events']))
+            event_ids = self.ids(Event.objects.all())
+            if event_ids:
+                created['participants'] = self.create(
+                    EventParticipant, self.participants(counts['participants'], event_ids, user_ids),
+                )
+            created['donations'] = self.create(Donation, self.donations(counts['donations'], user_ids))
+            created['sermons'] = self.create(WorshipSermon, self.sermons(counts['sermons']))
+            created['ministries'] = self.create(Ministry, self.ministries(counts['ministries']))
+            created['prayers'] = self.create(Prayer, self.prayers(counts['prayers']))
+            created['fellowship'] = self.create(FellowshipEvent, self.fellowship(counts['fellowship']))
+            created['newsletters'] = self.create(Newsletter, self.newsletters(counts['newsletters']))
+
+            rebuild_facets()
+            documents = search_index.rebuild(batch_size=self.batch_size)
+            self.log(f"search documents: {sum(documents.values()):,}")
+        cache.clear()
+        return created
+
+
+def seeded_rows():
+    """Rows in each seeded table, as recorded with benchmark results."""
+    return {model._meta.label: model.objects.count() for model in [User, *MODELS]}
+
+
+def clear():
+    """Empty the seeded tables and delete the benchmark users."""
+    tables = [model._meta.db_table for model in MODELS]
+    with transaction.atomic():
+        # PostgreSQL won't truncate tables with deferred foreign key checks
+        # pending, as after inserts in the same transaction
+        connection.check_constraints()
+        connection.ops.execute_sql_flush(
+            connection.ops.sql_flush(no_style(), tables, reset_sequences=True, allow_cascade=True),
+        )
+        User.objects.filter(username__startswith='bench-').delete()
+    cache.clear()
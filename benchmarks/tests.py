@@ -0,0 +1,88 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db.models import Count
+from django.test import TestCase
+
+from activities.models import Event, EventParticipant
+from search.models import SearchDocument
+from worships.facets import get_facets
+
+from . import runner, seed
+
+COUNTS = {
+    'users': 5, 'sermons': 30, 'events': 4, 'participants': 40, 'donations': 70,
+    'ministries': 3, 'prayers': 12, 'fellowship': 2, 'newsletters': 3,
+}
+
+
+class SeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.created = seed.Seeder(COUNTS, batch_size=7).run()
+
+    def test_counts(self):
+        self.assertEqual(self.created, COUNTS)
+        self.assertTrue(User.objects.get(username=seed.ADMIN_USERNAME).is_superuser)
+        self.assertEqual(get_facets().total, COUNTS['sermons'])
+        self.assertTrue(SearchDocument.objects.exists())
+
+    def test_rows_are_consistent(self):
+        for event in Event.objects.all():
+            self.assertEqual(event.feed_key, event.compute_feed_key())
+        duplicates = EventParticipant.objects.values('event', 'email').annotate(n=Count('id')).filter(n__gt=1)
+        self.assertFalse(duplicates.exists())
+        self.assertTrue(EventParticipant.objects.filter(user__username=seed.ADMIN_USERNAME).exists())
+
+    def test_command_refuses_to_mix_with_existing_data(self):
+        with self.assertRaisesMessage(CommandError, "already holds data"):
+            call_command('seed_benchmark_data', scale=0.0001, stdout=io.StringIO())
+
+    def test_clear(self):
+        seed.clear()
+        self.assertFalse(Event.objects.exists())
+        self.assertFalse(User.objects.filter(username__startswith='bench-').exists())
+
+
+class RunnerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed.Seeder(COUNTS).run()
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual([runner.percentile(values, p) for p in (50, 95, 99)], [50, 95, 99])
+        self.assertEqual(runner.percentile([7], 99), 7)
+
+    def test_every_url_is_covered(self):
+        urls, skipped = runner.benchmark_urls()
+        self.assertIn('admin:activities_eventparticipant_changelist', urls)
+        self.assertIn('activities:detail', urls)
+        self.assertEqual(skipped.keys(), {'accounts:logout', 'activities:withdraw', 'media'})
+
+    def test_command_writes_and_compares_json(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'results.json')
+        call_command(
+            'run_benchmarks', 'indexes:home', 'search:results', 'admin:activities_event_changelist',
+            requests=3, warmup=1, output=path, stdout=io.StringIO(),
+        )
+        with open(path, encoding='utf-8') as f:
+            report = json.load(f)
+        self.assertEqual(report['user'], seed.ADMIN_USERNAME)
+        self.assertEqual(report['rows']['activities.Event'], COUNTS['events'])
+        result = report['urls']['search:results']
+        self.assertEqual(result['status'], [200])
+        self.assertGreater(result['bytes'], 0)
+        self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+        slower = json.loads(json.dumps(report))
+        slower['urls']['indexes:home'].update(p95_ms=result['p95_ms'] * 2 + 10, queries=99)
+        self.assertEqual(len(runner.compare(report, slower)), 2)
+        self.assertEqual(runner.compare(report, report), [])
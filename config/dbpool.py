@@ -0,0 +1,89 @@
+"""
+Monitoring and graceful exhaustion of the PostgreSQL connection pool.
+
+``settings.DATABASES`` turns on Django's built-in pool (psycopg_pool): each
+worker process keeps between ``DB_POOL_MIN_SIZE`` and ``DB_POOL_MAX_SIZE``
+connections open and hands them from request to request, instead of
+connecting and authenticating for every request. ``CONN_HEALTH_CHECKS``
+makes the pool test a connection with a cheap round trip on checkout, so
+one dropped by a database restart or a firewall is replaced, not handed to
+a view. Connections are retired after ``max_idle``/``max_lifetime``.
+
+When every connection stays busy for ``DB_POOL_TIMEOUT`` seconds the
+checkout fails; ``server_error`` (``handler500``) answers that with a 503
+and ``Retry-After`` instead of the 500 page.
+
+``pool_stats()`` summarises the pool of the current process and
+``pool_status`` serves it as JSON to staff and ``INTERNAL_IPS``.
+"""
+import os
+import sys
+
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, HttpResponse, JsonResponse
+from django.views import defaults
+from django.views.decorators.http import require_safe
+
+try:
+    from psycopg_pool import PoolTimeout
+except ImportError:  # pooling off (psycopg2 or another database)
+    PoolTimeout = None
+
+RETRY_AFTER = 5
+
+
+def pool_stats(alias='default'):
+    """Counters for the pool of ``alias`` in this process, or None if unpooled."""
+    pool = getattr(connections[alias], 'pool', None)
+    if pool is None:
+        return None
+    stats = pool.get_stats()
+    size = stats.get('pool_size', 0)
+    requests = stats.get('requests_num', 0)
+    wait_ms = stats.get('requests_wait_ms', 0)
+    return {
+        'min_size': stats.get('pool_min', 0),
+        'max_size': stats.get('pool_max', 0),
+        'size': size,
+        'in_use': size - stats.get('pool_available', 0),
+        'waiting': stats.get('requests_waiting', 0),
+        'checkouts': requests,
+        'checkouts_queued': stats.get('requests_queued', 0),
+        'checkout_timeouts': stats.get('requests_errors', 0),
+        'wait_ms_total': wait_ms,
+        'wait_ms_mean': round(wait_ms / requests, 3) if requests else 0,
+        'created': stats.get('connections_num', 0),
+        # Closed for age or idleness, failed health checks and bad returns
+        'recycled': stats.get('connections_num', 0) - size,
+        'failed_checks': stats.get('connections_lost', 0),
+        'connect_errors': stats.get('connections_errors', 0),
+        'connect_ms_total': stats.get('connections_ms', 0),
+    }
+
+
+def is_pool_timeout(exc):
+    """True if ``exc`` (or what Django wrapped) is a pool checkout timeout."""
+    if PoolTimeout is None:
+        return False
+    while exc is not None:
+        if isinstance(exc, PoolTimeout):
+            return True
+        exc = exc.__cause__
+    return False
+
+
+def server_error(request, template_name=defaults.ERROR_500_TEMPLATE_NAME):
+    if is_pool_timeout(sys.exc_info()[1]):
+        response = HttpResponse("Server busy, please try again shortly.", status=503, content_type='text/plain')
+        response['Retry-After'] = RETRY_AFTER
+        return response
+    return defaults.server_error(request, template_name)
+
+
+@require_safe
+def pool_status(request):
+    if not (request.user.is_staff or request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS):
+        raise Http404
+    pools = {alias: pool_stats(alias) for alias in connections}
+    return JsonResponse({'pid': os.getpid(), 'pools': pools})
@@ -0,0 +1,25 @@
+"""
+gunicorn hooks: ``gunicorn -c config/gunicorn.py config.wsgi --workers 4``.
+
+With ``PROMETHEUS_MULTIPROC_DIR`` set, workers share their metrics through
+files in that directory (see ``metrics/instruments.py``). It is emptied
+when the server starts, so counters begin at zero rather than adding up
+samples of an earlier run, and cleaned up as workers exit.
+"""
+import glob
+import os
+
+from prometheus_client import multiprocess
+
+
+def on_starting(server):
+    directory = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, "*.db")):
+            os.remove(path)
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(worker.pid)
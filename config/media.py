@@ -0,0 +1,159 @@
+"""
+Serving of user-uploaded media (``MEDIA_ROOT``) in production.
+
+``serve_media`` answers conditional requests (``If-None-Match`` /
+``If-Modified-Since``) from a ``stat()`` alone, then either hands the
+transfer to the front proxy or streams the file itself:
+
+* with ``MEDIA_X_ACCEL_REDIRECT`` set (nginx), the response carries an
+  ``X-Accel-Redirect`` to that internal location and no body; nginx serves
+  the bytes, ``Range`` included;
+* with ``MEDIA_X_SENDFILE`` (Apache mod_xsendfile, lighttpd), the
+  ``X-Sendfile`` header carries the absolute path instead;
+* otherwise a ``FileResponse`` is returned, which gunicorn and other WSGI
+  servers with ``wsgi.file_wrapper`` send with ``sendfile()``. Single byte
+  ranges are honoured by positioning the file and capping the length, so
+  that path is zero-copy too.
+
+Uploaded files are never overwritten in place (the storage picks a new
+name for a new upload), so responses are cacheable for
+``MEDIA_CACHE_MAX_AGE`` seconds and marked ``immutable``.
+"""
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+CACHE_MAX_AGE = 365 * 24 * 60 * 60
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangedFile:
+    """
+    ``length`` bytes of ``file`` starting at ``start``. Keeps ``fileno()``
+    so ``sendfile()`` can still be used; servers that read instead get
+    ``read()`` calls that stop at the end of the range.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    ``(start, end)`` (inclusive) for a single-range ``Range`` header, None to
+    ignore the header, or ``False`` when the range can't be satisfied.
+    Multiple ranges are ignored and answered with the whole file.
+    """
+    match = _RANGE_RE.match(header.replace(' ', ''))
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+    first, last = match.groups()
+    if first == '':
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def file_etag(st):
+    return f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+
+def _range_applies(request, etag, mtime):
+    """``If-Range``: only send a part if the client's copy is still current."""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and int(mtime) <= since
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+        st = os.stat(fullpath)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        raise Http404("No such file")
+    if not stat.S_ISREG(st.st_mode):
+        raise Http404("No such file")
+
+    etag = file_etag(st)
+    filename = os.path.basename(fullpath)
+
+    def finish(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(st.st_mtime)
+        response['Accept-Ranges'] = 'bytes'
+        patch_cache_control(
+            response, public=True, immutable=True,
+            max_age=getattr(settings, 'MEDIA_CACHE_MAX_AGE', CACHE_MAX_AGE),
+        )
+        return response
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(st.st_mtime))
+    if not_modified is not None:
+        return finish(not_modified)
+
+    accel_prefix = getattr(settings, 'MEDIA_X_ACCEL_REDIRECT', '')
+    if accel_prefix or getattr(settings, 'MEDIA_X_SENDFILE', False):
+        content_type, encoding = mimetypes.guess_type(filename)
+        # As FileResponse does: never let the browser transparently decompress
+        response = HttpResponse(
+            content_type=content_type if content_type and not encoding else 'application/octet-stream',
+        )
+        if accel_prefix:
+            response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + quote(path.lstrip('/'))
+        else:
+            response['X-Sendfile'] = fullpath
+        return finish(response)
+
+    byte_range = None
+    if 'Range' in request.headers and _range_applies(request, etag, st.st_mtime):
+        byte_range = parse_range(request.headers['Range'], st.st_size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{st.st_size}'
+        return finish(response)
+
+    f = open(fullpath, 'rb')
+    if byte_range is None:
+        return finish(FileResponse(f, filename=filename))
+    start, end = byte_range
+    response = FileResponse(RangedFile(f, start, end - start + 1), status=206, filename=filename)
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{st.st_size}'
+    return finish(response)
@@ -0,0 +1,163 @@
+"""
+Per-request SQL accounting.
+
+``QueryRecorder`` captures every statement run on any database connection,
+groups them by shape (the SQL with literals and parameters blanked out) and
+reports shapes that repeat often enough to look like an N+1 loop.
+
+Budgets live in ``config/query_budgets.json`` (or ``settings.QUERY_BUDGET_FILE``)
+and map a URL name such as ``"activities:list"`` to the maximum number of
+queries one request may issue. ``config/tests.py`` enforces them for every
+URL (as listed by ``url_names()``); ``QueryBudgetMiddleware`` can report
+overruns in production logs.
+"""
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib import admin
+from django.db import connections
+from django.urls import NoReverseMatch, URLPattern, URLResolver, get_resolver, reverse
+
+logger = logging.getLogger('config.querybudget')
+
+DEFAULT_BUDGET_FILE = Path(__file__).resolve().parent / 'query_budgets.json'
+DEFAULT_REPEAT_THRESHOLD = 3
+# URLs that must not be requested with GET
+POST_ONLY = {'accounts:logout'}
+# Extra admin views beyond the changelists
+ADMIN_VIEWS = ['admin:index', 'admin:donation_summary']
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'(?<![\w."])-?\d+(?:\.\d+)?\b')
+_PARAM_RE = re.compile(r'%s|\?')
+_IN_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def statement_shape(sql):
+    """Normalise ``sql`` so statements differing only in values compare equal."""
+    shape = _STRING_RE.sub('?', sql)
+    shape = _NUMBER_RE.sub('?', shape)
+    shape = _PARAM_RE.sub('?', shape)
+    shape = _IN_LIST_RE.sub('(?)', shape)
+    return _SPACE_RE.sub(' ', shape).strip()
+
+
+class QueryRecorder:
+    """Execute wrapper that records ``(sql, seconds)`` for every statement."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+    @contextmanager
+    def record(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    def __len__(self):
+        return len(self.queries)
+
+    @property
+    def total_time(self):
+        return sum(duration for _, duration in self.queries)
+
+    def shapes(self):
+        return Counter(statement_shape(sql) for sql, _ in self.queries)
+
+    def repeated(self, threshold=None):
+        """Shapes issued at least ``threshold`` times: likely N+1 loops."""
+        if threshold is None:
+            threshold = getattr(settings, 'QUERY_BUDGET_REPEAT_THRESHOLD', DEFAULT_REPEAT_THRESHOLD)
+        return [(shape, count) for shape, count in self.shapes().most_common() if count >= threshold]
+
+
+def public_url_names(patterns=None, namespace=None):
+    """Every named URL in config.urls outside the admin."""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for entry in patterns:
+        if isinstance(entry, URLResolver):
+            if entry.namespace == 'admin':
+                continue
+            ns = entry.namespace or namespace
+            yield from public_url_names(entry.url_patterns, ns)
+        elif isinstance(entry, URLPattern) and entry.name:
+            yield f'{namespace}:{entry.name}' if namespace else entry.name
+
+
+def admin_url_names():
+    for model in admin.site._registry:
+        yield f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist'
+    yield from ADMIN_VIEWS
+
+
+def url_names():
+    """The URL names that need a budget: public URLs, changelists, admin views."""
+    return sorted({*public_url_names(), *admin_url_names()})
+
+
+def url_for(name, kwargs):
+    """
+    The path of URL ``name``, taking no argument or one of ``kwargs``
+    (every URL here takes at most one); None if none fits.
+    """
+    for candidate in [{}, *({key: value} for key, value in kwargs.items())]:
+        try:
+            return reverse(name, kwargs=candidate)
+        except NoReverseMatch:
+            continue
+    return None
+
+
+def load_budgets(path=None):
+    path = path or getattr(settings, 'QUERY_BUDGET_FILE', DEFAULT_BUDGET_FILE)
+    with open(path, encoding='utf-8') as f:
+        return {name: budget for name, budget in json.load(f).items() if not name.startswith('_')}
+
+
+def check_budget(url_name, recorder, budgets, threshold=None):
+    """Return a list of human-readable problems; empty if within budget."""
+    problems = []
+    budget = budgets.get(url_name)
+    if budget is not None and len(recorder) > budget:
+        problems.append(f"{url_name}: {len(recorder)} queries (budget {budget})")
+    for shape, count in recorder.repeated(threshold):
+        problems.append(f"{url_name}: possible N+1, {count}x {shape[:200]}")
+    return problems
+
+
+class QueryBudgetMiddleware:
+    """
+    Log a warning for each request that exceeds its query budget or repeats
+    a statement shape, without changing the response. Enabled by setting
+    ``QUERY_BUDGET_WARNINGS`` in the environment.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.budgets = load_budgets()
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            for problem in check_budget(match.view_name, recorder, self.budgets):
+                logger.warning(problem, extra={'path': request.path})
+        return response
@@ -0,0 +1,117 @@
+"""
+Reads from a PostgreSQL streaming replica, writes to the primary.
+
+With a ``replica`` alias in ``DATABASES`` (set ``DATABASE_REPLICA_HOST``, or
+``DATABASE_REPLICA_NAME`` for a second local database), the reads of GET
+and HEAD requests, public pages and admin reports alike, go to the
+replica. Everything else stays on the primary: writes, every query of a
+POST (registration, withdrawal, signup, admin saves), management commands
+and anything outside a request.
+
+The replica lags the primary slightly, so a client must read its own
+writes:
+
+* once a request writes, its remaining reads go to the primary too;
+* the response to a request that wrote sets ``PIN_COOKIE`` for
+  ``REPLICA_PIN_SECONDS``, and the client's requests carrying it read from
+  the primary, e.g. the dashboard right after registering;
+* views decorated with ``use_primary`` (the dashboard, withdrawal) always
+  read from the primary.
+
+Caches shared by every client must not keep what a lagging replica
+returned either: the page cache doesn't store a page whose data changed
+less than ``replica_lag_ns()`` before it was rendered, and the event feed
+total is counted on the primary.
+
+Without a replica the middleware and router change nothing.
+"""
+import contextvars
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA_DB_ALIAS = 'replica'
+PIN_COOKIE = 'pin_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class Routing:
+    """Where the current request reads from, and whether it has written."""
+
+    __slots__ = ('replica', 'wrote')
+
+    def __init__(self, replica):
+        self.replica = replica
+        self.wrote = False
+
+
+_routing = contextvars.ContextVar('database_routing', default=None)
+
+
+def has_replica():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def replica_lag_ns():
+    """
+    How far a replica read may lag the primary, in nanoseconds: as long as
+    clients that wrote are pinned to the primary. 0 without a replica.
+    """
+    return settings.REPLICA_PIN_SECONDS * 10 ** 9 if has_replica() else 0
+
+
+def use_primary(view):
+    """
+    View decorator: the rest of the request reads from the primary,
+    including lazy querysets evaluated while the template renders.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        routing = _routing.get()
+        if routing is not None:
+            routing.replica = False
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None and routing.replica:
+            return REPLICA_DB_ALIAS
+        # Explicitly, so objects read from the replica earlier in the
+        # request don't drag their related lookups there
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None:
+            routing.wrote = True
+            routing.replica = False
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same rows
+        return True
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not has_replica():
+            return self.get_response(request)
+        routing = Routing(replica=request.method in SAFE_METHODS and PIN_COOKIE not in request.COOKIES)
+        token = _routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        if routing.wrote:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                secure=request.is_secure(), httponly=True, samesite='Lax',
+            )
+        return response
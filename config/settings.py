@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from django.contrib.messages import constants as messages
 from pathlib import Path
 from dotenv import load_dotenv
+import copy
 import os
 
 load_dotenv()
@@ -32,6 +33,14 @@ DEBUG = False
 
 ALLOWED_HOSTS = ["127.0.0.1", "localhost"]
 
+# Addresses allowed to read internal status pages (/metrics,
+# /_status/db-pool/) without logging in; none unless set. These are matched
+# against REMOTE_ADDR, which behind a reverse proxy is the proxy's address
+# (often 127.0.0.1) for every visitor: then list only addresses that reach
+# the app directly, e.g. the scraper's, and have the proxy refuse these
+# paths from outside.
+INTERNAL_IPS = [ip for ip in os.getenv("INTERNAL_IPS", "").split(",") if ip]
+
 
 # Application definition
 
@@ -49,18 +58,40 @@ INSTALLED_APPS = [
     "activities.apps.ActivitiesConfig",
     "fellowship.apps.FellowshipConfig",
     "indexes.apps.IndexesConfig",
+    "imaging.apps.ImagingConfig",
+    "search.apps.SearchConfig",
+    "pagecache.apps.PageCacheConfig",
+    "assets.apps.AssetsConfig",
+    "benchmarks.apps.BenchmarksConfig",
+    "profiling.apps.ProfilingConfig",
+    "metrics.apps.MetricsConfig",
 ]
 
 MIDDLEWARE = [
+    "metrics.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "config.routers.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "profiling.middleware.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Serve STATIC_ROOT (precompressed, immutable) when no front proxy does,
+# see assets/middleware.py
+if os.getenv("SERVE_STATIC"):
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("django.middleware.security.SecurityMiddleware") + 1,
+        "assets.middleware.PrecompressedStaticMiddleware",
+    )
+
+# Log requests that exceed config/query_budgets.json or repeat a query shape
+if os.getenv("QUERY_BUDGET_WARNINGS"):
+    MIDDLEWARE.insert(0, "config.querybudget.QueryBudgetMiddleware")
+
 ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
@@ -85,6 +116,12 @@ WSGI_APPLICATION = "config.wsgi.application"
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
 
+# Each worker process keeps a pool of DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE
+# connections, checked on checkout; a request that waits DB_POOL_TIMEOUT
+# seconds for one gets a 503. DB_POOL_MAX_SIZE=0 connects per request.
+# See config/dbpool.py
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "4"))
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -92,9 +129,33 @@ DATABASES = {
         "USER": "postgres",
         "PASSWORD": "0070",
         "HOST": "localhost",
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "pool": {
+                "min_size": min(int(os.getenv("DB_POOL_MIN_SIZE", "1")), DB_POOL_MAX_SIZE),
+                "max_size": DB_POOL_MAX_SIZE,
+                "timeout": float(os.getenv("DB_POOL_TIMEOUT", "5")),
+                "max_idle": 300,
+                "max_lifetime": 1800,
+            },
+        } if DB_POOL_MAX_SIZE else {},
     }
 }
 
+# Reads of GET requests go to a streaming replica when one is configured;
+# a client that wrote reads from the primary for REPLICA_PIN_SECONDS.
+# DATABASE_REPLICA_NAME alone points at a second database on the same
+# server (e.g. for tests). See config/routers.py
+if os.getenv("DATABASE_REPLICA_HOST") or os.getenv("DATABASE_REPLICA_NAME"):
+    DATABASES["replica"] = {
+        **copy.deepcopy(DATABASES["default"]),
+        "HOST": os.getenv("DATABASE_REPLICA_HOST", DATABASES["default"]["HOST"]),
+        "PORT": os.getenv("DATABASE_REPLICA_PORT", ""),
+        "NAME": os.getenv("DATABASE_REPLICA_NAME", DATABASES["default"]["NAME"]),
+    }
+DATABASE_ROUTERS = ["config.routers.PrimaryReplicaRouter"]
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", "15"))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -133,6 +194,11 @@ USE_TZ = True
 STATIC_ROOT = os.path.join(BASE_DIR, "static")
 STATIC_URL = "static/"
 STATICFILES_DIRS = [os.path.join(BASE_DIR, "config/static")]
+# Hashed names, CSS/JS bundles and .gz/.br siblings, see assets/storage.py
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "assets.storage.AssetStorage"},
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -141,6 +207,45 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 MEDIA_URL = "/media/"
+# Let the front proxy send media files, see config/media.py. For nginx, set
+# MEDIA_X_ACCEL_REDIRECT to an `internal` location aliased to MEDIA_ROOT
+MEDIA_X_ACCEL_REDIRECT = os.getenv("MEDIA_X_ACCEL_REDIRECT", "")
+MEDIA_X_SENDFILE = bool(os.getenv("MEDIA_X_SENDFILE"))
+
+# Uploads above this size are streamed to a temporary file, not held in memory
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+# Caps for uploaded images, see imaging/uploads.py
+IMAGE_UPLOAD_MAX_BYTES = 20 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 100_000_000
+IMAGE_UPLOAD_MAX_DECODE_PIXELS = 25_000_000
+IMAGE_MAX_EDGE = 3000
+
+# One cache shared by every worker, so page cache invalidations reach them
+# all. Set REDIS_URL in production (needs the `redis` package); without it
+# each process keeps its own local-memory cache, which suits runserver.
+# The backends are Django's, counting hits and misses for /metrics.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "metrics.cache.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+            "KEY_PREFIX": "ksbc",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "metrics.cache.LocMemCache",
+            "LOCATION": "ksbc",
+            "OPTIONS": {"MAX_ENTRIES": 5000},
+        }
+    }
+# Seconds an anonymous page stays cached at most, see pagecache/cache.py;
+# 0 turns the page cache off
+PAGE_CACHE_TIMEOUT = int(os.getenv("PAGE_CACHE_TIMEOUT", "300"))
+# Request profiles kept for the admin, see profiling/middleware.py; 0 turns
+# profiling off
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "100"))
 
 MESSAGE_TAGS = {
     messages.DEBUG: "secondary",
@@ -161,3 +266,26 @@ EMAIL_HOST_PASSWORD = os.getenv("EMAIL_PASS")
 DEFAULT_FROM_EMAIL = os.getenv("EMAIL_SENT")
 
 X_FRAME_OPTIONS = "SAMEORIGIN"
+
+# Everything to stderr, where gunicorn and the process manager collect it;
+# Django's own loggers propagate here too (request errors, security)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "WARNING")
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "standard": {
+            "format": "%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s",
+        },
+    },
+    "handlers": {
+        "console": {
+            "class": "logging.StreamHandler",
+            "formatter": "standard",
+        },
+    },
+    "root": {
+        "handlers": ["console"],
+        "level": LOG_LEVEL,
+    },
+}
@@ -0,0 +1,285 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import OperationalError, connection, router
+from django.http import Http404, HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from activities.models import Donation, Event, EventParticipant
+from fellowship.models import FellowshipEvent
+from indexes.models import Ministry, Prayer
+from newsletter.models import Newsletter
+from pagecache.cache import STATUS_HEADER
+from worships.models import WorshipSermon
+
+from . import dbpool
+from .media import parse_range, serve_media
+from .routers import PIN_COOKIE, ReplicaRoutingMiddleware, has_replica
+from .querybudget import POST_ONLY, QueryRecorder, check_budget, load_budgets, statement_shape, url_for, url_names
+
+
+class QueryBudgetTests(TestCase):
+    """Every URL stays within config/query_budgets.json with no N+1 loops."""
+
+    PAGE_SIZE_ROWS = 12  # more than one page everywhere, to expose N+1 loops
+
+    @classmethod
+    def setUpClass(cls):
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media_root))
+        os.makedirs(os.path.join(media_root, 'newsletters'))
+        with open(os.path.join(media_root, 'newsletters', 'issue-0.pdf'), 'wb') as f:
+            f.write(b'%PDF-1.4')
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.now().date()
+        cls.user = User.objects.create_superuser('staff', 'staff@example.com', 'pw')
+        cls.event = None
+        for n in range(cls.PAGE_SIZE_ROWS):
+            event = Event.objects.create(
+                title=f'活動 {n}', start_date=today + timedelta(days=n), quota_left=50,
+            )
+            cls.event = cls.event or event
+            participant = EventParticipant.objects.create(
+                event=event, email='staff@example.com', user=cls.user,
+            )
+            cls.registration = getattr(cls, 'registration', participant)
+            Donation.objects.create(user=cls.user, amount=100, date=today - timedelta(days=40 * n))
+            WorshipSermon.objects.create(
+                speaker_name='陳牧師', sermon_title=f'講道 {n}',
+                youtube_link='https://youtu.be/x', sermon_date=today - timedelta(days=7 * n),
+            )
+            Ministry.objects.create(title=f'事工 {n}')
+            Prayer.objects.create(title=f'代禱 {n}', content='內容')
+            FellowshipEvent.objects.create(title=f'團契 {n}')
+            Newsletter.objects.create(
+                title=f'通訊 {n}', slug=f'issue-{n}', pdf_file=f'newsletters/issue-{n}.pdf',
+            )
+        cls.ministry = Ministry.objects.first()
+        cls.kwargs = {
+            'event_id': cls.event.event_id,
+            'registration_id': cls.registration.pk,
+            'ministry_id': cls.ministry.pk,
+            'slug': 'issue-0',
+            'path': 'newsletters/issue-0.pdf',
+        }
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.budgets = load_budgets()
+
+    def url_for(self, name):
+        url = url_for(name, self.kwargs)
+        self.assertIsNotNone(url, f"can't build a URL for {name}")
+        return url
+
+    def request(self, name):
+        recorder = QueryRecorder()
+        with recorder.record():
+            if name in POST_ONLY:
+                response = self.client.post(self.url_for(name))
+            else:
+                response = self.client.get(self.url_for(name))
+        self.assertLess(response.status_code, 400, name)
+        return recorder
+
+    def test_every_url_has_a_budget(self):
+        missing = sorted(set(url_names()) - set(self.budgets))
+        self.assertFalse(missing, f"add these URL names to query_budgets.json: {missing}")
+
+    def test_urls_stay_within_budget(self):
+        problems = []
+        for name in url_names():
+            with self.subTest(url=name):
+                problems.extend(check_budget(name, self.request(name), self.budgets))
+                self.client.force_login(self.user)
+        self.assertFalse(problems, '\n'.join(problems))
+
+    def test_statement_shape(self):
+        self.assertEqual(
+            statement_shape('SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = \'x\' LIMIT 21'),
+            statement_shape('SELECT *  FROM t WHERE id IN (%s) AND name = \'yy\' LIMIT 5'),
+        )
+
+    def test_repeated_statements_are_flagged(self):
+        recorder = QueryRecorder()
+        with recorder.record():
+            for participant in EventParticipant.objects.all():
+                participant.event.title
+        [(shape, count)] = recorder.repeated()
+        self.assertEqual(count, self.PAGE_SIZE_ROWS)
+        self.assertIn('activities_event', shape)
+
+
+class MediaServingTests(TestCase):
+    CONTENT = bytes(range(256)) * 40
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media_root))
+        os.makedirs(os.path.join(media_root, 'newsletters'))
+        with open(os.path.join(media_root, 'newsletters', '月刊.pdf'), 'wb') as f:
+            f.write(cls.CONTENT)
+        cls.url = reverse('media', kwargs={'path': 'newsletters/月刊.pdf'})
+
+    def test_full_file(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+
+    def test_conditional_get(self):
+        first = self.client.get(self.url)
+        response = self.client.get(self.url, headers={'If-None-Match': first['ETag']})
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(self.url, headers={'If-Modified-Since': first['Last-Modified']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_byte_ranges(self):
+        response = self.client.get(self.url, headers={'Range': 'bytes=100-199'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.CONTENT)}')
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT[100:200])
+
+        response = self.client.get(self.url, headers={'Range': 'bytes=-10'})
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT[-10:])
+
+        response = self.client.get(self.url, headers={'Range': f'bytes={len(self.CONTENT)}-'})
+        self.assertEqual(response.status_code, 416)
+
+        # A stale If-Range gets the whole, current file
+        response = self.client.get(self.url, headers={'Range': 'bytes=0-9', 'If-Range': '"stale"'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range('bytes=0-', 10), (0, 9))
+        self.assertEqual(parse_range('bytes=5-100', 10), (5, 9))
+        self.assertIsNone(parse_range('bytes=0-1,4-5', 10))
+        self.assertIsNone(parse_range('items=0-1', 10))
+        self.assertIs(parse_range('bytes=7-3', 10), False)
+
+    def test_offloaded_to_proxy(self):
+        with self.settings(MEDIA_X_ACCEL_REDIRECT='/protected-media/'):
+            response = self.client.get(self.url, headers={'Range': 'bytes=0-9'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/newsletters/%E6%9C%88%E5%88%8A.pdf')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+    def test_outside_media_root(self):
+        request = RequestFactory().get('/')
+        for path in ['../config/settings.py', '/etc/passwd', 'newsletters', 'missing.pdf']:
+            with self.subTest(path=path), self.assertRaises(Http404):
+                serve_media(request, path)
+
+
+class DatabasePoolTests(TestCase):
+    @unittest.skipIf(dbpool.PoolTimeout is None, "psycopg_pool is not installed")
+    def test_exhausted_pool_is_a_503(self):
+        request = RequestFactory().get('/activities/')
+        try:
+            try:
+                raise dbpool.PoolTimeout("couldn't get a connection after 5.00 sec")
+            except dbpool.PoolTimeout as e:
+                raise OperationalError(str(e)) from e
+        except OperationalError:
+            response = dbpool.server_error(request)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], str(dbpool.RETRY_AFTER))
+
+        try:
+            raise OperationalError('relation does not exist')
+        except OperationalError:
+            self.assertEqual(dbpool.server_error(request).status_code, 500)
+
+    def test_status_is_internal(self):
+        url = reverse('db_pool_status')
+        self.assertEqual(self.client.get(url).status_code, 404)
+        with self.settings(INTERNAL_IPS=['127.0.0.1']):
+            data = self.client.get(url).json()
+        self.assertEqual(data['pid'], os.getpid())
+        self.assertIn('default', data['pools'])
+
+    @unittest.skipUnless(getattr(connection, 'pool', None), "the database isn't pooled")
+    def test_stats(self):
+        Event.objects.exists()
+        stats = dbpool.pool_stats()
+        # The test's transaction holds one connection
+        self.assertEqual(stats['in_use'], 1)
+        self.assertGreaterEqual(stats['created'], 1)
+        self.assertEqual(stats['max_size'], connection.settings_dict['OPTIONS']['pool']['max_size'])
+
+
+class RoutingWithoutReplicaTests(SimpleTestCase):
+    @unittest.skipIf(has_replica(), "a replica is configured")
+    def test_everything_uses_the_primary(self):
+        def view(request):
+            self.assertEqual(router.db_for_read(Event), 'default')
+            router.db_for_write(Event)
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(view)(RequestFactory().get('/'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+
+@unittest.skipUnless(has_replica(), "set DATABASE_REPLICA_NAME to a second database to test replica routing")
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    The replica is a second database nothing replicates to, so a row written
+    to the primary is only found by requests that read from the primary.
+    """
+    databases = {'default', 'replica'} if has_replica() else {'default'}
+
+    def setUp(self):
+        self.event = Event.objects.create(title='營會', is_active=True)
+        self.url = reverse('activities:detail', args=[self.event.event_id])
+        self.user = User.objects.create_user('mary', 'mary@example.com', 'pw')
+
+    def test_reads_go_to_the_replica(self):
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        # Outside a request everything uses the primary
+        self.assertEqual(router.db_for_read(Event), 'default')
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        response = self.client.post(reverse('accounts:login'), {'username': 'mary', 'password': 'pw'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], settings.REPLICA_PIN_SECONDS)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        # Once the pin has expired
+        del self.client.cookies[PIN_COOKIE]
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    @override_settings(PAGE_CACHE_TIMEOUT=300)
+    def test_caches_are_not_filled_from_the_replica(self):
+        cache.clear()
+        # Added just now, so the replica may not have it yet
+        Event.objects.create(title='講座', is_active=True, start_date=timezone.localdate())
+        url = reverse('activities:list')
+        response = self.client.get(url)
+        self.assertEqual(response[STATUS_HEADER], 'miss')
+        self.assertEqual(response.context['paginator'].count, 1)
+        self.assertEqual(self.client.get(url)[STATUS_HEADER], 'miss')
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_dashboard_reads_the_primary(self):
+        EventParticipant.objects.create(event=self.event, email='mary@example.com')
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get(reverse('activities:dashboard')), '營會')
@@ -17,9 +17,13 @@ Including another URLconf
 
 from django.contrib import admin
 from django.urls import path, include
-from django.conf.urls.static import static
 from django.conf import settings
 
+from metrics.views import metrics
+
+from .dbpool import pool_status
+from .media import serve_media
+
 urlpatterns = [
     path("", include("indexes.urls")),
     path("activities/", include("activities.urls", namespace="activities")),
@@ -28,8 +32,14 @@ urlpatterns = [
     path("newsletter/", include("newsletter.urls", namespace="newsletter")),
     path("worships/", include("worships.urls", namespace="worships")),
     path("accounts/", include("accounts.urls", namespace="accounts")),
+    path("search/", include("search.urls", namespace="search")),
     path("admin/", admin.site.urls),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path(f"{settings.MEDIA_URL.lstrip('/')}<path:path>", serve_media, name="media"),
+    path("_status/db-pool/", pool_status, name="db_pool_status"),
+    path("metrics", metrics, name="metrics"),
+]
+
+handler500 = "config.dbpool.server_error"
 
 
 admin.site.site_header = "KSBC Administration"
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.11 on 2026-10-18 16:29
+
+import imaging.uploads
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fellowship', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='fellowshipevent',
+            name='poster',
+            field=models.ImageField(blank=True, null=True, upload_to='posters/', validators=[imaging.uploads.validate_image_upload], verbose_name='Poster'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 
+from imaging.uploads import validate_image_upload
+
 
 # Create your models here.
 class FellowshipEvent(models.Model):
@@ -11,7 +13,9 @@ class FellowshipEvent(models.Model):
         "時間", max_length=50, blank=True
     )  # e.g. 9:15–11:00 am
     location = models.CharField("地點", max_length=50, blank=True)  # e.g. 810 / Zoom
-    poster = models.ImageField("Poster", upload_to="posters/", blank=True, null=True)
+    poster = models.ImageField(
+        "Poster", upload_to="posters/", blank=True, null=True, validators=[validate_image_upload]
+    )
 
     description = models.TextField("內容/簡介", blank=True)
     is_active = models.BooleanField("上架", default=True)
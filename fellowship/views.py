@@ -1,7 +1,9 @@
 from .models import FellowshipEvent
 from django.shortcuts import render
+from pagecache.cache import cache_anonymous_page
 
 
+@cache_anonymous_page
 def fellowship_page(request):
     events = FellowshipEvent.objects.all().order_by("sort_order", "title")
     return render(request, "fellowship/fellowship.html", {"events": events})
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class ImagingConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'imaging'
+    verbose_name = "Image derivatives"
+
+    def ready(self):
+        from . import signals
+        signals.connect()
@@ -0,0 +1,213 @@
+"""
+Resized copies of uploaded images.
+
+For every source image (an ``ImageField`` file) we keep, next to it in the
+same storage:
+
+* ``_variants/<source name>/<width>.webp`` and ``<width>.jpg`` for each width
+  in ``IMAGE_VARIANT_WIDTHS`` narrower than the original (plus the original
+  width itself, capped at the largest one);
+* ``_variants/<source name>/manifest.json`` describing them, including a
+  tiny blurred JPEG placeholder as a data URI (opaque images only).
+
+Variants are made when an image is uploaded (see ``signals.py``); images
+uploaded before that are handled on first use by ``get_manifest``. Manifests
+are cached, so rendering a page costs no storage access once warm.
+"""
+import base64
+import hashlib
+import io
+import json
+import logging
+import posixpath
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from PIL import Image, ImageFilter, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+VARIANT_DIR = '_variants'
+VARIANT_WIDTHS = (320, 640, 960, 1280, 1920)
+# (file extension, Pillow format, MIME type, save options)
+VARIANT_FORMATS = (
+    ('webp', 'WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    ('jpg', 'JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+PLACEHOLDER_WIDTH = 24
+CACHE_PREFIX = 'imaging:manifest:'
+LOCK_TIMEOUT = 60
+# How long to remember that a source can't be read before trying again
+FAILURE_TIMEOUT = 60 * 60
+# EXIF orientations that rotate the image by 90 degrees
+_TRANSPOSED = {5, 6, 7, 8}
+
+
+def variant_widths():
+    return tuple(sorted(getattr(settings, 'IMAGE_VARIANT_WIDTHS', VARIANT_WIDTHS)))
+
+
+def variant_dir(name):
+    return posixpath.join(VARIANT_DIR, name)
+
+
+def variant_name(name, width, ext):
+    return posixpath.join(variant_dir(name), f'{width}.{ext}')
+
+
+def _cache_key(name):
+    # Cache keys must be short and free of spaces/control characters
+    return CACHE_PREFIX + hashlib.sha1(name.encode()).hexdigest()
+
+
+def _flatten(image):
+    """RGB copy of ``image`` with any transparency composited onto white."""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _encode(image, fmt, options):
+    buffer = io.BytesIO()
+    if fmt == 'JPEG':
+        image = _flatten(image)
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    image.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def _save(storage, name, data):
+    if storage.exists(name):
+        storage.delete(name)
+    storage.save(name, ContentFile(data))
+
+
+def _load(field_file, widest):
+    """
+    Decode the source, asking the JPEG decoder for a reduced-resolution
+    draft when the largest variant is much smaller than the original.
+    """
+    field_file.open('rb')
+    try:
+        with Image.open(field_file) as image:
+            width, height = image.size
+            if image.getexif().get(0x0112) in _TRANSPOSED:
+                width, height = height, width
+            if width > widest:
+                target = (widest, max(1, height * widest // width))
+                if image.size != (width, height):
+                    target = target[::-1]
+                image.draft('RGB', target)
+            image.load()
+            return ImageOps.exif_transpose(image), (width, height)
+    finally:
+        field_file.close()
+
+
+def generate_variants(field_file):
+    """
+    (Re)build every variant of ``field_file`` and return its manifest, or
+    None if the file is missing or not an image Pillow can read.
+    """
+    name = field_file.name
+    storage = field_file.storage
+    widths = variant_widths()
+    try:
+        image, (width, height) = _load(field_file, widths[-1])
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as e:
+        logger.warning("Can't make variants of %s: %s", name, e)
+        cache.set(_cache_key(name), False, FAILURE_TIMEOUT)
+        return None
+
+    targets = sorted({min(w, width) for w in widths})
+    variants = []
+    for target in targets:
+        size = (target, max(1, round(height * target / width)))
+        resized = image if size == image.size else image.resize(size, Image.LANCZOS, reducing_gap=3.0)
+        for ext, fmt, _, options in VARIANT_FORMATS:
+            _save(storage, variant_name(name, target, ext), _encode(resized, fmt, options))
+        variants.append({'width': size[0], 'height': size[1]})
+
+    # A blurred backdrop would show through transparent images, so those get none
+    placeholder = None
+    if not (image.mode in ('RGBA', 'LA') or 'transparency' in image.info):
+        thumb = image.copy()
+        thumb.thumbnail((PLACEHOLDER_WIDTH, PLACEHOLDER_WIDTH * 4))
+        thumb = _flatten(thumb).filter(ImageFilter.GaussianBlur(1))
+        data = base64.b64encode(_encode(thumb, 'JPEG', {'quality': 50})).decode('ascii')
+        placeholder = f'data:image/jpeg;base64,{data}'
+
+    manifest = {
+        'source': name,
+        'width': width,
+        'height': height,
+        'variants': variants,
+        'placeholder': placeholder,
+    }
+    _save(storage, posixpath.join(variant_dir(name), 'manifest.json'), json.dumps(manifest).encode())
+    cache.set(_cache_key(name), manifest, None)
+    return manifest
+
+
+def get_manifest(field_file):
+    """
+    Manifest for ``field_file``: from cache, else from storage, else built
+    now. Returns None when variants can't be had (unreadable source, or
+    another worker is building them right now).
+    """
+    if not field_file:
+        return None
+    name = field_file.name
+    key = _cache_key(name)
+    manifest = cache.get(key)
+    if manifest is not None:
+        return manifest or None
+
+    storage = field_file.storage
+    manifest_name = posixpath.join(variant_dir(name), 'manifest.json')
+    try:
+        with storage.open(manifest_name, 'rb') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = None
+    if manifest is not None and manifest.get('source') == name:
+        cache.set(key, manifest, None)
+        return manifest
+
+    # Only one worker builds a given image; the others show the original
+    lock = key + ':lock'
+    if not cache.add(lock, 1, LOCK_TIMEOUT):
+        return None
+    try:
+        return generate_variants(field_file)
+    finally:
+        cache.delete(lock)
+
+
+def delete_variants(name, storage):
+    """Remove the variants of the source file ``name``."""
+    cache.delete(_cache_key(name))
+    directory = variant_dir(name)
+    try:
+        _, files = storage.listdir(directory)
+    except OSError:
+        return
+    for filename in files:
+        storage.delete(posixpath.join(directory, filename))
+
+
+def variant_url(field_file, width, ext):
+    return field_file.storage.url(variant_name(field_file.name, width, ext))
+
+
+def closest_variant(manifest, width):
+    """The narrowest variant at least ``width`` wide, else the widest."""
+    for variant in manifest['variants']:
+        if variant['width'] >= width:
+            return variant
+    return manifest['variants'][-1]
@@ -0,0 +1,59 @@
+from django.apps import apps
+from django.db import models
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .derivatives import delete_variants, get_manifest
+from .uploads import ingest_image
+
+
+def image_fields(model):
+    return tuple(f.name for f in model._meta.concrete_fields if isinstance(f, models.ImageField))
+
+
+def ingest_uploads(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Files not yet committed to storage are fresh uploads; downscale and
+    # strip them before FileField.pre_save writes them out
+    if raw:
+        return
+    names = [name for name in image_fields(sender) if update_fields is None or name in update_fields]
+    for name in names:
+        field_file = getattr(instance, name)
+        if field_file and not field_file._committed:
+            field_file.file = ingest_image(field_file.file)
+    # The files being replaced or cleared, whose variants go once saved
+    instance._replaced_images = {}
+    if names and not instance._state.adding and instance.pk is not None:
+        stored = sender._base_manager.filter(pk=instance.pk).values(*names).first() or {}
+        instance._replaced_images = {
+            name: old for name, old in stored.items() if old and old != getattr(instance, name).name
+        }
+
+
+def make_variants(sender, instance, raw=False, **kwargs):
+    # A new upload has a name with no manifest yet, so this builds its
+    # variants; for unchanged images it is a cache hit
+    if raw:
+        return
+    for name, old in getattr(instance, '_replaced_images', {}).items():
+        delete_variants(old, getattr(instance, name).storage)
+    instance._replaced_images = {}
+    for name in image_fields(sender):
+        field_file = getattr(instance, name)
+        if field_file:
+            get_manifest(field_file)
+
+
+def remove_variants(sender, instance, **kwargs):
+    for name in image_fields(sender):
+        field_file = getattr(instance, name)
+        if field_file:
+            delete_variants(field_file.name, field_file.storage)
+
+
+def connect():
+    """Connect the handlers to the models with an ``ImageField``, and only those."""
+    for model in apps.get_models():
+        if image_fields(model):
+            pre_save.connect(ingest_uploads, sender=model)
+            post_save.connect(make_variants, sender=model)
+            post_delete.connect(remove_variants, sender=model)
@@ -0,0 +1,69 @@
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html, format_html_join
+
+from ..derivatives import VARIANT_FORMATS, closest_variant, get_manifest, variant_url
+
+register = template.Library()
+
+# Width of the variant used as the plain ``src`` fallback
+DEFAULT_SRC_WIDTH = 640
+
+
+def _srcset(image, manifest, ext):
+    return ', '.join(
+        f"{variant_url(image, v['width'], ext)} {v['width']}w" for v in manifest['variants']
+    )
+
+
+@register.simple_tag
+def responsive_image(image, sizes='100vw', alt='', loading='lazy', **attrs):
+    """
+    ``<picture>`` for an ImageField file with WebP and JPEG ``srcset``s, so
+    the browser downloads only the width it displays::
+
+        {% responsive_image event.poster sizes="250px" alt=event.title class="card-img-top" %}
+
+    Extra keyword arguments become attributes of the ``<img>``. The blurred
+    placeholder is shown as the image's background until it loads. Falls
+    back to a plain lazy ``<img>`` of the original if there are no variants.
+    """
+    if not image:
+        return ''
+    attrs.update(alt=alt, loading=loading, decoding='async')
+    manifest = get_manifest(image)
+    if manifest is None:
+        return format_html('<img src="{}"{}>', image.url, flatatt(attrs))
+
+    src = closest_variant(manifest, DEFAULT_SRC_WIDTH)
+    if manifest['placeholder']:
+        style = attrs.pop('style', '').strip()
+        if style and not style.endswith(';'):
+            style += ';'
+        attrs['style'] = (
+            f"{style} background: url({manifest['placeholder']}) center / cover no-repeat;"
+        ).strip()
+    attrs.update(width=manifest['width'], height=manifest['height'], sizes=sizes)
+    # The last format is the universal fallback used by the <img> itself
+    *sources, (fallback_ext, _, _, _) = VARIANT_FORMATS
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}"{}></picture>',
+        format_html_join(
+            '', '<source type="{}" srcset="{}" sizes="{}">',
+            ((mime, _srcset(image, manifest, ext), sizes) for ext, _, mime, _ in sources),
+        ),
+        variant_url(image, src['width'], fallback_ext),
+        _srcset(image, manifest, fallback_ext),
+        flatatt(attrs),
+    )
+
+
+@register.simple_tag
+def image_url(image, width, ext='jpg'):
+    """URL of the variant of ``image`` closest to ``width``; the original if none."""
+    if not image:
+        return ''
+    manifest = get_manifest(image)
+    if manifest is None:
+        return image.url
+    return variant_url(image, closest_variant(manifest, int(width))['width'], ext)
@@ -0,0 +1,229 @@
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import date
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from activities.models import Event
+from indexes.models import Ministry
+from worships.models import WorshipSermon
+
+from . import signals
+from .derivatives import get_manifest, variant_dir
+from .uploads import ingest_image, validate_image_upload
+
+
+def jpeg(width, height, **save_options):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 30, 30)).save(buffer, 'JPEG', **save_options)
+    return SimpleUploadedFile('poster.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+
+def mpo(width, height):
+    """A camera's JPEG with a second frame (e.g. a depth map) appended."""
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 30, 30)).save(
+        buffer, 'MPO', save_all=True, append_images=[Image.new('RGB', (width, height))],
+    )
+    return SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+
+def png(width, height):
+    buffer = io.BytesIO()
+    Image.new('L', (width, height)).save(buffer, 'PNG')
+    return SimpleUploadedFile('poster.png', buffer.getvalue(), content_type='image/png')
+
+
+# Run in a fresh interpreter so ru_maxrss reflects this upload alone
+RSS_SCRIPT = '''
+import json, resource, sys
+import django
+from django.conf import settings
+settings.configure()
+django.setup()
+from django.core.files import File
+from imaging.uploads import ingest_image
+
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+with open(sys.argv[1], "rb") as f:
+    out = ingest_image(File(f, name="photo.jpg"))
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"peak_kb": after - before, "size": out.size}))
+'''
+
+
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root, IMAGE_VARIANT_WIDTHS=(320, 640, 1920))
+        settings.enable()
+        self.addCleanup(settings.disable)
+        cache.clear()
+
+    def variant_files(self, field_file):
+        return sorted(os.listdir(os.path.join(self.media_root, variant_dir(field_file.name))))
+
+    def test_variants_are_made_on_upload(self):
+        event = Event.objects.create(title='營會', poster=jpeg(1000, 500))
+        self.assertEqual(
+            self.variant_files(event.poster),
+            ['1000.jpg', '1000.webp', '320.jpg', '320.webp', '640.jpg', '640.webp', 'manifest.json'],
+        )
+        manifest = get_manifest(event.poster)
+        self.assertEqual([v['height'] for v in manifest['variants']], [160, 320, 500])
+        self.assertTrue(manifest['placeholder'].startswith('data:image/jpeg;base64,'))
+        with Image.open(os.path.join(self.media_root, variant_dir(event.poster.name), '320.webp')) as im:
+            self.assertEqual((im.format, im.size), ('WEBP', (320, 160)))
+
+    def test_exif_rotation_is_applied(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # rotated 90 degrees clockwise
+        event = Event.objects.create(title='營會', poster=jpeg(800, 400, exif=exif))
+        self.assertEqual(get_manifest(event.poster)['variants'][-1], {'width': 400, 'height': 800})
+
+    def test_existing_images_get_variants_on_first_render(self):
+        Ministry.objects.bulk_create([Ministry(title='事工', image=jpeg(700, 350))])
+        ministry = Ministry.objects.get()
+        ministry.image.save('ministry.jpg', jpeg(700, 350), save=False)
+        html = Template(
+            '{% load images %}{% responsive_image m.image sizes="50vw" alt=m.title class="img-fluid" %}'
+        ).render(Context({'m': ministry}))
+        self.assertIn('<source type="image/webp" srcset="/media/_variants/', html)
+        self.assertIn('320w', html)
+        self.assertIn('loading="lazy"', html)
+        self.assertIn('sizes="50vw"', html)
+        self.assertIn('class="img-fluid"', html)
+        self.assertIn('.jpg 700w', html)
+        self.assertEqual(len(self.variant_files(ministry.image)), 7)
+
+    def test_unreadable_image_falls_back_to_original(self):
+        # Stored before uploads were checked
+        name = default_storage.save('ministries/broken.jpg', ContentFile(b'not an image'))
+        Ministry.objects.bulk_create([Ministry(title='事工', image=name)])
+        ministry = Ministry.objects.get()
+        with self.assertLogs('imaging.derivatives', 'WARNING'):
+            html = Template('{% load images %}{% responsive_image m.image %}').render(
+                Context({'m': ministry})
+            )
+        self.assertEqual(html, f'<img src="{ministry.image.url}" alt="" decoding="async" loading="lazy">')
+
+    def test_variants_are_removed_with_the_row(self):
+        event = Event.objects.create(title='營會', poster=jpeg(400, 400))
+        directory = os.path.join(self.media_root, variant_dir(event.poster.name))
+        event.delete()
+        self.assertEqual(os.listdir(directory), [])
+
+    def test_replaced_images_lose_their_variants(self):
+        event = Event.objects.create(title='營會', poster=jpeg(400, 400))
+        old = os.path.join(self.media_root, variant_dir(event.poster.name))
+        event.title = '退修會'
+        event.save()
+        self.assertTrue(os.listdir(old))
+
+        event.poster = jpeg(500, 500)
+        event.save()
+        self.assertEqual(os.listdir(old), [])
+        self.assertEqual(len(self.variant_files(event.poster)), 5)
+
+        current = os.path.join(self.media_root, variant_dir(event.poster.name))
+        event.poster = None
+        event.save()
+        self.assertEqual(os.listdir(current), [])
+
+    def test_only_models_with_images_are_watched(self):
+        with mock.patch('imaging.signals.image_fields', wraps=signals.image_fields) as fields:
+            WorshipSermon.objects.create(
+                sermon_title='講道', speaker_name='陳牧師', youtube_link='https://youtu.be/x', sermon_date=date(2025, 1, 5),
+            )
+            fields.assert_not_called()
+            Event.objects.create(title='營會')
+            fields.assert_called_with(Event)
+
+
+@override_settings(IMAGE_MAX_EDGE=1000, IMAGE_UPLOAD_MAX_PIXELS=50_000_000, IMAGE_UPLOAD_MAX_DECODE_PIXELS=4_000_000)
+class ImageIngestionTests(TestCase):
+    def test_small_clean_images_are_kept_as_uploaded(self):
+        upload = jpeg(800, 600)
+        self.assertIs(ingest_image(upload), upload)
+
+    def test_oversized_images_are_downscaled_and_stripped(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x010F] = 'PhoneMaker'
+        out = ingest_image(jpeg(4000, 2000, exif=exif))
+        with Image.open(out) as image:
+            self.assertEqual(image.size, (500, 1000))
+            self.assertNotIn('exif', image.info)
+
+    def test_metadata_is_stripped_even_when_small(self):
+        exif = Image.Exif()
+        exif[0x8825] = {1: 'N'}  # GPS
+        out = ingest_image(jpeg(300, 200, exif=exif))
+        with Image.open(out) as image:
+            self.assertEqual(dict(image.getexif()), {})
+
+    def test_mpo_is_handled_as_its_first_frame(self):
+        out = ingest_image(mpo(4000, 2000))
+        with Image.open(out) as image:
+            self.assertEqual((image.format, image.size), ('JPEG', (1000, 500)))
+            # The red picture, not the black depth map
+            self.assertGreater(image.getpixel((0, 0))[0], 150)
+        # Decoded at a reduced scale like any JPEG, so within the decode cap
+        validate_image_upload(mpo(4000, 3000))
+
+    def test_caps(self):
+        with self.assertRaises(ValidationError) as cm:
+            validate_image_upload(SimpleUploadedFile('x.jpg', b'not an image'))
+        self.assertEqual(cm.exception.code, 'invalid_image')
+        with self.settings(IMAGE_UPLOAD_MAX_BYTES=100):
+            with self.assertRaises(ValidationError) as cm:
+                validate_image_upload(jpeg(300, 200))
+            self.assertEqual(cm.exception.code, 'image_too_large')
+        # A JPEG can be decoded at 1/8 scale, a PNG can't
+        validate_image_upload(jpeg(4000, 3000))
+        with self.assertRaises(ValidationError) as cm:
+            validate_image_upload(png(4000, 3000))
+        self.assertEqual(cm.exception.code, 'image_too_many_pixels')
+        with self.assertRaises(ValidationError):
+            validate_image_upload(png(10_000, 6_000))
+
+    def test_admin_reports_oversized_upload(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        response = self.client.post(reverse('admin:activities_event_add'), {
+            'title': '營會', 'fee_amount': '0', 'fee_currency': 'HKD', 'quota_left': '0',
+            'poster': png(4000, 3000),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Event.objects.exists())
+        self.assertContains(response, 'too large to process')
+
+    def test_peak_memory_is_bounded(self):
+        # 6000 x 4000 decodes to 72 MB of RGB (about 160 MB peak with a plain
+        # Image.open().load()); the 1/2 scale draft to 18 MB
+        fd, path = tempfile.mkstemp(suffix='.jpg')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        Image.new('RGB', (6000, 4000), (10, 120, 200)).save(path, 'JPEG')
+        result = subprocess.run(
+            [sys.executable, '-c', RSS_SCRIPT, path],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        )
+        stats = json.loads(result.stdout)
+        self.assertLess(stats['peak_kb'], 32 * 1024, stats)
@@ -0,0 +1,160 @@
+"""
+Ingestion of uploaded images.
+
+Uploads larger than ``FILE_UPLOAD_MAX_MEMORY_SIZE`` are streamed to a
+temporary file by Django, so the raw bytes never sit in worker memory. From
+there every check works on the image *header* only:
+
+* ``validate_image_upload`` (a model field validator, so the admin shows its
+  errors) rejects files over ``IMAGE_UPLOAD_MAX_BYTES``, images declaring
+  more than ``IMAGE_UPLOAD_MAX_PIXELS`` pixels, and images that would still
+  need more than ``IMAGE_UPLOAD_MAX_DECODE_PIXELS`` once reduced-resolution
+  decoding is taken into account;
+* ``ingest_image`` (run from ``pre_save``, see ``signals.py``) downscales
+  originals to ``IMAGE_MAX_EDGE`` pixels, asking the JPEG decoder for a
+  1/2, 1/4 or 1/8 scale draft instead of decoding at full size, and strips
+  EXIF/XMP metadata (camera serials, GPS positions) on the way.
+
+Peak memory per upload is therefore bounded by the decode cap rather than
+by whatever resolution the camera produced.
+"""
+import tempfile
+import warnings
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.utils.text import get_valid_filename
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+MAX_BYTES = 20 * 1024 * 1024
+MAX_PIXELS = 100_000_000
+# 25 MP is about 75 MB decoded as RGB
+MAX_DECODE_PIXELS = 25_000_000
+MAX_EDGE = 3000
+# Metadata that may identify a person or place and is never needed to display
+STRIPPED_METADATA = ('exif', 'xmp', 'comment')
+# image.info entries carried over when re-encoding
+KEPT_INFO = ('icc_profile', 'transparency', 'dpi')
+SAVE_OPTIONS = {
+    # No 'optimize': it buffers the whole encoded image to build Huffman tables
+    'JPEG': {'quality': 88},
+    'WEBP': {'quality': 88},
+    'PNG': {'optimize': False},
+}
+
+
+def _limit(name):
+    return getattr(settings, f'IMAGE_{name}', globals()[name.removeprefix('UPLOAD_')])
+
+
+def _open(file):
+    """Open ``file`` reading only its header; nothing is decoded yet."""
+    file.seek(0)
+    try:
+        with warnings.catch_warnings():
+            # The pixel cap is enforced below with a proper error message
+            warnings.simplefilter('ignore', Image.DecompressionBombWarning)
+            return Image.open(file)
+    except Image.DecompressionBombError:
+        raise ValidationError("This image has too many pixels.", code='image_too_many_pixels')
+    except (UnidentifiedImageError, OSError):
+        raise ValidationError("Upload a valid image.", code='invalid_image')
+
+
+def _format(image):
+    """
+    The format ``image`` is handled and re-encoded as. An MPO (what many
+    cameras save: a JPEG followed by extra frames such as a depth map or a
+    preview) is its first frame, a JPEG.
+    """
+    return 'JPEG' if image.format == 'MPO' else image.format
+
+
+def _draft(image, max_edge):
+    """
+    Let JPEG decode at the smallest 1/2^n scale that is still at least
+    ``max_edge`` on its long side (whichever way up the EXIF orientation
+    says it goes); other formats are decoded at full size.
+    Only changes the decoder setup, so ``image.size`` becomes the size that
+    will actually be allocated.
+    """
+    width, height = image.size
+    if _format(image) == 'JPEG' and max(width, height) > max_edge:
+        scale = max_edge / max(width, height)
+        image.draft(image.mode, (max(1, round(width * scale)), max(1, round(height * scale))))
+    return image.size
+
+
+def _needs_rewrite(image, max_edge):
+    if image.format == 'MPO':
+        # Keep only the picture itself
+        return True
+    if getattr(image, 'is_animated', False):
+        # Re-encoding would drop the animation
+        return False
+    return max(image.size) > max_edge or any(key in image.info for key in STRIPPED_METADATA)
+
+
+def validate_image_upload(value):
+    """Reject uploads over the byte and pixel caps before anything is decoded."""
+    if getattr(value, '_committed', False):
+        # Already stored; it was checked when it was uploaded
+        return
+    max_bytes = _limit('UPLOAD_MAX_BYTES')
+    if value.size > max_bytes:
+        raise ValidationError(
+            "Images may be at most %(limit)d MB; this one is %(size).1f MB.",
+            code='image_too_large',
+            params={'limit': max_bytes // (1024 * 1024), 'size': value.size / (1024 * 1024)},
+        )
+    image = _open(value)
+    try:
+        width, height = image.size
+        max_pixels = _limit('UPLOAD_MAX_PIXELS')
+        if width * height > max_pixels:
+            raise ValidationError(
+                "Images may be at most %(limit)d megapixels; this one is %(width)d × %(height)d.",
+                code='image_too_many_pixels',
+                params={'limit': max_pixels // 1_000_000, 'width': width, 'height': height},
+            )
+        width, height = _draft(image, _limit('MAX_EDGE'))
+        if width * height > _limit('UPLOAD_MAX_DECODE_PIXELS'):
+            raise ValidationError(
+                "This %(format)s image is too large to process; save it as a JPEG or at a "
+                "smaller size and upload it again.",
+                code='image_too_many_pixels',
+                params={'format': image.format},
+            )
+    finally:
+        # Not image.close(): that would close the upload's file too
+        value.seek(0)
+
+
+def ingest_image(file):
+    """
+    Return ``file``, or a downscaled, metadata-free re-encoding of it when
+    it is larger than ``IMAGE_MAX_EDGE`` or carries EXIF/XMP data. Runs the
+    same checks as ``validate_image_upload`` first.
+    """
+    validate_image_upload(file)
+    max_edge = _limit('MAX_EDGE')
+    source = _open(file)
+    if not _needs_rewrite(source, max_edge):
+        file.seek(0)
+        return file
+    fmt = _format(source)
+    _draft(source, max_edge)
+    source.load()
+    kept = {key: source.info[key] for key in KEPT_INFO if key in source.info}
+    image = source
+    ImageOps.exif_transpose(image, in_place=True)
+    image.thumbnail((max_edge, max_edge), Image.LANCZOS, reducing_gap=3.0)
+    image.info = kept
+
+    name = get_valid_filename(file.name.rsplit('/', 1)[-1])
+    # Anonymous temporary file: on disk, and gone once closed
+    out = File(tempfile.TemporaryFile(suffix='.upload'), name=name)
+    image.save(out, fmt, **kept, **SAVE_OPTIONS.get(fmt, {}))
+    out.seek(0)
+    return out
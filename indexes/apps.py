@@ -6,3 +6,6 @@ class IndexesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "indexes"
     verbose_name = "HomePage Mgt"  # 在后台显示的中文名
+
+    def ready(self):
+        from . import signals  # noqa: F401
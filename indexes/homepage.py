@@ -0,0 +1,100 @@
+"""
+Materialised homepage data.
+
+The homepage changes a few times a week, when a ``Ministry``, ``Prayer`` or
+``Event`` is edited, yet every hit used to query all three tables (with no
+limit on prayers). ``homepage_snapshot()`` returns the complete data set as
+one cached object that every worker can serve without touching the
+database. ``signals.py`` drops it as soon as one of those models changes and
+rebuilds it once the change is committed.
+
+Events are listed from today on, so the snapshot also expires by itself at
+the start of the day after the first listed event, when that event drops
+off the list; and at most a day after it was built.
+
+Prayers are shown ``PRAYERS_PER_PAGE`` at a time. Further pages come from
+``prayer_page()`` with a cursor on the prayer sort order.
+"""
+from datetime import date, datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from activities.models import Event
+from activities.pagination import decode_cursor_parts
+
+from .models import Ministry, Prayer
+
+SNAPSHOT_KEY = 'indexes:homepage'
+SNAPSHOT_MAX_AGE = 24 * 60 * 60
+MINISTRY_COUNT = 5
+EVENT_COUNT = 3
+PRAYERS_PER_PAGE = 10
+
+
+def prayer_cursor(prayer):
+    """Opaque position of ``prayer`` in the ``-is_urgent, -display_date, -id`` order."""
+    return f"{int(prayer.is_urgent)}.{prayer.display_date.toordinal()}.{prayer.pk}"
+
+
+def _prayers_from(token, inclusive):
+    urgent, day, pk = decode_cursor_parts(token, bool, date.fromordinal, int)
+    return (
+        Q(is_urgent__lt=urgent)
+        | Q(is_urgent=urgent, display_date__lt=day)
+        | Q(is_urgent=urgent, display_date=day, **{'id__lte' if inclusive else 'id__lt': pk})
+    )
+
+
+def prayer_page(after=None, start=None, per_page=PRAYERS_PER_PAGE):
+    """
+    Up to ``per_page`` active prayers following the ``after`` cursor, or
+    beginning at the ``start`` cursor, and the cursor for the next page (None
+    on the last). Raises ValueError on a malformed cursor.
+    """
+    prayers = Prayer.objects.filter(is_active=True).order_by('-is_urgent', '-display_date', '-id')
+    if start:
+        prayers = prayers.filter(_prayers_from(start, inclusive=True))
+    elif after:
+        prayers = prayers.filter(_prayers_from(after, inclusive=False))
+    rows = list(prayers[:per_page + 1])
+    next_cursor = prayer_cursor(rows[per_page - 1]) if len(rows) > per_page else None
+    return rows[:per_page], next_cursor
+
+
+def _seconds_until(day):
+    moment = timezone.make_aware(datetime.combine(day, time.min))
+    return (moment - timezone.now()).total_seconds()
+
+
+def build_snapshot():
+    today = timezone.localdate()
+    prayers, next_prayers = prayer_page()
+    snapshot = {
+        'recent_ministries': list(
+            Ministry.objects.filter(is_active=True).order_by('-activity_date')[:MINISTRY_COUNT]
+        ),
+        'recent_prayers': prayers,
+        'next_prayers': next_prayers,
+        'events': list(
+            Event.objects.filter(is_active=True, start_date__gte=today).order_by('start_date')[:EVENT_COUNT]
+        ),
+    }
+    timeout = SNAPSHOT_MAX_AGE
+    if snapshot['events']:
+        expires = _seconds_until(snapshot['events'][0].start_date + timedelta(days=1))
+        timeout = max(1, min(timeout, int(expires)))
+    cache.set(SNAPSHOT_KEY, snapshot, timeout)
+    return snapshot
+
+
+def homepage_snapshot():
+    snapshot = cache.get(SNAPSHOT_KEY)
+    if snapshot is None:
+        snapshot = build_snapshot()
+    return snapshot
+
+
+def drop_snapshot():
+    cache.delete(SNAPSHOT_KEY)
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.11 on 2026-10-18 16:29
+
+import django.core.validators
+import imaging.uploads
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('indexes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ministry',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to='ministries/%Y/%m/', validators=[django.core.validators.FileExtensionValidator(['jpg', 'jpeg', 'png', 'gif']), imaging.uploads.validate_image_upload], verbose_name='圖片'),
+        ),
+    ]
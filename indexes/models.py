@@ -3,6 +3,8 @@ from django.db import models
 from django.utils import timezone
 from django.core.validators import FileExtensionValidator
 
+from imaging.uploads import validate_image_upload
+
 
 class Ministry(models.Model):
     """事工動態"""
@@ -16,7 +18,7 @@ class Ministry(models.Model):
         upload_to="ministries/%Y/%m/",
         blank=True,
         null=True,
-        validators=[FileExtensionValidator(["jpg", "jpeg", "png", "gif"])],
+        validators=[FileExtensionValidator(["jpg", "jpeg", "png", "gif"]), validate_image_upload],
     )
     is_active = models.BooleanField("是否顯示", default=True)
     display_order = models.IntegerField("顯示順序", default=0)
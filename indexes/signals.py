@@ -0,0 +1,21 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from activities.models import Event
+
+from .homepage import drop_snapshot, homepage_snapshot
+from .models import Ministry, Prayer
+
+
+@receiver(post_save, sender=Ministry)
+@receiver(post_save, sender=Prayer)
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Ministry)
+@receiver(post_delete, sender=Prayer)
+@receiver(post_delete, sender=Event)
+def homepage_changed(sender, using, **kwargs):
+    drop_snapshot()
+    # Rebuilt once committed, so the next visitor doesn't pay for it; only
+    # the first of several changes in one transaction actually builds it
+    transaction.on_commit(homepage_snapshot, using=using, robust=True)
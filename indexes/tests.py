@@ -1,3 +1,80 @@
-from django.test import TestCase
+from datetime import date, datetime, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from activities.models import Event
+
+from .homepage import PRAYERS_PER_PAGE, SNAPSHOT_MAX_AGE, build_snapshot, homepage_snapshot, prayer_cursor, prayer_page
+from .models import Prayer
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class HomepageSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Prayer.objects.bulk_create([
+            Prayer(title=f'代禱 {n}', content='內容', display_date=date(2025, 1, 1) + timedelta(days=n))
+            for n in range(25)
+        ])
+
+    def test_served_without_queries(self):
+        homepage_snapshot()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('indexes:home'))
+        self.assertContains(response, '代禱 24')
+        self.assertEqual(len(response.context['recent_prayers']), PRAYERS_PER_PAGE)
+
+    def test_rebuilt_when_content_changes(self):
+        homepage_snapshot()
+        with self.captureOnCommitCallbacks(execute=True):
+            Prayer.objects.create(title='緊急代禱', content='內容', is_urgent=True)
+        with self.assertNumQueries(0):
+            snapshot = homepage_snapshot()
+        self.assertEqual(snapshot['recent_prayers'][0].title, '緊急代禱')
+
+    def test_expires_when_the_first_event_passes(self):
+        today = timezone.localdate()
+        Event.objects.create(title='營會', start_date=today)
+        Event.objects.create(title='退修會', start_date=today + timedelta(days=3))
+        with mock.patch('indexes.homepage.cache.set') as cache_set:
+            build_snapshot()
+        # Until tonight's midnight, when today's event drops off the list
+        tonight = timezone.make_aware(datetime.combine(today + timedelta(days=1), time.min))
+        self.assertAlmostEqual(cache_set.call_args.args[2], (tonight - timezone.now()).total_seconds(), delta=5)
+        Event.objects.all().delete()
+        with mock.patch('indexes.homepage.cache.set') as cache_set:
+            build_snapshot()
+        self.assertEqual(cache_set.call_args.args[2], SNAPSHOT_MAX_AGE)
+
+    def test_prayer_pages(self):
+        Prayer.objects.filter(title='代禱 3').update(is_urgent=True)
+        seen = []
+        cursor = None
+        while True:
+            prayers, cursor = prayer_page(after=cursor)
+            seen += [p.title for p in prayers]
+            if not cursor:
+                break
+        self.assertEqual(seen[:3], ['代禱 3', '代禱 24', '代禱 23'])
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+
+    def test_prayer_list_view(self):
+        first = self.client.get(reverse('indexes:home'))
+        next_cursor = first.context['next_prayers']
+        response = self.client.get(reverse('indexes:prayers'), {'after': next_cursor, 'partial': 1})
+        self.assertNotContains(response, '<html')
+        self.assertContains(response, '代禱 14')
+        self.assertNotContains(response, '代禱 15')
+
+        # Where search results for a prayer point to
+        prayer = Prayer.objects.get(title='代禱 5')
+        response = self.client.get(reverse('indexes:prayers'), {'start': prayer_cursor(prayer)})
+        self.assertContains(response, '<html')
+        self.assertEqual(response.context['recent_prayers'][0], prayer)
+        for cursor in ('x', '1.2', '1.0.1', f'1.{10 ** 20}.1'):
+            self.assertEqual(self.client.get(reverse('indexes:prayers'), {'after': cursor}).status_code, 404, cursor)
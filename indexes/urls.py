@@ -6,5 +6,6 @@ app_name = "indexes"
 
 urlpatterns = [
     path("", views.home_page, name="home"),  # 首页
+    path("prayers/", views.prayer_list, name="prayers"),
     path("ministry/<int:ministry_id>/", views.ministry_details, name="ministry"),
 ]
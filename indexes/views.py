@@ -1,40 +1,44 @@
 # indexes/views.py - 簡化版
+from django.http import Http404
 from django.shortcuts import render, get_object_or_404
-from django.utils import timezone
 from .models import Ministry, Prayer  # 只導入這兩個！
 from activities.models import Event
+from pagecache.cache import cache_anonymous_page
+from .homepage import homepage_snapshot, prayer_page
 
 
+@cache_anonymous_page(tags=(Ministry, Prayer, Event))
 def home_page(request):
     """
     簡化版首頁 - 只顯示事工動態和代禱事項
+    資料來自 homepage.homepage_snapshot()，平時不需查詢資料庫
     """
-    # 1. 獲取事工動態
-    recent_ministries = Ministry.objects.filter(is_active=True).order_by(
-        "-activity_date"
-    )[:5]
-
-    # 2. 獲取代禱事項
-    recent_prayers = Prayer.objects.filter(is_active=True).order_by(
-        "-is_urgent", "-display_date"
-    )[:]
-
-    # 3. 獲取即將到來的活動（可選）
-    today = timezone.now().date()
-    events = Event.objects.filter(is_active=True, start_date__gte=today).order_by(
-        "start_date"
-    )[:3]
-
     context = {
-        "recent_ministries": recent_ministries,
-        "recent_prayers": recent_prayers,
-        "events": events,  # 可選，如果您還想顯示活動
+        **homepage_snapshot(),
         "page_title": "嘉盛浸信會",
     }
 
     return render(request, "indexes/home.html", context)
 
 
+@cache_anonymous_page
+def prayer_list(request):
+    """
+    代禱事項 - 分頁（?after= 下一頁，?start= 由某項開始）
+    ?partial=1 只回傳列表片段，供首頁「載入更多」使用
+    """
+    try:
+        prayers, next_cursor = prayer_page(
+            after=request.GET.get("after"), start=request.GET.get("start")
+        )
+    except ValueError:
+        raise Http404("Invalid cursor")
+    context = {"recent_prayers": prayers, "next_prayers": next_cursor}
+    if request.GET.get("partial"):
+        return render(request, "indexes/_prayers.html", context)
+    return render(request, "indexes/prayers.html", context)
+
+
 def test(request):
     return render(request, "indexes/test.html")
 
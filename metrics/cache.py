@@ -0,0 +1,53 @@
+"""
+Cache backends that count hits and misses for ``/metrics``.
+
+Use ``metrics.cache.RedisCache`` or ``metrics.cache.LocMemCache`` as the
+``BACKEND`` in ``settings.CACHES``; they behave exactly like Django's. Each
+key looked up by ``get`` or ``get_many`` (and so ``get_or_set``) counts as
+a hit or a miss.
+"""
+from django.core.cache.backends import locmem, redis
+
+from .instruments import CACHE_LOOKUPS
+
+_MISSING = object()
+
+
+class CacheMetricsMixin:
+    metrics_label = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._hits = CACHE_LOOKUPS.labels(self.metrics_label, 'hit')
+        self._misses = CACHE_LOOKUPS.labels(self.metrics_label, 'miss')
+        # Backends without a get_many of their own call get for each key
+        self._counting = True
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            if self._counting:
+                self._misses.inc()
+            return default
+        if self._counting:
+            self._hits.inc()
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        self._counting = False
+        try:
+            found = super().get_many(keys, version)
+        finally:
+            self._counting = True
+        self._hits.inc(len(found))
+        self._misses.inc(len(keys) - len(found))
+        return found
+
+
+class RedisCache(CacheMetricsMixin, redis.RedisCache):
+    metrics_label = 'redis'
+
+
+class LocMemCache(CacheMetricsMixin, locmem.LocMemCache):
+    metrics_label = 'locmem'
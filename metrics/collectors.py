@@ -0,0 +1,48 @@
+"""
+Gauges read from the database when ``/metrics`` is scraped.
+
+They describe shared state rather than one worker's traffic, so they are
+computed once per scrape by the process serving it, never summed across
+workers.
+"""
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+from prometheus_client.core import GaugeMetricFamily
+
+from activities.models import Event, OutboundEmail
+
+
+def open_events():
+    """Active events with a quota that still take registrations."""
+    today = timezone.localdate()
+    return Event.objects.filter(
+        Q(appl_deadline__isnull=True) | Q(appl_deadline__gte=today),
+        is_active=True, is_announcement=False, unlimited_quota=False,
+    )
+
+
+class DomainCollector:
+    def collect(self):
+        quota = GaugeMetricFamily(
+            'ksbc_event_quota_left', "Places left in each open event with a quota.", labels=['event_id'],
+        )
+        for event_id, quota_left in open_events().values_list('event_id', 'quota_left'):
+            quota.add_metric([str(event_id)], quota_left)
+        yield quota
+
+        emails = OutboundEmail.objects.aggregate(
+            pending=Count('pk', filter=Q(status=OutboundEmail.STATUS_PENDING)),
+            due=Count('pk', filter=Q(status=OutboundEmail.STATUS_PENDING, next_attempt_at__lte=timezone.now())),
+            failed=Count('pk', filter=Q(status=OutboundEmail.STATUS_FAILED)),
+            oldest_pending=Min('created_at', filter=Q(status=OutboundEmail.STATUS_PENDING)),
+        )
+        backlog = GaugeMetricFamily('ksbc_outbox_emails', "Outbox emails not sent.", labels=['state'])
+        for state in ('pending', 'due', 'failed'):
+            backlog.add_metric([state], emails[state])
+        yield backlog
+        age = 0
+        if emails['oldest_pending']:
+            age = (timezone.now() - emails['oldest_pending']).total_seconds()
+        yield GaugeMetricFamily(
+            'ksbc_outbox_oldest_pending_age_seconds', "Age of the oldest pending outbox email.", value=age,
+        )
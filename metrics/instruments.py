@@ -0,0 +1,41 @@
+"""
+The process's Prometheus metrics.
+
+Under gunicorn, set ``PROMETHEUS_MULTIPROC_DIR`` to an empty directory
+before the server starts (``config/gunicorn.py`` empties it and cleans up
+after dead workers): each worker then writes its samples to files there
+and ``/metrics`` adds them up across workers, whichever one serves the
+scrape. Without it (runserver, tests) the samples live in this process.
+"""
+from prometheus_client import Counter, Histogram
+
+# Seconds; a page served from the page cache takes a few ms, the admin
+# reports up to a second or two
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+QUERY_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+REQUEST_LATENCY = Histogram(
+    'django_request_duration_seconds', "Time to build the response, by URL name.",
+    ['view', 'method'], buckets=LATENCY_BUCKETS,
+)
+RESPONSES = Counter(
+    'django_responses', "Responses by URL name and status code.",
+    ['view', 'method', 'status'],
+)
+REQUEST_QUERIES = Histogram(
+    'django_request_db_queries', "SQL statements per request, by URL name.",
+    ['view'], buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_QUERY_TIME = Histogram(
+    'django_request_db_query_duration_seconds', "Time spent in SQL per request, by URL name.",
+    ['view'], buckets=QUERY_TIME_BUCKETS,
+)
+PAGE_CACHE = Counter(
+    'django_page_cache_requests', "Anonymous page cache lookups by URL name and result.",
+    ['view', 'result'],
+)
+CACHE_LOOKUPS = Counter(
+    'django_cache_lookups', "Keys read from the cache, by result.",
+    ['cache', 'result'],
+)
@@ -0,0 +1,38 @@
+import time
+
+from config.querybudget import QueryRecorder
+from pagecache.cache import STATUS_HEADER
+
+from .instruments import PAGE_CACHE, REQUEST_LATENCY, REQUEST_QUERIES, REQUEST_QUERY_TIME, RESPONSES
+
+# Requests that matched no URL pattern share one label, so stray paths
+# can't create new series
+UNRESOLVED = '<unresolved>'
+# Likewise for methods: any other is counted as OTHER_METHOD
+METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'TRACE', 'CONNECT'})
+OTHER_METHOD = 'other'
+
+
+class MetricsMiddleware:
+    """Record latency, status, SQL and page cache use of every request by URL name."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with recorder.record():
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match and match.view_name else UNRESOLVED
+        method = request.method if request.method in METHODS else OTHER_METHOD
+        REQUEST_LATENCY.labels(view, method).observe(duration)
+        RESPONSES.labels(view, method, str(response.status_code)).inc()
+        REQUEST_QUERIES.labels(view).observe(len(recorder))
+        REQUEST_QUERY_TIME.labels(view).observe(recorder.total_time)
+        if response.has_header(STATUS_HEADER):
+            PAGE_CACHE.labels(view, response[STATUS_HEADER]).inc()
+        return response
@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from prometheus_client import REGISTRY
+
+from activities.models import Event, OutboundEmail
+
+from .cache import LocMemCache
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.localdate()
+        cls.event = Event.objects.create(title='退修會', start_date=today + timedelta(days=30), quota_left=7)
+        Event.objects.create(title='已截止', appl_deadline=today - timedelta(days=1), quota_left=3)
+        Event.objects.create(title='講座', unlimited_quota=True)
+        OutboundEmail.objects.create(to_email='a@example.com', subject='s', body_text='b')
+        OutboundEmail.objects.create(
+            to_email='b@example.com', subject='s', body_text='b',
+            next_attempt_at=timezone.now() + timedelta(hours=1),
+        )
+
+    def test_requests_are_recorded_by_url_name(self):
+        labels = {'view': 'activities:detail', 'method': 'GET'}
+        count = sample('django_request_duration_seconds_count', **labels)
+        ok = sample('django_responses_total', status='200', **labels)
+        queries = sample('django_request_db_queries_sum', view='activities:detail')
+        self.client.get(reverse('activities:detail', args=[self.event.event_id]))
+        self.assertEqual(sample('django_request_duration_seconds_count', **labels), count + 1)
+        self.assertEqual(sample('django_responses_total', status='200', **labels), ok + 1)
+        self.assertGreater(sample('django_request_db_queries_sum', view='activities:detail'), queries)
+
+        missing = sample('django_responses_total', view='<unresolved>', method='GET', status='404')
+        self.client.get('/no-such-page/')
+        self.assertEqual(sample('django_responses_total', view='<unresolved>', method='GET', status='404'), missing + 1)
+
+        other = sample('django_responses_total', view='<unresolved>', method='other', status='404')
+        self.client.generic('X-RANDOM-1', '/no-such-page/')
+        self.assertEqual(sample('django_responses_total', view='<unresolved>', method='other', status='404'), other + 1)
+        self.assertEqual(sample('django_responses_total', view='<unresolved>', method='X-RANDOM-1', status='404'), 0)
+
+    def test_cache_hits_and_misses(self):
+        cache = LocMemCache('metrics-test', {})
+        hits = sample('django_cache_lookups_total', cache='locmem', result='hit')
+        misses = sample('django_cache_lookups_total', cache='locmem', result='miss')
+        self.assertEqual(cache.get('a', 'default'), 'default')
+        cache.set('a', None)
+        self.assertIsNone(cache.get('a', 'default'))
+        self.assertEqual(cache.get_many(['a', 'b']), {'a': None})
+        self.assertEqual(sample('django_cache_lookups_total', cache='locmem', result='hit'), hits + 2)
+        self.assertEqual(sample('django_cache_lookups_total', cache='locmem', result='miss'), misses + 2)
+
+    @override_settings(INTERNAL_IPS=['127.0.0.1'])
+    def test_endpoint(self):
+        self.client.get(reverse('indexes:home'))
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version='))
+        body = response.content.decode()
+        self.assertIn('django_request_duration_seconds_bucket{le="0.005",method="GET",view="indexes:home"}', body)
+        # Only the open event with a quota
+        self.assertIn(f'ksbc_event_quota_left{{event_id="{self.event.event_id}"}} 7.0', body)
+        self.assertEqual(body.count('ksbc_event_quota_left{'), 1)
+        self.assertIn('ksbc_outbox_emails{state="pending"} 2.0', body)
+        self.assertIn('ksbc_outbox_emails{state="due"} 1.0', body)
+        self.assertIn('ksbc_outbox_oldest_pending_age_seconds ', body)
+
+    def test_endpoint_is_internal(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+        self.client.force_login(User.objects.create_user('staff', is_staff=True))
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
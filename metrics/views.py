@@ -0,0 +1,27 @@
+import os
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import require_safe
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest, multiprocess
+
+from .collectors import DomainCollector
+
+
+def traffic_registry():
+    """Every worker's samples in multiprocess mode, else this process's."""
+    if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+@require_safe
+def metrics(request):
+    if not (request.user.is_staff or request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS):
+        raise Http404
+    domain = CollectorRegistry()
+    domain.register(DomainCollector())
+    body = generate_latest(traffic_registry()) + generate_latest(domain)
+    return HttpResponse(body, content_type=CONTENT_TYPE_LATEST)
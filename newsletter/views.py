@@ -1,8 +1,11 @@
 from django.shortcuts import render
+from django.utils.decorators import method_decorator
 from django.views.generic import ListView, DetailView
+from pagecache.cache import cache_anonymous_page
 from .models import Newsletter
 
 # Create your views here.
+@method_decorator(cache_anonymous_page, name='dispatch')
 class NewsletterArchiveView(ListView):
     model = Newsletter
     template_name = 'newsletter/archive.html'
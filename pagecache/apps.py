@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class PageCacheConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'pagecache'
+    verbose_name = "Page cache"
+
+    def ready(self):
+        from . import signals  # noqa: F401
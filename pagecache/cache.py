@@ -0,0 +1,153 @@
+"""
+Full-page cache for anonymous visitors.
+
+``cache_anonymous_page`` keeps the rendered body of a view's GET responses
+for up to ``PAGE_CACHE_TIMEOUT`` seconds. Each entry is tagged with the
+models whose tables the request's queries read (found in the SQL, so views
+don't have to declare them) and the version of each tag at the time.
+``signals.py`` gives a tag a new version whenever one of its rows is saved
+or deleted, and an entry whose versions no longer match is a miss: an edit
+in the admin shows on the next request, while pages that read nothing from
+the database are only re-rendered when they time out.
+
+Tag versions are timestamps. A miss records the time it started rendering
+and doesn't store the page if any of its tags changed after that, so a
+render racing with an edit can't cache the old data under the new version.
+With a read replica, whose rows may be ``REPLICA_PIN_SECONDS`` behind, it
+doesn't store the page if they changed that long before either.
+
+Parts of a page that are per visitor, or that change without a model signal
+(flash messages, CSRF tokens, event quotas, which ``reserve_spot`` updates
+with ``QuerySet.update()``), are written with ``{% live %}`` and filled in
+for every response, see ``fragments.py``.
+"""
+import hashlib
+import re
+import time
+from functools import lru_cache, partial, wraps
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from config.querybudget import QueryRecorder
+from config.routers import replica_lag_ns
+
+from .fragments import fill_placeholders
+
+KEY_PREFIX = 'pagecache'
+STATUS_HEADER = 'X-Page-Cache'
+# Apps whose rows never decide what a public page shows
+UNTAGGED_APPS = frozenset({'admin', 'contenttypes', 'sessions'})
+_TABLE_RE = re.compile(r'\b(?:FROM|JOIN)\s+["`]?(\w+)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=None)
+def _table_tags():
+    return {
+        model._meta.db_table: model._meta.label_lower
+        for model in apps.get_models(include_auto_created=True)
+        if model._meta.app_label not in UNTAGGED_APPS
+    }
+
+
+def tags_for_queries(statements):
+    """Labels of the models whose tables ``statements`` read."""
+    tables = _table_tags()
+    return {tables[table] for sql in statements for table in _TABLE_RE.findall(sql) if table in tables}
+
+
+def _tag_key(tag):
+    return f'{KEY_PREFIX}:tag:{tag}'
+
+
+def tag_versions(tags):
+    keys = {tag: _tag_key(tag) for tag in tags}
+    found = cache.get_many(keys.values())
+    versions = {}
+    for tag, key in keys.items():
+        if key not in found:
+            cache.add(key, 0, None)
+            found[key] = cache.get(key, 0)
+        versions[tag] = found[key]
+    return versions
+
+
+def invalidate_tag(tag):
+    cache.set(_tag_key(tag), time.time_ns(), None)
+
+
+def _is_current(versions):
+    keys = {_tag_key(tag): version for tag, version in versions.items()}
+    found = cache.get_many(keys)
+    return all(found.get(key) == version for key, version in keys.items())
+
+
+def page_key(request):
+    url = request.build_absolute_uri()
+    return f'{KEY_PREFIX}:page:{hashlib.md5(url.encode()).hexdigest()}'
+
+
+def _cacheable(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not {'private', 'no-cache', 'no-store'} & set(response.get('Cache-Control', '').replace(' ', '').split(','))
+    )
+
+
+def _fill(request, response):
+    if not response.streaming and response.get('Content-Type', '').startswith('text/html'):
+        response.content = fill_placeholders(request, response.content.decode(response.charset))
+    return response
+
+
+def cache_anonymous_page(view=None, *, tags=()):
+    """
+    Serve ``view``'s GET responses to anonymous visitors from the page cache.
+    Use ``method_decorator(cache_anonymous_page, name='dispatch')`` on
+    class-based views. ``tags`` names models (classes or labels) the view
+    depends on without querying them, e.g. because it reads a cached copy.
+    """
+    if view is None:
+        return partial(cache_anonymous_page, tags=tags)
+    extra_tags = {tag if isinstance(tag, str) else tag._meta.label_lower for tag in tags}
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        timeout = getattr(settings, 'PAGE_CACHE_TIMEOUT', 0)
+        if not timeout or request.method != 'GET' or request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+
+        key = page_key(request)
+        entry = cache.get(key)
+        if entry is not None and _is_current(entry['tags']):
+            response = HttpResponse(fill_placeholders(request, entry['body']), content_type=entry['content_type'])
+            response[STATUS_HEADER] = 'hit'
+            return response
+
+        started = time.time_ns()
+        recorder = QueryRecorder()
+        request.page_cache_placeholders = True
+        try:
+            with recorder.record():
+                response = view(request, *args, **kwargs)
+                if callable(getattr(response, 'render', None)):
+                    response = response.render()
+        finally:
+            request.page_cache_placeholders = False
+        if _cacheable(response):
+            versions = tag_versions(tags_for_queries(sql for sql, _ in recorder.queries) | extra_tags)
+            fresh_before = started - replica_lag_ns()
+            if all(version <= fresh_before for version in versions.values()):
+                cache.set(key, {
+                    'body': response.content.decode(response.charset),
+                    'content_type': response['Content-Type'],
+                    'tags': versions,
+                }, timeout)
+            response[STATUS_HEADER] = 'miss'
+        return _fill(request, response)
+
+    return wrapper
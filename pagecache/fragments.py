@@ -0,0 +1,73 @@
+"""
+Per-request fragments of cached pages, written with ``{% live %}``.
+
+A fragment is registered under a name with a ``render(request, obj)``
+function and, if it shows an object, a ``load(pks)`` function returning
+``{str(pk): obj}``. While a page is being cached the tag leaves a
+``<!--live:name:pk-->`` placeholder; ``fill_placeholders`` then loads the
+objects for every placeholder on the page with one ``load`` call per loader
+and renders each fragment in its place. Outside the page cache the tag
+renders the fragment straight away.
+"""
+import re
+from collections import defaultdict
+
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.html import format_html
+
+_PLACEHOLDER_RE = re.compile(r'<!--live:(\w+)(?::(\w+))?-->')
+
+FRAGMENTS = {}
+
+
+class Fragment:
+    def __init__(self, render, load=None):
+        self.render = render
+        self.load = load
+
+
+def register(name, render, load=None):
+    FRAGMENTS[name] = Fragment(render, load)
+
+
+def placeholder(name, obj=None):
+    return f'<!--live:{name}-->' if obj is None else f'<!--live:{name}:{obj.pk}-->'
+
+
+def fill_placeholders(request, body):
+    """Render the live fragments of ``body`` (a str) for ``request``."""
+    found = _PLACEHOLDER_RE.findall(body)
+    if not found:
+        return body
+    wanted = defaultdict(set)
+    for name, pk in found:
+        fragment = FRAGMENTS.get(name)
+        if fragment is not None and fragment.load is not None and pk:
+            wanted[fragment.load].add(pk)
+    loaded = {load: load(pks) for load, pks in wanted.items()}
+
+    def render(match):
+        name, pk = match.groups()
+        fragment = FRAGMENTS.get(name)
+        if fragment is None:
+            return ''
+        if fragment.load is None:
+            return fragment.render(request, None)
+        obj = loaded.get(fragment.load, {}).get(pk)
+        # Deleted since the page was cached
+        return '' if obj is None else fragment.render(request, obj)
+
+    return _PLACEHOLDER_RE.sub(render, body)
+
+
+def _messages(request, obj):
+    return render_to_string('partials/_alert.html', request=request)
+
+
+def _csrf_token(request, obj):
+    return format_html('<input type="hidden" name="csrfmiddlewaretoken" value="{}">', get_token(request))
+
+
+register('messages', _messages)
+register('csrf_token', _csrf_token)
@@ -0,0 +1,68 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import NoReverseMatch, reverse
+
+from pagecache.cache import STATUS_HEADER
+
+DEFAULT_URLS = (
+    'indexes:home', 'activities:list', 'fellowship:fellowship', 'worships:worship',
+    'newsletter:archive', 'pages:index', 'pages:about',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Request the anonymously cached pages N times each with the page cache "
+        "off and on, and report latency and the cache hit ratio. Only reads "
+        "from the configured database; page cache entries it creates are "
+        "left in place."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='*', metavar='url_name', help="Default: the cached public pages.")
+        parser.add_argument('--requests', type=int, default=200, help="Requests per page and mode.")
+        parser.add_argument('--host', default='localhost', help="Host header; must be in ALLOWED_HOSTS.")
+        parser.add_argument('--timeout', type=int, default=300, help="PAGE_CACHE_TIMEOUT for the cached run.")
+
+    def handle(self, *args, **options):
+        try:
+            paths = {name: reverse(name) for name in options['urls'] or DEFAULT_URLS}
+        except NoReverseMatch as e:
+            raise CommandError(e)
+        client = Client(SERVER_NAME=options['host'])
+        count = options['requests']
+        self.stdout.write(
+            f"{'page':<24} {'uncached ms':>18} {'cached ms':>18} {'hit ratio':>10} {'speedup':>8}"
+        )
+        self.stdout.write(f"{'':<24} {'median':>8} {'p95':>9} {'median':>8} {'p95':>9}")
+        for name, path in paths.items():
+            with override_settings(PAGE_CACHE_TIMEOUT=0):
+                uncached, _ = self._run(client, path, count)
+            with override_settings(PAGE_CACHE_TIMEOUT=options['timeout']):
+                cached, hits = self._run(client, path, count)
+            self.stdout.write(
+                f"{name:<24} {self._median(uncached):>8.2f} {self._p95(uncached):>9.2f} "
+                f"{self._median(cached):>8.2f} {self._p95(cached):>9.2f} "
+                f"{hits / count:>10.1%} {self._median(uncached) / self._median(cached):>7.1f}x"
+            )
+
+    def _run(self, client, path, count):
+        timings = []
+        hits = 0
+        for _ in range(count):
+            started = time.perf_counter()
+            response = client.get(path)
+            timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f"{path} answered {response.status_code}")
+            hits += response.get(STATUS_HEADER) == 'hit'
+        return timings, hits
+
+    def _median(self, timings):
+        return statistics.median(timings)
+
+    def _p95(self, timings):
+        return statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
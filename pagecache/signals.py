@@ -0,0 +1,29 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import UNTAGGED_APPS, invalidate_tag
+
+
+def invalidate_model(model, using):
+    if model._meta.app_label in UNTAGGED_APPS:
+        return
+    tag = model._meta.label_lower
+    invalidate_tag(tag)
+    if transaction.get_connection(using).in_atomic_block:
+        # Again once committed: a page rendered in between still saw the old rows
+        transaction.on_commit(partial(invalidate_tag, tag), using=using, robust=True)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def row_changed(sender, using, **kwargs):
+    invalidate_model(sender, using)
+
+
+@receiver(m2m_changed)
+def relation_changed(sender, action, using, **kwargs):
+    if action.startswith('post_'):
+        invalidate_model(sender, using)
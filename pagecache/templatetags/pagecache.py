@@ -0,0 +1,18 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from ..fragments import FRAGMENTS, placeholder
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def live(context, name, obj=None):
+    """
+    ``{% live "messages" %}``, ``{% live "event_status" event %}``: a part of
+    the page rendered for every request, even when the page is cached.
+    """
+    request = context.get('request')
+    if getattr(request, 'page_cache_placeholders', False):
+        return mark_safe(placeholder(name, obj))
+    return FRAGMENTS[name].render(request, obj)
@@ -0,0 +1,99 @@
+from datetime import date
+from unittest import mock
+
+from django.contrib import messages
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from activities.models import Event
+from indexes.models import Prayer
+from worships.models import WorshipSermon
+from worships.views import sermon_list
+
+from .cache import STATUS_HEADER, tags_for_queries
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=300)
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.sermon = WorshipSermon.objects.create(
+            sermon_title='恩典之路', speaker_name='陳牧師',
+            youtube_link='https://youtu.be/a', sermon_date=date(2025, 3, 9),
+        )
+        self.url = reverse('worships:worship')
+
+    def test_hits_run_no_queries(self):
+        self.assertEqual(self.client.get(self.url)[STATUS_HEADER], 'miss')
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response[STATUS_HEADER], 'hit')
+        self.assertContains(response, '恩典之路')
+        # Different query string, different page
+        self.assertEqual(self.client.get(self.url, {'page': 1})[STATUS_HEADER], 'miss')
+
+    def test_saves_invalidate_pages_that_read_the_model(self):
+        self.client.get(self.url)
+        Prayer.objects.create(title='宣教士', content='代求')
+        self.assertEqual(self.client.get(self.url)[STATUS_HEADER], 'hit')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sermon.sermon_title = '信心之路'
+            self.sermon.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response[STATUS_HEADER], 'miss')
+        self.assertContains(response, '信心之路')
+
+    def test_recent_changes_are_not_cached_from_a_replica(self):
+        # The sermon was saved in setUp, within the replica's lag
+        with mock.patch('pagecache.cache.replica_lag_ns', return_value=60 * 10 ** 9):
+            self.assertEqual(self.client.get(self.url)[STATUS_HEADER], 'miss')
+            self.assertEqual(self.client.get(self.url)[STATUS_HEADER], 'miss')
+        self.client.get(self.url)
+        self.assertEqual(self.client.get(self.url)[STATUS_HEADER], 'hit')
+
+    def test_signed_in_users_bypass_the_cache(self):
+        self.client.get(self.url)
+        self.client.force_login(User.objects.create_user('member', 'm@example.com', 'pw'))
+        self.assertNotIn(STATUS_HEADER, self.client.get(self.url))
+
+    def test_messages_are_not_cached(self):
+        def get(text=None):
+            request = RequestFactory().get(self.url)
+            request.user = AnonymousUser()
+            request._messages = CookieStorage(request)
+            if text:
+                messages.info(request, text)
+            return sermon_list(request)
+
+        self.assertNotContains(get('報名已收到'), '<!--live')
+        response = get()
+        self.assertEqual(response[STATUS_HEADER], 'hit')
+        self.assertNotContains(response, '報名已收到')
+        self.assertContains(get('已取消報名'), '已取消報名')
+
+    def test_quotas_stay_live(self):
+        event = Event.objects.create(
+            title='營會', is_active=True, quota_left=5, start_date=timezone.now().date(),
+        )
+        url = reverse('activities:list')
+        self.assertContains(self.client.get(url), '接受報名')
+        # How reserve_spot takes the last places: no save(), no signal
+        Event.objects.filter(pk=event.pk).update(quota_left=0)
+        response = self.client.get(url)
+        self.assertEqual(response[STATUS_HEADER], 'hit')
+        self.assertContains(response, '名額已滿')
+        self.assertContains(response, 'Sold Out')
+
+    def test_tags_come_from_the_sql(self):
+        self.assertEqual(
+            tags_for_queries([
+                'SELECT 1 FROM "activities_event" INNER JOIN "activities_eventparticipant" ON ...',
+                'SELECT 1 FROM "django_session" WHERE ...',
+            ]),
+            {'activities.event', 'activities.eventparticipant'},
+        )
@@ -1,25 +1,33 @@
 from django.shortcuts import render
+from pagecache.cache import cache_anonymous_page
 
 # Create your views here.
 
+@cache_anonymous_page
 def about(request):
     return render(request,'pages/about.html')
 
+@cache_anonymous_page
 def contact(request):
     return render(request,'pages/contact.html')
 
+@cache_anonymous_page
 def faith(request):
     return render(request,'pages/faith.html')
 
+@cache_anonymous_page
 def team(request):
     return render(request,'pages/team.html')
 
+@cache_anonymous_page
 def partners(request):
     return render(request,'pages/partners.html')
 
+@cache_anonymous_page
 def giving(request):
     return render(request,'pages/giving.html')
 
+@cache_anonymous_page
 def index(request):
     return render(request,'pages/index.html')
 
@@ -0,0 +1,83 @@
+import json
+
+from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from .models import RequestProfile
+
+
+class ProfileChangeList(ChangeList):
+    def get_queryset(self, request, exclude_parameters=None):
+        # The list shows none of the bulky fields
+        return super().get_queryset(request, exclude_parameters).defer('stats', 'summary', 'queries', 'cache_log')
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = (
+        'created_at', 'method', 'path', 'status', 'duration_ms', 'sql_count', 'sql_ms',
+        'template_ms', 'cache_calls', 'user', 'download_link',
+    )
+    list_filter = ('method', 'status')
+    search_fields = ('path', 'view_name')
+    list_select_related = ('user',)
+    fields = (
+        'created_at', 'user', 'method', 'path', 'view_name', 'status', 'duration_ms',
+        'sql_count', 'sql_ms', 'template_ms', 'cache_calls', 'cache_hits', 'download_link',
+        'summary_text', 'queries_text', 'cache_text',
+    )
+    readonly_fields = fields
+    list_per_page = 50
+
+    def has_add_permission(self, request):
+        # Written by ProfilingMiddleware, never by hand
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_changelist(self, request, **kwargs):
+        return ProfileChangeList
+
+    @admin.display(description="Stats")
+    def download_link(self, obj):
+        url = reverse('admin:profiling_requestprofile_download', args=[obj.pk])
+        return format_html('<a href="{}">.prof</a>', url)
+
+    @admin.display(description="Slowest functions")
+    def summary_text(self, obj):
+        return format_html('<pre>{}</pre>', obj.summary)
+
+    @admin.display(description="SQL")
+    def queries_text(self, obj):
+        return format_html('<pre>{}</pre>', '\n\n'.join(f"{q['ms']:.2f} ms  {q['sql']}" for q in obj.queries))
+
+    @admin.display(description="Cache calls")
+    def cache_text(self, obj):
+        return format_html('<pre>{}</pre>', '\n'.join(
+            f"{c['ms']:.2f} ms  {c['alias']}.{c['op']}({c['key']}) {json.dumps(c['hit'])}" for c in obj.cache_log
+        ))
+
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path(
+                '<int:profile_id>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='profiling_requestprofile_download',
+            ),
+        ]
+        return custom_urls + urls
+
+    def download_view(self, request, profile_id):
+        profile = get_object_or_404(RequestProfile, pk=profile_id)
+        if not self.has_view_permission(request, profile):
+            raise PermissionDenied
+        response = HttpResponse(bytes(profile.stats), content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="profile-{profile.pk}.prof"'
+        return response
@@ -0,0 +1,180 @@
+"""
+Profile single requests on demand.
+
+A staff member adds ``?_profile=1`` to a URL, or sends ``X-Profile: 1``, and
+that request runs under cProfile with every SQL statement (via
+``QueryRecorder``) and every cache call timed. The result is saved as a
+``RequestProfile``, listed in the admin with its stats downloadable as a
+``.prof`` file (``python -m pstats``, snakeviz); the response carries its
+admin URL in ``X-Profile``. Template time is the cumulative time cProfile
+measured in ``Template.render``, so templates need no instrumentation.
+
+Requests without the flag cost one dictionary lookup: nothing is wrapped,
+and ``request.user`` is only loaded once the flag is seen. Sessions,
+authentication and the middleware above this one run before profiling
+starts. One request is profiled at a time per process; others carrying the
+flag meanwhile run normally. ``PROFILE_KEEP`` limits the profiles kept; 0
+turns profiling off.
+"""
+import cProfile
+import io
+import marshal
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.base import Template
+from django.urls import reverse
+
+from config.querybudget import QueryRecorder
+
+from .models import RequestProfile
+
+PROFILE_PARAM = '_profile'
+PROFILE_HEADER = 'X-Profile'
+DEFAULT_KEEP = 100
+SUMMARY_FUNCTIONS = 40
+MAX_LOGGED_CALLS = 1000
+
+_TEMPLATE_RENDER = (Template.render.__code__.co_filename, Template.render.__code__.co_firstlineno, 'render')
+_CACHE_READS = ('get', 'get_many', 'has_key')
+_CACHE_WRITES = ('set', 'set_many', 'add', 'touch', 'incr', 'decr', 'delete', 'delete_many', 'clear')
+_profiling = threading.Lock()
+
+
+class CacheRecorder:
+    """Times every call on the configured caches, and whether reads hit."""
+
+    def __init__(self):
+        self.calls = []
+        self._depth = 0
+
+    def _wrap(self, alias, op, method):
+        def wrapper(*args, **kwargs):
+            # get_many and friends may call get; record the outer call only
+            if self._depth:
+                return method(*args, **kwargs)
+            self._depth += 1
+            start = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            finally:
+                self._depth -= 1
+                elapsed = time.perf_counter() - start
+            if op in ('get', 'has_key'):
+                hit = result is not None and result is not False
+            elif op == 'get_many':
+                hit = len(result) == len(args[0]) if args else None
+            else:
+                hit = None
+            key = args[0] if args else ''
+            self.calls.append({'alias': alias, 'op': op, 'key': str(key)[:200], 'ms': elapsed * 1000, 'hit': hit})
+            return result
+        return wrapper
+
+    @contextmanager
+    def record(self):
+        # caches[alias] is this thread's own client, so patching it leaves
+        # concurrent requests alone
+        patched = []
+        try:
+            for alias in settings.CACHES:
+                cache = caches[alias]
+                for op in _CACHE_READS + _CACHE_WRITES:
+                    setattr(cache, op, self._wrap(alias, op, getattr(cache, op)))
+                patched.append(cache)
+            yield self
+        finally:
+            for cache in patched:
+                for op in _CACHE_READS + _CACHE_WRITES:
+                    vars(cache).pop(op, None)
+
+    @property
+    def hits(self):
+        return sum(call['hit'] is True for call in self.calls)
+
+
+def is_requested(request):
+    return PROFILE_PARAM in request.GET or PROFILE_HEADER in request.headers
+
+
+def template_ms(stats):
+    entry = stats.stats.get(_TEMPLATE_RENDER)
+    return entry[3] * 1000 if entry else 0.0
+
+
+def summarise(stats):
+    out = io.StringIO()
+    stats.stream = out
+    stats.sort_stats('cumulative').print_stats(SUMMARY_FUNCTIONS)
+    return out.getvalue().strip()
+
+
+def prune(keep):
+    """Delete all but the ``keep`` newest profiles."""
+    if keep <= 0:
+        RequestProfile.objects.all().delete()
+        return
+    oldest_kept = RequestProfile.objects.order_by('-pk').values_list('pk', flat=True)[keep - 1:keep]
+    RequestProfile.objects.filter(pk__lt=oldest_kept).delete()
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not is_requested(request) or not request.user.is_staff:
+            return self.get_response(request)
+        if PROFILE_PARAM in request.GET:
+            # Views that validate their parameters, like admin changelists,
+            # mustn't see it
+            request.GET = request.GET.copy()
+            del request.GET[PROFILE_PARAM]
+        if getattr(settings, 'PROFILE_KEEP', DEFAULT_KEEP) <= 0:
+            return self.get_response(request)
+        if not _profiling.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            return self.profile(request)
+        finally:
+            _profiling.release()
+
+    def profile(self, request):
+        profiler = cProfile.Profile()
+        queries = QueryRecorder()
+        cache_calls = CacheRecorder()
+        with queries.record(), cache_calls.record():
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+                duration = time.perf_counter() - start
+
+        stats = pstats.Stats(profiler)
+        match = getattr(request, 'resolver_match', None)
+        profile = RequestProfile.objects.create(
+            user=request.user,
+            method=request.method,
+            path=request.get_full_path()[:500],
+            view_name=match.view_name if match else '',
+            status=response.status_code,
+            duration_ms=duration * 1000,
+            sql_count=len(queries),
+            sql_ms=queries.total_time * 1000,
+            template_ms=template_ms(stats),
+            cache_calls=len(cache_calls.calls),
+            cache_hits=cache_calls.hits,
+            queries=[{'sql': sql, 'ms': seconds * 1000} for sql, seconds in queries.queries[:MAX_LOGGED_CALLS]],
+            cache_log=cache_calls.calls[:MAX_LOGGED_CALLS],
+            summary=summarise(stats),
+            stats=marshal.dumps(stats.stats),
+        )
+        prune(getattr(settings, 'PROFILE_KEEP', DEFAULT_KEEP))
+        response[PROFILE_HEADER] = reverse('admin:profiling_requestprofile_change', args=[profile.pk])
+        return response
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.11 on 2026-10-18 17:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('method', models.CharField(max_length=8)),
+                ('path', models.CharField(max_length=500)),
+                ('view_name', models.CharField(blank=True, max_length=200)),
+                ('status', models.PositiveSmallIntegerField()),
+                ('duration_ms', models.FloatField(verbose_name='Total ms')),
+                ('sql_count', models.PositiveIntegerField(verbose_name='Queries')),
+                ('sql_ms', models.FloatField(verbose_name='SQL ms')),
+                ('template_ms', models.FloatField(verbose_name='Template ms')),
+                ('cache_calls', models.PositiveIntegerField()),
+                ('cache_hits', models.PositiveIntegerField()),
+                ('queries', models.JSONField(default=list)),
+                ('cache_log', models.JSONField(default=list)),
+                ('summary', models.TextField(blank=True)),
+                ('stats', models.BinaryField()),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Request profile',
+                'verbose_name_plural': 'Request profiles',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
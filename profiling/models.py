@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.db import models
+
+
+class RequestProfile(models.Model):
+    """
+    One request run under the profiler by ``ProfilingMiddleware``: its
+    timings, every SQL statement and cache call, and the cProfile stats.
+    """
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    method = models.CharField(max_length=8)
+    path = models.CharField(max_length=500)
+    view_name = models.CharField(max_length=200, blank=True)
+    status = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField("Total ms")
+    sql_count = models.PositiveIntegerField("Queries")
+    sql_ms = models.FloatField("SQL ms")
+    template_ms = models.FloatField("Template ms")
+    cache_calls = models.PositiveIntegerField()
+    cache_hits = models.PositiveIntegerField()
+    # [{"sql": ..., "ms": ...}] in execution order
+    queries = models.JSONField(default=list)
+    # [{"alias": ..., "op": ..., "key": ..., "ms": ..., "hit": true/false/null}]
+    cache_log = models.JSONField(default=list)
+    # Slowest functions by cumulative time, as printed by pstats
+    summary = models.TextField(blank=True)
+    # Marshalled pstats data, the format of cProfile's .prof files
+    stats = models.BinaryField()
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Request profile"
+        verbose_name_plural = "Request profiles"
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
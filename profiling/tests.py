@@ -0,0 +1,91 @@
+import os
+import pstats
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from indexes.homepage import SNAPSHOT_KEY
+from indexes.models import Ministry
+
+from .middleware import PROFILE_HEADER, ProfilingMiddleware, prune
+from .models import RequestProfile
+
+
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_superuser('staff', 'staff@example.com', 'pw')
+        cls.member = User.objects.create_user('member', 'member@example.com', 'pw')
+        Ministry.objects.create(title='探訪事工')
+
+    def test_unflagged_requests_are_untouched(self):
+        middleware = ProfilingMiddleware(lambda request: HttpResponse('view'))
+        # request.user isn't even looked at
+        response = middleware(RequestFactory().get('/'))
+        self.assertEqual(response.content, b'view')
+        self.assertNotIn(PROFILE_HEADER, response)
+
+    def test_only_staff_can_profile(self):
+        self.client.force_login(self.member)
+        response = self.client.get('/?_profile=1')
+        self.assertNotIn(PROFILE_HEADER, response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_profile(self):
+        cache.clear()
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('indexes:home'), headers={PROFILE_HEADER: '1'})
+        self.assertEqual(response.status_code, 200)
+        profile = RequestProfile.objects.get()
+        self.assertEqual(response[PROFILE_HEADER], reverse('admin:profiling_requestprofile_change', args=[profile.pk]))
+        self.assertEqual(profile.view_name, 'indexes:home')
+        self.assertEqual(profile.user, self.staff)
+        self.assertGreater(profile.sql_count, 0)
+        self.assertEqual(len(profile.queries), profile.sql_count)
+        self.assertGreater(profile.template_ms, 0)
+        self.assertLess(profile.template_ms, profile.duration_ms)
+        # The homepage snapshot is missed, built and stored
+        self.assertEqual(
+            [(call['op'], call['hit']) for call in profile.cache_log if call['key'] == SNAPSHOT_KEY],
+            [('get', False), ('set', None)],
+        )
+        self.assertIn('cumulative', profile.summary)
+
+        # The change page and the .prof download
+        self.assertContains(self.client.get(response[PROFILE_HEADER]), 'Slowest functions')
+        download = self.client.get(reverse('admin:profiling_requestprofile_download', args=[profile.pk]))
+        self.assertEqual(download['Content-Disposition'], f'attachment; filename="profile-{profile.pk}.prof"')
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'profile.prof')
+        with open(path, 'wb') as f:
+            f.write(download.content)
+        self.assertGreater(pstats.Stats(path).total_calls, 0)
+
+    def test_flag_is_hidden_from_the_view(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('admin:indexes_ministry_changelist') + '?_profile=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(PROFILE_HEADER, response)
+
+    @override_settings(PROFILE_KEEP=2)
+    def test_old_profiles_are_pruned(self):
+        self.client.force_login(self.staff)
+        for _ in range(3):
+            self.client.get(reverse('pages:about') + '?_profile=1')
+        self.assertEqual(RequestProfile.objects.count(), 2)
+        prune(0)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    @override_settings(PROFILE_KEEP=0)
+    def test_keep_zero_turns_profiling_off(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('admin:indexes_ministry_changelist') + '?_profile=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(PROFILE_HEADER, response)
+        self.assertFalse(RequestProfile.objects.exists())
@@ -0,0 +1,17 @@
+from django.contrib import admin
+
+from .models import SearchDocument
+
+
+@admin.register(SearchDocument)
+class SearchDocumentAdmin(admin.ModelAdmin):
+    list_display = ('title', 'content_type', 'date', 'url', 'updated_at')
+    list_filter = ('content_type',)
+    search_fields = ('title',)
+    list_select_related = ('content_type',)
+    readonly_fields = ('content_type', 'object_id', 'title_tokens', 'body_tokens', 'updated_at')
+    list_per_page = 50
+
+    def has_add_permission(self, request):
+        # Documents are written by search.signals, never by hand
+        return False
@@ -0,0 +1,148 @@
+"""
+Writing to and querying the ``SearchDocument`` table.
+
+On PostgreSQL documents carry a ``tsvector`` built with the ``simple``
+configuration from pre-tokenised text (title tokens weighted A, body B),
+matched through a GIN index and ranked with ``ts_rank``. Elsewhere (the
+SQLite test database) the same tokens are matched with ``LIKE`` and ranked
+by where they occur, so behaviour is the same, only slower.
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.utils.text import Truncator
+
+from .models import SearchDocument
+from .sources import SOURCES
+from .tokens import index_tokens, query_tokens
+
+SNIPPET_WORDS = 60
+# Rank only the most recent matches of very common queries, found newest
+# first through the date index (migration 0003)
+MAX_CANDIDATES = 500
+DOCUMENT_VECTOR = (
+    SearchVector('title_tokens', weight='A', config='simple')
+    + SearchVector('body_tokens', weight='B', config='simple')
+)
+
+
+def _is_postgres(queryset):
+    return connections[queryset.db].vendor == 'postgresql'
+
+
+def _padded(tokens):
+    # Leading/trailing spaces let the LIKE fallback match whole tokens
+    return f" {' '.join(tokens)} " if tokens else ''
+
+
+def build_document(obj, source=None):
+    source = source or SOURCES[type(obj)]
+    title = source.title(obj) or ''
+    body = source.body(obj) or ''
+    return SearchDocument(
+        content_type=ContentType.objects.get_for_model(obj),
+        object_id=obj.pk,
+        title=title[:255],
+        snippet=Truncator(body.strip()).words(SNIPPET_WORDS),
+        url=source.url(obj),
+        date=source.date(obj),
+        boost=source.boost,
+        title_tokens=_padded(index_tokens(title)),
+        body_tokens=_padded(index_tokens(body)),
+    )
+
+
+def _upsert(documents):
+    SearchDocument.objects.bulk_create(
+        documents,
+        update_conflicts=True,
+        unique_fields=['content_type', 'object_id'],
+        update_fields=['title', 'snippet', 'url', 'date', 'boost', 'title_tokens', 'body_tokens', 'updated_at'],
+    )
+
+
+def _refresh_vectors(queryset):
+    if _is_postgres(queryset):
+        queryset.update(vector=DOCUMENT_VECTOR)
+
+
+def index_object(obj):
+    """Add, update or (if no longer public) remove the document for ``obj``."""
+    source = SOURCES[type(obj)]
+    if not source.public(obj):
+        remove_object(obj)
+        return
+    document = build_document(obj, source)
+    _upsert([document])
+    _refresh_vectors(SearchDocument.objects.filter(
+        content_type=document.content_type, object_id=document.object_id,
+    ))
+
+
+def remove_object(obj):
+    SearchDocument.objects.filter(
+        content_type=ContentType.objects.get_for_model(obj), object_id=obj.pk,
+    ).delete()
+
+
+def rebuild(models=None, batch_size=1000):
+    """Re-index every row of ``models`` (default: all sources). Returns counts."""
+    counts = {}
+    for model, source in SOURCES.items():
+        if models and model not in models:
+            continue
+        content_type = ContentType.objects.get_for_model(model)
+        SearchDocument.objects.filter(content_type=content_type).delete()
+        batch = []
+        counts[model] = 0
+        for obj in model._default_manager.iterator(chunk_size=batch_size):
+            if not source.public(obj):
+                continue
+            batch.append(build_document(obj, source))
+            if len(batch) >= batch_size:
+                _upsert(batch)
+                counts[model] += len(batch)
+                batch = []
+        if batch:
+            _upsert(batch)
+            counts[model] += len(batch)
+        _refresh_vectors(SearchDocument.objects.filter(content_type=content_type))
+    return counts
+
+
+def search(text, limit=20):
+    """
+    Best ``limit`` documents for ``text`` as dicts, best first. Every query
+    token must occur in the title or body.
+    """
+    tokens, prefix = query_tokens(text)
+    if not tokens:
+        return []
+    documents = SearchDocument.objects.all()
+    fields = ('content_type_id', 'title', 'snippet', 'url', 'date')
+
+    if _is_postgres(documents):
+        terms = [f"'{token}'" for token in tokens]
+        if prefix:
+            terms[-1] += ':*'
+        query = SearchQuery(' & '.join(terms), search_type='raw', config='simple')
+        matches = documents.filter(vector=query)
+        candidates = matches.order_by(F('date').desc(nulls_last=True)).values('pk')[:MAX_CANDIDATES]
+        ranked = documents.filter(pk__in=candidates).annotate(
+            rank=SearchRank(F('vector'), query) * F('boost'),
+        )
+    else:
+        condition = Q()
+        score = Value(0.0)
+        for i, token in enumerate(tokens):
+            pattern = f' {token}' if prefix and i == len(tokens) - 1 else f' {token} '
+            in_title = Q(title_tokens__contains=pattern)
+            condition &= in_title | Q(body_tokens__contains=pattern)
+            score = score + Case(When(in_title, then=Value(1.0)), default=Value(0.4), output_field=FloatField())
+        ranked = documents.filter(condition).annotate(
+            rank=score * F('boost'),
+        )
+    rows = ranked.order_by('-rank', F('date').desc(nulls_last=True)).values(*fields, 'rank')[:limit]
+    labels = {ContentType.objects.get_for_model(model).pk: source.label for model, source in SOURCES.items()}
+    return [dict(row, label=labels.get(row['content_type_id'], '')) for row in rows]
@@ -0,0 +1,31 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from search.index import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the site search index from the source tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*', metavar='app_label.Model',
+            help="Only re-index these models (default: everything searchable).",
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            models = [apps.get_model(label) for label in options['models']]
+        except (LookupError, ValueError) as e:
+            raise CommandError(e)
+        start = time.perf_counter()
+        counts = rebuild(models, batch_size=options['batch_size'])
+        for model, count in counts.items():
+            self.stdout.write(f"{model._meta.label}: {count} documents")
+        self.stdout.write(
+            f"Indexed {sum(counts.values())} documents in {time.perf_counter() - start:.1f}s",
+            style_func=self.style.SUCCESS,
+        )
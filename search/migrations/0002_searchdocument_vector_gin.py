@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+def create_gin_index(apps, schema_editor):
+    # GIN over tsvector is PostgreSQL only; SQLite falls back to LIKE
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX search_document_vector_gin ON search_searchdocument USING gin (vector)'
+        )
+
+
+def drop_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS search_document_vector_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_gin_index, drop_gin_index),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+def create_date_index(apps, schema_editor):
+    # Matches search.index.search()'s candidate order, so common tokens
+    # walk the newest documents and stop at MAX_CANDIDATES instead of
+    # sorting every match. SQLite can't index NULLS LAST and has no GIN
+    # path to speed up anyway
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX search_document_date_desc ON search_searchdocument (date DESC NULLS LAST)'
+        )
+
+
+def drop_date_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS search_document_date_desc')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0002_searchdocument_vector_gin'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_date_index, drop_date_index),
+    ]
@@ -0,0 +1,34 @@
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    One searchable page of the site, copied from its source row by
+    ``search.index`` whenever that row is saved. Results are read from
+    here alone, so a search is one query however many models take part.
+    """
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=255)
+    snippet = models.TextField(blank=True)
+    url = models.CharField(max_length=500)
+    date = models.DateField(null=True, blank=True)
+    boost = models.FloatField(default=1.0)
+    # Space-padded output of search.tokens.index_tokens
+    title_tokens = models.TextField(blank=True)
+    body_tokens = models.TextField(blank=True)
+    # PostgreSQL only: tsvector over the tokens, GIN-indexed (migration 0002);
+    # date also has a newest-first index there (migration 0003)
+    vector = SearchVectorField(null=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='search_document_unique_object'),
+        ]
+
+    def __str__(self):
+        return self.title
@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+
+from .index import index_object, remove_object
+from .sources import SOURCES, register_sources
+
+
+def document_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_object(instance)
+
+
+def document_deleted(sender, instance, **kwargs):
+    remove_object(instance)
+
+
+register_sources()
+for model in SOURCES:
+    post_save.connect(document_changed, sender=model, dispatch_uid=f'search-save-{model._meta.label}')
+    post_delete.connect(document_deleted, sender=model, dispatch_uid=f'search-delete-{model._meta.label}')
@@ -0,0 +1,77 @@
+"""
+What the site search covers. Each entry says how to turn one row of a
+model into a ``SearchDocument``; ``search.signals`` keeps the index in step
+with saves and deletes of every model registered here.
+"""
+from django.apps import apps
+from django.urls import reverse
+
+SOURCES = {}
+
+
+class SearchSource:
+    def __init__(self, model, *, label, title, body, url, date=None, public=None, boost=1.0):
+        self.model = model
+        self.label = label
+        self.title = title
+        self.body = body
+        self.url = url
+        self.date = date or (lambda obj: None)
+        self.public = public or (lambda obj: True)
+        self.boost = boost
+
+
+def register(model_label, **kwargs):
+    model = apps.get_model(model_label)
+    SOURCES[model] = SearchSource(model, **kwargs)
+
+
+def register_sources():
+    from indexes.homepage import prayer_cursor
+
+    register(
+        'worships.WorshipSermon',
+        label="講道",
+        title=lambda s: s.sermon_title,
+        body=lambda s: s.speaker_name,
+        url=lambda s: s.youtube_link,
+        date=lambda s: s.sermon_date,
+    )
+    register(
+        'activities.Event',
+        label="活動",
+        title=lambda e: e.title,
+        body=lambda e: f"{e.description}\n{e.location}",
+        url=lambda e: reverse('activities:detail', kwargs={'event_id': e.event_id}),
+        date=lambda e: e.start_date,
+        public=lambda e: e.is_active,
+        boost=1.2,
+    )
+    register(
+        'indexes.Ministry',
+        label="事工",
+        title=lambda m: m.title,
+        body=lambda m: f"{m.description}\n{m.location}",
+        url=lambda m: reverse('indexes:ministry', kwargs={'ministry_id': m.pk}),
+        date=lambda m: m.activity_date,
+        public=lambda m: m.is_active,
+    )
+    register(
+        'indexes.Prayer',
+        label="代禱",
+        title=lambda p: p.title,
+        body=lambda p: p.content,
+        url=lambda p: reverse('indexes:prayers') + f'?start={prayer_cursor(p)}#prayer-{p.pk}',
+        date=lambda p: p.display_date,
+        public=lambda p: p.is_active,
+        boost=0.8,
+    )
+    register(
+        'newsletter.Newsletter',
+        label="牧者心聲",
+        title=lambda n: n.title,
+        body=lambda n: n.description,
+        url=lambda n: n.get_absolute_url(),
+        date=lambda n: n.published_date,
+        public=lambda n: n.is_published,
+    )
@@ -0,0 +1,101 @@
+import io
+from datetime import date
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from activities.models import Event
+from indexes.models import Prayer
+from newsletter.models import Newsletter
+from worships.models import WorshipSermon
+
+from .index import search
+from .models import SearchDocument
+from .tokens import index_tokens, query_tokens
+
+
+class TokenTests(TestCase):
+    def test_cjk_bigrams_and_words(self):
+        self.assertEqual(
+            index_tokens('主日崇拜 Sunday'),
+            ['主', '日', '崇', '拜', '主日', '日崇', '崇拜', 'sunday'],
+        )
+
+    def test_query_tokens(self):
+        self.assertEqual(query_tokens('恩典之路'), (['恩典', '典之', '之路'], False))
+        self.assertEqual(query_tokens('禱'), (['禱'], False))
+        # Full-width letters are folded, the last word is a prefix
+        self.assertEqual(query_tokens('ＫＳＢＣ wor'), (['ksbc', 'wor'], True))
+        self.assertEqual(query_tokens('?!'), ([], False))
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.sermon = WorshipSermon.objects.create(
+            sermon_title='禱告的力量', speaker_name='陳牧師',
+            youtube_link='https://youtu.be/a', sermon_date=date(2025, 3, 2),
+        )
+        WorshipSermon.objects.create(
+            sermon_title='恩典之路', speaker_name='李傳道',
+            youtube_link='https://youtu.be/b', sermon_date=date(2025, 3, 9),
+        )
+        self.prayer = Prayer.objects.create(title='宣教士', content='請為宣教士的禱告生活代求')
+        self.event = Event.objects.create(
+            title='Sunday Worship Night', description='敬拜讚美', location='810', is_active=True,
+        )
+
+    def titles(self, query):
+        return [row['title'] for row in search(query)]
+
+    def test_documents_follow_their_rows(self):
+        self.assertEqual(SearchDocument.objects.count(), 4)
+        self.event.is_active = False
+        self.event.save()
+        self.assertEqual(self.titles('worship'), [])
+        self.event.is_active = True
+        self.event.save()
+        self.assertEqual(self.titles('worship'), ['Sunday Worship Night'])
+        self.event.delete()
+        self.assertEqual(SearchDocument.objects.count(), 3)
+
+    def test_chinese_queries(self):
+        self.assertEqual(self.titles('恩典'), ['恩典之路'])
+        self.assertEqual(self.titles('陳牧師'), ['禱告的力量'])
+        self.assertEqual(self.titles('恩典 禱告'), [])
+        # A lone character still matches
+        self.assertIn('恩典之路', self.titles('恩'))
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.titles('禱告'), ['禱告的力量', '宣教士'])
+
+    def test_prefix_and_case(self):
+        self.assertEqual(self.titles('WORS'), ['Sunday Worship Night'])
+
+    def test_one_query(self):
+        search('禱告')  # warm the content type cache
+        with self.assertNumQueries(1):
+            search('禱告')
+
+    def test_endpoints(self):
+        response = self.client.get(reverse('search:api'), {'q': '恩典'})
+        [result] = response.json()['results']
+        self.assertEqual(result['type'], '講道')
+        self.assertEqual(result['url'], 'https://youtu.be/b')
+        self.assertEqual(result['date'], '2025-03-09')
+        for limit in ('abc', '', '0', '-5', '1000'):
+            response = self.client.get(reverse('search:api'), {'q': '恩典', 'limit': limit})
+            self.assertEqual(len(response.json()['results']), 1, limit)
+
+        response = self.client.get(reverse('search:results'), {'q': '宣教'})
+        self.assertContains(response, '宣教士')
+        self.assertContains(response, f'#prayer-{self.prayer.pk}')
+
+    def test_rebuild(self):
+        Newsletter.objects.bulk_create([
+            Newsletter(title='三月號', slug='march', pdf_file='n.pdf', description='復活節'),
+        ])
+        SearchDocument.objects.all().delete()
+        call_command('rebuild_search_index', stdout=io.StringIO())
+        self.assertEqual(SearchDocument.objects.count(), 5)
+        self.assertEqual(self.titles('復活'), ['三月號'])
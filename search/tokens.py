@@ -0,0 +1,57 @@
+"""
+Tokenisation for the search index.
+
+PostgreSQL's parsers split on whitespace and punctuation, which leaves a
+run of Chinese text as one giant "word". We therefore index overlapping
+character bigrams (plus single characters) of every CJK run, and lowercase
+words for everything else, and hand the database text that is already
+space-separated tokens. Queries are tokenised the same way, so a query of
+two or more characters matches wherever its bigrams all occur.
+"""
+import re
+import unicodedata
+
+# Kana, CJK ideographs (incl. extension A and compatibility), Hangul
+_CJK = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff'
+_TOKEN_RE = re.compile(f'([{_CJK}]+)|([^\\W_{_CJK}]+)')
+MAX_QUERY_TOKENS = 16
+
+
+def _normalise(text):
+    return unicodedata.normalize('NFKC', text or '').lower()
+
+
+def index_tokens(text):
+    """Tokens to index for ``text``: CJK unigrams and bigrams, other words."""
+    tokens = []
+    for cjk, word in _TOKEN_RE.findall(_normalise(text)):
+        if word:
+            tokens.append(word)
+            continue
+        tokens.extend(cjk)
+        tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+    return tokens
+
+
+def query_tokens(text):
+    """
+    Tokens a document must all contain to match ``text``: bigrams of CJK
+    runs (a lone character stands for itself) and words. Returns
+    ``(tokens, prefix)`` where ``prefix`` says the last token is a partly
+    typed word that should match as a prefix.
+    """
+    tokens = []
+    prefix = False
+    for cjk, word in _TOKEN_RE.findall(_normalise(text)):
+        if word:
+            tokens.append(word)
+            prefix = True
+        elif len(cjk) == 1:
+            tokens.append(cjk)
+            prefix = False
+        else:
+            tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+            prefix = False
+    # Drop duplicates, keep order
+    tokens = list(dict.fromkeys(tokens))[:MAX_QUERY_TOKENS]
+    return tokens, prefix and bool(tokens)
@@ -0,0 +1,47 @@
+from django.http import JsonResponse
+from django.shortcuts import render
+
+from .index import search
+
+MAX_QUERY_LENGTH = 100
+API_LIMIT = 20
+API_MAX_LIMIT = 50
+
+
+def _query(request):
+    return request.GET.get('q', '').strip()[:MAX_QUERY_LENGTH]
+
+
+def _limit(request):
+    """``?limit=`` clamped to 1..API_MAX_LIMIT; API_LIMIT if missing or not a number."""
+    try:
+        limit = int(request.GET['limit'])
+    except (KeyError, ValueError):
+        return API_LIMIT
+    return min(max(limit, 1), API_MAX_LIMIT)
+
+
+def results(request):
+    query = _query(request)
+    return render(request, 'search/results.html', {
+        'query': query,
+        'results': search(query) if query else [],
+    })
+
+
+def api(request):
+    query = _query(request)
+    rows = search(query, limit=_limit(request)) if query else []
+    return JsonResponse({
+        'query': query,
+        'results': [
+            {
+                'type': row['label'],
+                'title': row['title'],
+                'snippet': row['snippet'],
+                'url': row['url'],
+                'date': row['date'].isoformat() if row['date'] else None,
+            }
+            for row in rows
+        ],
+    }, json_dumps_params={'ensure_ascii': False})
@@ -1,11 +1,27 @@
 from django.contrib import admin
+from .facets import get_facets
 from .models import WorshipSermon
 
 
+class SpeakerFilter(admin.SimpleListFilter):
+    """Speakers with their sermon counts, read from the facet table."""
+
+    title = "講員"
+    parameter_name = "speaker_name"
+
+    def lookups(self, request, model_admin):
+        return [(name, f"{name} ({count})") for name, count in get_facets().speakers]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(speaker_name=self.value())
+        return queryset
+
+
 @admin.register(WorshipSermon)
 class WorshipSermonAdmin(admin.ModelAdmin):
     list_display = ("sermon_date", "sermon_title", "speaker_name", "youtube_link")
-    list_filter = ("sermon_date", "speaker_name")
+    list_filter = ("sermon_date", SpeakerFilter)
     search_fields = ("sermon_title", "speaker_name")
     ordering = ("-sermon_date",)
     date_hierarchy = "sermon_date"
@@ -0,0 +1,83 @@
+"""
+Per-year and per-speaker sermon counts for the archive page and admin.
+
+``SermonFacet`` rows are adjusted by ``+1``/``-1`` with ``F()`` updates as
+sermons are saved and deleted (see ``signals.py``), so reading the filters
+is one query over a few dozen rows instead of a ``DISTINCT`` scan of the
+sermon table, and the archive's total comes from the year counts rather
+than a ``COUNT(*)``.
+
+``bulk_create()`` and ``QuerySet.update()`` bypass the signals; run
+``manage.py rebuild_sermon_facets`` after changing sermons that way.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import ExtractYear
+
+from .models import SermonFacet, WorshipSermon
+
+
+def facet_keys(sermon):
+    """The ``(kind, value)`` pairs ``sermon`` counts towards."""
+    return (
+        (SermonFacet.YEAR, str(sermon.sermon_date.year)),
+        (SermonFacet.SPEAKER, sermon.speaker_name),
+    )
+
+
+def apply_changes(removed=(), added=()):
+    """Move counts from the ``removed`` facet keys to the ``added`` ones."""
+    deltas = Counter(added)
+    deltas.subtract(removed)
+    for (kind, value), delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        facet = SermonFacet.objects.filter(kind=kind, value=value)
+        if not facet.update(count=F("count") + delta) and delta > 0:
+            SermonFacet.objects.bulk_create(
+                [SermonFacet(kind=kind, value=value)], ignore_conflicts=True,
+            )
+            facet.update(count=F("count") + delta)
+        if delta < 0:
+            facet.filter(count__lte=0).delete()
+
+
+class Facets:
+    """Snapshot of the facet table: ``years`` and ``speakers`` as ``(value, count)``."""
+
+    def __init__(self, rows):
+        self.years = sorted(
+            ((int(value), count) for kind, value, count in rows if kind == SermonFacet.YEAR),
+            reverse=True,
+        )
+        self.speakers = sorted(
+            (value, count) for kind, value, count in rows if kind == SermonFacet.SPEAKER
+        )
+
+    @property
+    def total(self):
+        return sum(count for year, count in self.years)
+
+    def year_count(self, year):
+        return dict(self.years).get(year, 0)
+
+
+def get_facets():
+    return Facets(SermonFacet.objects.filter(count__gt=0).values_list("kind", "value", "count"))
+
+
+def rebuild_facets():
+    """Recount every facet from the sermon table. Returns the new ``Facets``."""
+    years = (
+        WorshipSermon.objects.annotate(year=ExtractYear("sermon_date"))
+        .values("year").annotate(n=Count("id")).order_by()
+    )
+    speakers = WorshipSermon.objects.values("speaker_name").annotate(n=Count("id")).order_by()
+    facets = [SermonFacet(kind=SermonFacet.YEAR, value=str(row["year"]), count=row["n"]) for row in years]
+    facets += [SermonFacet(kind=SermonFacet.SPEAKER, value=row["speaker_name"], count=row["n"]) for row in speakers]
+    with transaction.atomic():
+        SermonFacet.objects.all().delete()
+        SermonFacet.objects.bulk_create(facets)
+    return get_facets()
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from worships.facets import rebuild_facets
+
+
+class Command(BaseCommand):
+    help = "Recount the sermon archive's year and speaker filters from the sermon table."
+
+    def handle(self, *args, **options):
+        facets = rebuild_facets()
+        self.stdout.write(
+            f"{facets.total} sermons in {len(facets.years)} years by {len(facets.speakers)} speakers",
+            style_func=self.style.SUCCESS,
+        )
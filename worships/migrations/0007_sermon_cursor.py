@@ -0,0 +1,22 @@
+# Generated by Django 5.2.11 on 2026-10-18 16:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worships', '0006_worshipsermon_delete_worship'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='worshipsermon',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='worshipsermon',
+            index=models.Index(fields=['sermon_date', 'id'], name='sermon_date_cursor_idx'),
+        ),
+    ]
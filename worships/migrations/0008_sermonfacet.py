@@ -0,0 +1,41 @@
+# Generated by Django 5.2.11 on 2026-10-18 16:40
+
+from collections import Counter
+
+from django.db import migrations, models
+
+
+def count_facets(apps, schema_editor):
+    # Mirrors worships.facets.rebuild_facets() with the historical models
+    WorshipSermon = apps.get_model('worships', 'WorshipSermon')
+    SermonFacet = apps.get_model('worships', 'SermonFacet')
+    counts = Counter()
+    for sermon_date, speaker_name in WorshipSermon.objects.values_list('sermon_date', 'speaker_name').iterator():
+        counts['year', str(sermon_date.year)] += 1
+        counts['speaker', speaker_name] += 1
+    SermonFacet.objects.bulk_create(
+        SermonFacet(kind=kind, value=value, count=count) for (kind, value), count in counts.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worships', '0007_sermon_cursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SermonFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('year', '年份'), ('speaker', '講員')], max_length=16)),
+                ('value', models.CharField(max_length=100)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'value'), name='sermon_facet_unique_value')],
+            },
+        ),
+        migrations.RunPython(count_facets, migrations.RunPython.noop),
+    ]
@@ -7,11 +7,40 @@ class WorshipSermon(models.Model):
     sermon_title = models.CharField(max_length=200, verbose_name="講道題目")
     youtube_link = models.URLField(verbose_name="YouTube連結")
     sermon_date = models.DateField(default=timezone.now, verbose_name="講道日期")
+    # Drives the sermon API's ETag / Last-Modified, see views.sermons_version()
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ["-sermon_date"]
+        indexes = [
+            # Cursor order of the sermon API; also serves year ranges
+            models.Index(fields=["sermon_date", "id"], name="sermon_date_cursor_idx"),
+        ]
         verbose_name = "崇拜講道"
         verbose_name_plural = "崇拜講道集"
 
     def __str__(self):
         return f"{self.sermon_date} - {self.sermon_title} ({self.speaker_name})"
+
+
+class SermonFacet(models.Model):
+    """
+    Number of sermons per year and per speaker for the archive's filters.
+    Kept up to date incrementally by ``worships.signals``; see ``facets.py``.
+    """
+
+    YEAR = "year"
+    SPEAKER = "speaker"
+    KIND_CHOICES = [(YEAR, "年份"), (SPEAKER, "講員")]
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    value = models.CharField(max_length=100)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "value"], name="sermon_facet_unique_value"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.value}: {self.count}"
@@ -0,0 +1,41 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from .facets import apply_changes, facet_keys
+from .models import WorshipSermon
+
+FACET_FIELDS = ("sermon_date", "speaker_name")
+
+
+def _loaded(instance):
+    return all(field in instance.__dict__ for field in FACET_FIELDS)
+
+
+@receiver(post_init, sender=WorshipSermon)
+def remember_facets(sender, instance, **kwargs):
+    # What the row counts towards in the database, before any edits
+    instance._stored_facets = facet_keys(instance) if instance.pk and _loaded(instance) else None
+
+
+@receiver(pre_save, sender=WorshipSermon)
+def load_stored_facets(sender, instance, **kwargs):
+    if instance._state.adding:
+        instance._stored_facets = ()
+    elif instance._stored_facets is None:
+        # Loaded with .only()/.defer(); fetch what the row holds now
+        stored = sender._default_manager.filter(pk=instance.pk).first()
+        instance._stored_facets = facet_keys(stored) if stored else ()
+
+
+@receiver(post_save, sender=WorshipSermon)
+def sermon_saved(sender, instance, **kwargs):
+    current = facet_keys(instance)
+    apply_changes(removed=instance._stored_facets, added=current)
+    instance._stored_facets = current
+
+
+@receiver(post_delete, sender=WorshipSermon)
+def sermon_deleted(sender, instance, **kwargs):
+    stored = instance._stored_facets
+    apply_changes(removed=facet_keys(instance) if stored is None else stored)
+    instance._stored_facets = ()
@@ -1,3 +1,156 @@
+import io
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+
+from .facets import get_facets
+from .models import SermonFacet, WorshipSermon
+
+
+class SermonApiTests(TestCase):
+    url = reverse('worships:sermons_v1')
+
+    @classmethod
+    def setUpTestData(cls):
+        WorshipSermon.objects.bulk_create([
+            WorshipSermon(
+                sermon_title=f'講道 {i}', speaker_name='陳牧師',
+                youtube_link=f'https://youtu.be/{i}', sermon_date=sermon_date,
+            )
+            for i, sermon_date in enumerate([
+                date(2024, 12, 29), date(2025, 1, 5), date(2025, 1, 5),
+                date(2025, 6, 1), date(2025, 12, 28), date(2026, 1, 4),
+            ])
+        ])
+
+    def walk(self, **params):
+        """Every page for ``params``, following next_cursor."""
+        pages = []
+        cursor = None
+        while True:
+            query = dict(params, cursor=cursor) if cursor else params
+            data = self.client.get(self.url, query).json()
+            pages.append([row['sermon_title'] for row in data['sermons']])
+            cursor = data['next_cursor']
+            if not cursor:
+                return pages
+
+    def test_pages_follow_date_then_id(self):
+        self.assertEqual(self.walk(limit=2), [
+            ['講道 5', '講道 4'], ['講道 3', '講道 2'], ['講道 1', '講道 0'],
+        ])
+
+    def test_year_is_a_date_range(self):
+        self.assertEqual(self.walk(year=2025, limit=3), [['講道 4', '講道 3', '講道 2'], ['講道 1']])
+        self.assertEqual(self.walk(year='abc'), [[f'講道 {i}' for i in range(5, -1, -1)]])
+
+    def test_row_shape(self):
+        data = self.client.get(self.url, {'limit': 1}).json()
+        self.assertEqual(data['sermons'], [{
+            'id': WorshipSermon.objects.get(sermon_title='講道 5').pk,
+            'sermon_date': '2026-01-04',
+            'sermon_title': '講道 5',
+            'speaker_name': '陳牧師',
+            'youtube_link': 'https://youtu.be/5',
+        }])
+
+    def test_bad_cursor(self):
+        for cursor in ('x', '1.2.3', '0.1', f'{10 ** 20}.1'):
+            self.assertEqual(self.client.get(self.url, {'cursor': cursor}).status_code, 400, cursor)
+
+    def test_revalidation(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertIn('no-cache', response['Cache-Control'])
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        sermon = WorshipSermon.objects.get(sermon_title='講道 0')
+        sermon.sermon_title = '講道 0（重溫）'
+        sermon.save()
+        edited = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(edited.status_code, 200)
+        self.assertNotEqual(edited['ETag'], etag)
+
+        WorshipSermon.objects.filter(pk=sermon.pk).delete()
+        deleted = self.client.get(self.url, HTTP_IF_NONE_MATCH=edited['ETag'])
+        self.assertEqual(deleted.status_code, 200)
+
+    def test_legacy_url(self):
+        url = reverse('worships:get_sermons')
+        data = self.client.get(url, {'year': 2024}).json()
+        self.assertEqual(list(data), ['sermons'])
+        self.assertEqual([row['sermon_title'] for row in data['sermons']], ['講道 0'])
+        # Every sermon at once, whatever the limit
+        data = self.client.get(url, {'limit': 2}).json()
+        self.assertEqual([row['sermon_title'] for row in data['sermons']], [f'講道 {i}' for i in range(5, -1, -1)])
+
+
+class SermonFacetTests(TestCase):
+    def sermon(self, speaker, sermon_date):
+        return WorshipSermon.objects.create(
+            sermon_title='講道', speaker_name=speaker,
+            youtube_link='https://youtu.be/a', sermon_date=sermon_date,
+        )
+
+    def test_counts_follow_saves_and_deletes(self):
+        first = self.sermon('陳牧師', date(2025, 3, 2))
+        self.sermon('陳牧師', date(2026, 1, 4))
+        self.sermon('李傳道', date(2026, 2, 1))
+        facets = get_facets()
+        self.assertEqual(facets.years, [(2026, 2), (2025, 1)])
+        self.assertEqual(facets.speakers, [('李傳道', 1), ('陳牧師', 2)])
+        self.assertEqual(facets.total, 3)
+
+        first.speaker_name = '李傳道'
+        first.sermon_date = date(2026, 3, 1)
+        first.save()
+        facets = get_facets()
+        self.assertEqual(facets.years, [(2026, 3)])
+        self.assertEqual(facets.speakers, [('李傳道', 2), ('陳牧師', 1)])
+        # Emptied facets don't linger
+        self.assertFalse(SermonFacet.objects.filter(value='2025').exists())
+
+        # A partially loaded instance still moves the right counts
+        deferred = WorshipSermon.objects.only('sermon_title').get(pk=first.pk)
+        deferred.speaker_name = '陳牧師'
+        deferred.save()
+        self.assertEqual(get_facets().speakers, [('李傳道', 1), ('陳牧師', 2)])
+
+        WorshipSermon.objects.filter(speaker_name='陳牧師').delete()
+        self.assertEqual(get_facets().years, [(2026, 1)])
+        self.assertEqual(get_facets().speakers, [('李傳道', 1)])
+
+    def test_rebuild(self):
+        WorshipSermon.objects.bulk_create([
+            WorshipSermon(sermon_title='講道', speaker_name='陳牧師', youtube_link='https://youtu.be/a',
+                          sermon_date=date(2024, 5, day))
+            for day in range(1, 4)
+        ])
+        self.assertEqual(get_facets().total, 0)
+        call_command('rebuild_sermon_facets', stdout=io.StringIO())
+        self.assertEqual(get_facets().years, [(2024, 3)])
+
+    def test_archive_page(self):
+        for day in range(1, 13):
+            self.sermon('陳牧師', date(2025, 1, day))
+        self.sermon('李傳道', date(2024, 1, 1))
+        # The facet query and the page of sermons
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('worships:worship'), {'page': 2})
+        self.assertEqual(response.context['years'], [2025, 2024])
+        self.assertEqual(response.context['sermons'].paginator.num_pages, 2)
+        self.assertEqual(len(response.context['sermons']), 3)
 
-# Create your tests here.
+    def test_admin_speaker_filter(self):
+        self.sermon('陳牧師', date(2025, 1, 1))
+        self.sermon('李傳道', date(2025, 1, 8))
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        url = reverse('admin:worships_worshipsermon_changelist')
+        self.assertContains(self.client.get(url), '陳牧師 (1)')
+        response = self.client.get(url, {'speaker_name': '李傳道'})
+        self.assertEqual(list(response.context['cl'].result_list.values_list('speaker_name', flat=True)), ['李傳道'])
@@ -4,6 +4,8 @@ from . import views
 app_name = "worships"
 urlpatterns = [
     path("worship/", views.sermon_list, name="worship"),
-    path("api/sermons/", views.get_sermons, name="get_sermons"),
+    path("api/v1/sermons/", views.get_sermons, name="sermons_v1"),
+    # Unpaged, as before v1, for pages and clients that predate it
+    path("api/sermons/", views.get_sermons_legacy, name="get_sermons"),
     # path('', views.sermon_list, name='sermon_list'),  # Changed to empty path
 ]
@@ -1,58 +1,119 @@
+from datetime import date
+
 from django.shortcuts import render
 from django.http import JsonResponse
+from django.db.models import Count, Max, Q
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from activities.pagination import decode_cursor_parts
+from pagecache.cache import cache_anonymous_page
+from .facets import get_facets
 from .models import WorshipSermon
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 
 
+SERMON_API_FIELDS = ("id", "sermon_date", "sermon_title", "speaker_name", "youtube_link")
+SERMON_API_PAGE_SIZE = 20
+SERMON_API_MAX_PAGE_SIZE = 100
+
+
+def sermons_version():
+    """
+    ``(etag, last_modified)`` for the whole sermon table, from one aggregate.
+    Edits and inserts move ``Max(updated_at)``, deletes move the count.
+    """
+    state = WorshipSermon.objects.aggregate(changed=Max("updated_at"), count=Count("id"))
+    changed = state["changed"]
+    stamp = int(changed.timestamp() * 1_000_000) if changed else 0
+    return f"{stamp:x}-{state['count']:x}", changed
+
+
+def year_range(year):
+    """Date-range filter for ``year``, which (unlike ``__year``) can use an index."""
+    return Q(sermon_date__gte=date(year, 1, 1), sermon_date__lt=date(year + 1, 1, 1))
+
+
+def encode_sermon_cursor(row):
+    return f"{row['sermon_date'].toordinal()}.{row['id']}"
+
+
+def decode_sermon_cursor(token):
+    """Inverse of ``encode_sermon_cursor``. Raises ValueError on malformed tokens."""
+    return decode_cursor_parts(token, date.fromordinal, int)
+
+
+def _int_param(request, name, default=None):
+    try:
+        return int(request.GET[name])
+    except (KeyError, ValueError):
+        return default
+
+
+@require_safe
 def get_sermons(request):
-    """API endpoint for AJAX filtering"""
-    year = request.GET.get("year", "")
-
-    sermons = WorshipSermon.objects.all().order_by("-sermon_date")
-
-    if year:
-        try:
-            # Convert year to integer and filter
-            year_int = int(year)
-            sermons = sermons.filter(sermon_date__year=year_int)
-        except ValueError:
-            # If year is not a valid integer, return empty
-            pass
-
-    data = [
-        {
-            "id": sermon.id,
-            "sermon_date": sermon.sermon_date.strftime("%Y-%m-%d"),
-            "sermon_title": sermon.sermon_title,
-            "speaker_name": sermon.speaker_name,
-            "youtube_link": sermon.youtube_link,
-        }
-        for sermon in sermons
-    ]
-
-    return JsonResponse({"sermons": data})
+    """
+    Sermon API (v1), newest first, in pages of ``limit`` (default 20).
 
+    ``?year=`` restricts to one calendar year; ``?cursor=`` is the
+    ``next_cursor`` of the previous page. Each page is one index range scan
+    on ``(sermon_date, id)``. Responses carry an ETag for the table's last
+    change, so clients revalidate with a single aggregate query and a 304.
+    """
+    version, changed = sermons_version()
+    etag = f'"{version}"'
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        response = not_modified
+    else:
+        limit = min(max(_int_param(request, "limit", SERMON_API_PAGE_SIZE), 1), SERMON_API_MAX_PAGE_SIZE)
+        sermons = WorshipSermon.objects.order_by("-sermon_date", "-id")
+        year = _int_param(request, "year")
+        if year is not None and 1 <= year < 9999:
+            sermons = sermons.filter(year_range(year))
+        cursor = request.GET.get("cursor")
+        if cursor:
+            try:
+                after_date, after_id = decode_sermon_cursor(cursor)
+            except ValueError:
+                return JsonResponse({"error": "Invalid cursor."}, status=400)
+            sermons = sermons.filter(
+                Q(sermon_date__lt=after_date) | Q(sermon_date=after_date, id__lt=after_id)
+            )
+        rows = list(sermons.values(*SERMON_API_FIELDS)[: limit + 1])
+        next_cursor = encode_sermon_cursor(rows[limit - 1]) if len(rows) > limit else None
+        response = JsonResponse({"sermons": rows[:limit], "next_cursor": next_cursor})
+    response["ETag"] = etag
+    if changed:
+        response["Last-Modified"] = http_date(changed.timestamp())
+    # Always revalidate: a 304 costs one aggregate and no rows
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
 
-def sermon_list(request):
-    """Main view for worship sermons page"""
-    # Get all sermons ordered by date (newest first)
-    sermons_list = WorshipSermon.objects.all().order_by("-sermon_date")
 
-    # FIXED: Get years as integers, not date objects
-    from django.db.models.functions import ExtractYear
+@require_safe
+def get_sermons_legacy(request):
+    """
+    The unversioned API as it was before v1, for clients that don't follow
+    ``next_cursor``: every sermon (of ``?year=``) in one response.
+    """
+    sermons = WorshipSermon.objects.order_by("-sermon_date", "-id")
+    year = _int_param(request, "year")
+    if year is not None:
+        sermons = sermons.filter(year_range(year)) if 1 <= year < 9999 else sermons.none()
+    return JsonResponse({"sermons": list(sermons.values(*SERMON_API_FIELDS))})
 
-    years = (
-        WorshipSermon.objects.annotate(year=ExtractYear("sermon_date"))
-        .values_list("year", flat=True)
-        .distinct()
-        .order_by("-year")
-    )
 
-    # Convert QuerySet to list
-    years = list(years)
+@cache_anonymous_page
+def sermon_list(request):
+    """Main view for worship sermons page"""
+    # Newest first, in the order of the (sermon_date, id) index
+    sermons_list = WorshipSermon.objects.order_by("-sermon_date", "-id")
+    # Year dropdown and total from the facet counts, not a scan of the table
+    facets = get_facets()
 
-    # Pagination (optional - remove if not needed)
     paginator = Paginator(sermons_list, 10)  # 10 sermons per page
+    paginator.count = facets.total  # skips the COUNT(*)
     page = request.GET.get("page")
 
     try:
@@ -66,6 +127,6 @@ def sermon_list(request):
 
     context = {
         "sermons": sermons,  # Paginated sermons
-        "years": years,  # List of integers like [2026, 2025, 2024]
+        "years": [year for year, count in facets.years],  # Like [2026, 2025, 2024]
     }
     return render(request, "worships/worship.html", context)